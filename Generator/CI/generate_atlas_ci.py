@@ -51,22 +51,29 @@ def progress_callback(step, total, message):
         print(f"::notice title=Progress {percentage}%::{message}", flush=True)
 
 
-def generate_atlases_ci(input_folder: str, output_folder: str):
+def generate_atlases_ci(input_folder: str, output_folder: str, options=None):
     """
     Generates atlases from source images for CI
     
     Args:
         input_folder: Folder containing source images
         output_folder: Output folder for atlases
+        options: generate_posters.AtlasOptions of the build (None = defaults); max_atlas_size, padding
+            and max_image_size are taken from the manifest metadata when it has them, and the catalog
+            index is kept in output_folder
     """
     github_group("🎨 Generating atlases")
     
     # Add parent folder to path to import generate_posters
     sys.path.insert(0, str(Path(__file__).parent.parent))
     
-    from generate_posters import main as generate_atlases
+    from generate_posters import main as generate_atlases, AtlasOptions
+    from catalog import CatalogIndex
+    from dataclasses import replace
     import json
     
+    options = options or AtlasOptions()
+    
     print(f"📂 Input folder: {input_folder}")
     print(f"📂 Output folder: {output_folder}")
     
@@ -77,9 +84,9 @@ def generate_atlases_ci(input_folder: str, output_folder: str):
         sys.exit(1)
     
     # Load configuration from manifest.json if it exists
-    max_atlas_size = 2048  # Default
-    padding = 2  # Default
-    max_image_size = None  # Default (will use max_atlas_size)
+    max_atlas_size = options.max_atlas_size
+    padding = options.padding
+    max_image_size = options.max_image_size  # None = max_atlas_size
     
     manifest_file = Path(input_folder) / 'manifest.json'
     if manifest_file.exists():
@@ -106,12 +113,15 @@ def generate_atlases_ci(input_folder: str, output_folder: str):
             print(f"⚠️ Warning: Could not read generation parameters from manifest.json: {e}")
             print(f"   Using default values instead")
     
-    # Count images
-    image_files = [
-        f for f in os.listdir(input_folder)
-        if f.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.bmp', '.webp'))
-    ]
-    print(f"🖼️ {len(image_files)} images found")
+    # Count images through the catalog index kept with the build output (restored by the
+    # Actions cache); checkouts reset mtimes, so files are hashed again but their headers
+    # are only read when the content changed
+    catalog_index = str(Path(output_folder) / '.catalog_index.json')
+    os.makedirs(output_folder, exist_ok=True)
+    catalog = CatalogIndex(input_folder, catalog_index)
+    image_files = list(catalog.scan())
+    catalog.save()
+    print(f"🖼️ {len(image_files)} images found ({catalog.indexed} indexed, {catalog.reused} unchanged)")
     
     if not image_files:
         print("⚠️ No valid images found")
@@ -119,14 +129,9 @@ def generate_atlases_ci(input_folder: str, output_folder: str):
         sys.exit(1)
     
     # Generate atlases using refactored function with callback and configuration
-    atlas_data = generate_atlases(
-        input_folder, 
-        output_folder, 
-        max_atlas_size=max_atlas_size,
-        padding=padding,
-        max_image_size=max_image_size,
-        progress_callback=progress_callback
-    )
+    options = replace(options, max_atlas_size=max_atlas_size, padding=padding, max_image_size=max_image_size,
+                      catalog_index=catalog_index)
+    atlas_data = generate_atlases(input_folder, output_folder, progress_callback=progress_callback, options=options)
     
     github_endgroup()
     
@@ -146,9 +151,57 @@ def generate_atlases_ci(input_folder: str, output_folder: str):
     github_output('num_images', str(num_images))
     github_output('downscales', scales_str)
     
+    report_build_stats(output_folder)
+    
     return atlas_data
 
 
+def report_build_stats(output_folder: str):
+    """
+    Adds the phase timings of the build (build_stats.json) to the GitHub Actions step summary
+    
+    Args:
+        output_folder: Output folder of the atlases
+    """
+    import json
+    
+    stats_file = Path(output_folder) / 'build_stats.json'
+    if not stats_file.exists():
+        return
+    
+    with open(stats_file, 'r', encoding='utf-8') as f:
+        stats = json.load(f)
+    
+    lines = [
+        f"### ⏱️ Atlas build: {stats['total_seconds']:.1f}s",
+        "",
+        "| Phase | Time | Calls |",
+        "|---|---:|---:|"
+    ]
+    for name, phase in stats['phases'].items():
+        lines.append(f"| {name} | {phase['seconds']:.2f}s | {phase['calls']} |")
+    
+    lines += ["", "| Scale | Search | Layouts evaluated | Atlases | Lower bound |", "|---|---:|---:|---:|---:|"]
+    for scale, scale_stats in stats['scales'].items():
+        search = scale_stats.get('phases', {}).get('search', {}).get('seconds', 0)
+        lines.append(f"| x{scale} | {search:.2f}s | {scale_stats.get('layouts_evaluated', 0)} | "
+                     f"{len(scale_stats.get('search', []))} | {scale_stats.get('lower_bound', '-')} |")
+    
+    counters = stats.get('counters', {})
+    lines += ["", ", ".join(f"{name}: {value}" for name, value in counters.items())]
+    
+    profile = stats.get('profile')
+    if profile:
+        lines += ["", "<details><summary>Profile (cumulative time)</summary>", "",
+                  "| Function | Calls | Cumulative |", "|---|---:|---:|"]
+        for function in profile['functions'][:10]:
+            lines.append(f"| `{function['function']}` | {function['calls']} | {function['cumulative_seconds']:.2f}s |")
+        lines += ["", f"Python memory peak: {profile['python_memory_peak_kb'] / 1024:.1f} MB", "</details>"]
+    
+    print("\n".join(lines))
+    github_summary("\n".join(lines))
+
+
 def generate_static_ci(atlas_folder: str, output_static_folder: str):
     """
     Generates static version for GitHub Pages in CI context
@@ -262,6 +315,13 @@ def generate_static_ci(atlas_folder: str, output_static_folder: str):
 if __name__ == '__main__':
     import argparse
     
+    sys.path.insert(0, str(Path(__file__).parent.parent))
+    from generate_posters import (AtlasOptions, ATLAS_SHAPES, ATLAS_SNAPS, DEDUP_MODES, LOCAL_SEARCHES,
+                                  PACKER_FAMILIES, PACKING_MODES)
+    from block_compression import BLOCK_FORMATS
+    
+    # Curated subset of the generate_posters.py options, with English help; the flags are named
+    # after the AtlasOptions fields so AtlasOptions.from_args picks them up
     parser = argparse.ArgumentParser(description='Generate atlases for CI/CD')
     parser.add_argument('command', choices=['generate', 'static'], 
                        help='Command to execute')
@@ -271,10 +331,51 @@ if __name__ == '__main__':
                        help='Atlas output folder')
     parser.add_argument('--static-output', default='output_static',
                        help='Static version output folder')
+    parser.add_argument('--incremental', action='store_true',
+                       help='Reuse unchanged atlases from the previous build found in the output folder')
+    parser.add_argument('--png-compress-level', type=int, default=None, choices=range(10), metavar='{0-9}',
+                       help='PNG compression level, lower is faster (default: maximum compression)')
+    parser.add_argument('--streaming', action='store_true',
+                       help='Low memory mode for large catalogs: only image dimensions stay in memory')
+    parser.add_argument('--memory-limit', dest='memory_limit_mb', metavar='MEMORY_LIMIT', type=int, default=None,
+                       help='Max memory of atlases being composited/encoded, in MB (default: unlimited)')
+    parser.add_argument('--draft-decode', action='store_true',
+                       help='Decode JPEG sources larger than max_image_size at reduced resolution (faster, less memory)')
+    parser.add_argument('--profile', action='store_true',
+                       help='Profile the build with cProfile and tracemalloc (build_profile.prof in the output folder)')
+    parser.add_argument('--time-budget', type=float, default=None,
+                       help='Max seconds spent searching each atlas, for fast preview builds (default: full search)')
+    parser.add_argument('--max-evaluations', type=int, default=None,
+                       help='Max layouts evaluated per atlas, most successful configurations first (default: full search)')
+    parser.add_argument('--local-search', choices=LOCAL_SEARCHES, default='random',
+                       help='Search after the configuration grid: random orders or simulated annealing (default: random)')
+    parser.add_argument('--annealing-steps', type=int, default=200,
+                       help='Simulated annealing steps (default: 200)')
+    parser.add_argument('--packers', nargs='+', choices=list(PACKER_FAMILIES), default=['maxrects'],
+                       help='Packer families tried by the layout search (default: maxrects)')
+    parser.add_argument('--packing-mode', choices=PACKING_MODES, default='greedy',
+                       help='Fill one atlas at a time (greedy) or pack all atlases at once for the fewest atlases (global) '
+                            '(default: greedy)')
+    parser.add_argument('--atlas-shapes', choices=ATLAS_SHAPES, default='square',
+                       help='Atlas shapes tried by the layout search (default: square)')
+    parser.add_argument('--atlas-snap', choices=ATLAS_SNAPS, default='none',
+                       help='Round atlas dimensions to multiples of 4 or powers of two (default: none)')
+    parser.add_argument('--persistent-layout-cache', action='store_true',
+                       help='Keep computed layouts in the output folder (.layout_cache.json) for the next build')
+    parser.add_argument('--allow-rotation', action='store_true',
+                       help='Let the packers turn images by 90 degrees for denser atlases')
+    parser.add_argument('--trim-alpha', action='store_true',
+                       help='Crop fully transparent margins before packing')
+    parser.add_argument('--dedup', choices=DEDUP_MODES, default='none',
+                       help='Pack duplicate images once: same file or pixels (exact), also near-duplicates '
+                            '(perceptual) (default: none)')
+    parser.add_argument('--block-formats', nargs='+', choices=BLOCK_FORMATS, default=[],
+                       help='Also write each atlas as block compressed DDS textures (bc1 opaque, bc3 with alpha), '
+                            'placements aligned to 4x4 blocks (requires numpy)')
     
     args = parser.parse_args()
     
     if args.command == 'generate':
-        generate_atlases_ci(args.input, args.output)
+        generate_atlases_ci(args.input, args.output, AtlasOptions.from_args(args))
     elif args.command == 'static':
         generate_static_ci(args.output, args.static_output)
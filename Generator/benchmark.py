@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmarks for the atlas packing code
+Uses seeded synthetic data so runs can be compared with each other
+"""
+
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from PIL import Image, ImageChops, ImageStat
+
+from generate_posters import (AtlasGenerator, BinPacker, GuillotinePacker, NumpyBinPacker, SkylinePacker, LOCAL_SEARCHES,
+                              MIP_MODES, PACKER_ENGINES, PACKER_FAMILIES, create_bin_packer, np)
+
+try:
+    import resource
+except ImportError:  # Not available on Windows, peak RSS is then not reported
+    resource = None
+
+
+def synthetic_rectangles(count, bin_size, fill_ratio=0.6, seed=0):
+    """
+    Generates rectangles whose total area is about fill_ratio of the bin
+
+    Args:
+        count: Number of rectangles
+        bin_size: Side of the (square) bin
+        fill_ratio: Target total area relative to the bin area
+        seed: Random seed
+
+    Returns:
+        list: List of (width, height) tuples
+    """
+    rng = random.Random(seed)
+    mean_side = max(1, int((bin_size * bin_size * fill_ratio / count) ** 0.5))
+    rectangles = []
+    for _ in range(count):
+        width = max(1, int(mean_side * rng.uniform(0.5, 1.5)))
+        height = max(1, int(mean_side * rng.uniform(0.5, 1.5)))
+        rectangles.append((width, height))
+    return rectangles
+
+
+def bench_binpacker(counts, bin_size=2048, placement_strategy='best_area_fit', legacy_max=1000, seed=0):
+    """
+    Measures BinPacker insert time with and without the free rectangle index,
+    NumpyBinPacker when NumPy is installed, and SkylinePacker / GuillotinePacker
+    with their default strategies
+
+    Args:
+        counts: Numbers of inserts to measure
+        bin_size: Side of the bin
+        placement_strategy: BinPacker placement strategy
+        legacy_max: Largest count also measured without the index (it scales badly)
+        seed: Random seed
+
+    Returns:
+        list: One result dict per count
+    """
+    variants = {
+        'indexed': lambda: BinPacker(bin_size, bin_size, placement_strategy),
+        'legacy': lambda: BinPacker(bin_size, bin_size, placement_strategy, use_index=False),
+    }
+    if np is not None:
+        variants['numpy'] = lambda: NumpyBinPacker(bin_size, bin_size, placement_strategy)
+    variants['skyline'] = lambda: SkylinePacker(bin_size, bin_size)
+    variants['guillotine'] = lambda: GuillotinePacker(bin_size, bin_size)
+
+    results = []
+    for count in counts:
+        rectangles = synthetic_rectangles(count, bin_size, seed=seed)
+        result = {'inserts': count}
+
+        for name, create_packer in variants.items():
+            if name == 'legacy' and count > legacy_max:
+                result[name] = None
+                continue
+
+            packer = create_packer()
+            start = time.perf_counter()
+            placed = sum(1 for width, height in rectangles if packer.insert(width, height))
+            elapsed = time.perf_counter() - start
+
+            result[name] = {
+                'seconds': elapsed,
+                'placed': placed,
+                'free_rectangles': len(packer.free_rectangles)
+            }
+
+        results.append(result)
+
+        line = f"{count:>6} inserts"
+        for name in variants:
+            if result[name] is None:
+                line += f" | {name}: skipped"
+            else:
+                line += (f" | {name}: {result[name]['seconds'] * 1000:9.1f} ms "
+                         f"({result[name]['placed']} placed, {result[name]['free_rectangles']} free)")
+        print(line, flush=True)
+
+    return results
+
+
+def image_error(image, reference):
+    """
+    Compares two RGBA images of the same size
+
+    Returns:
+        dict: Mean absolute error, max error (0-255) and PSNR in dB over all channels
+    """
+    difference = ImageChops.difference(image, reference)
+    stat = ImageStat.Stat(difference)
+    mean_error = sum(stat.mean) / len(stat.mean)
+    max_error = max(high for _, high in stat.extrema)
+    rms = math.sqrt(sum(value * value for value in stat.rms) / len(stat.rms))
+    psnr = 20 * math.log10(255 / rms) if rms > 0 else float('inf')
+    return {'mean': mean_error, 'max': max_error, 'psnr': psnr}
+
+
+def check_mip_error(input_folder, max_image_size=2048, modes=None):
+    """
+    Measures the pixel error of mip chain modes against independent LANCZOS downscaling
+
+    Args:
+        input_folder: Folder containing source images
+        max_image_size: Max image size before processing
+        modes: Mip modes to compare (default: every chain mode available)
+
+    Returns:
+        dict: Per mode, time spent and the error of each scale level
+    """
+    if modes is None:
+        modes = [mode for mode in MIP_MODES if mode != 'independent' and (mode != 'numpy' or np is not None)]
+
+    with tempfile.TemporaryDirectory() as output_folder:
+        generators = {mode: AtlasGenerator(output_folder=output_folder, max_image_size=max_image_size, mip_mode=mode)
+                      for mode in ['independent'] + modes}
+        loader = generators['independent']
+
+        images = []
+        for filename in sorted(os.listdir(input_folder)):
+            if filename.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff')):
+                images.append(loader.load_image(os.path.join(input_folder, filename), filename, ''))
+
+        results = {}
+        levels = {}
+        for mode, generator in generators.items():
+            start = time.perf_counter()
+            levels[mode] = []
+            for img in images:
+                previous = None
+                chain = {}
+                for scale_factor in generator.scale_factors[1:]:
+                    scaled = generator.get_scaled_image(img, '', scale_factor, previous)
+                    previous = (scale_factor, scaled)
+                    chain[scale_factor] = scaled
+                levels[mode].append(chain)
+            results[mode] = {'seconds': time.perf_counter() - start, 'scales': {}}
+
+        for mode in modes:
+            for scale_factor in loader.scale_factors[1:]:
+                errors = [image_error(chain[scale_factor], reference[scale_factor])
+                          for chain, reference in zip(levels[mode], levels['independent'])]
+                results[mode]['scales'][scale_factor] = {
+                    'mean': sum(e['mean'] for e in errors) / len(errors) if errors else 0,
+                    'max': max((e['max'] for e in errors), default=0),
+                    'psnr': min((e['psnr'] for e in errors), default=float('inf'))
+                }
+
+    print(f"{len(images)} images, independent LANCZOS: {results['independent']['seconds'] * 1000:.0f} ms")
+    for mode in modes:
+        print(f"  {mode:<8} {results[mode]['seconds'] * 1000:8.0f} ms", end='')
+        for scale_factor, error in results[mode]['scales'].items():
+            print(f" | x{scale_factor}: mean {error['mean']:.2f}, max {error['max']}, "
+                  f"worst PSNR {error['psnr']:.1f} dB", end='')
+        print()
+
+    return results
+
+
+def bench_decode(input_folder, max_image_size=2048, repeat=3):
+    """
+    Measures source loading with and without draft decoding, and the pixel error it introduces
+
+    Args:
+        input_folder: Folder containing source images
+        max_image_size: Max image size before processing
+        repeat: Runs per mode, the fastest one is kept
+
+    Returns:
+        dict: Per mode, load time and decode statistics, plus the error of draft against full decoding
+    """
+    filenames = [f for f in sorted(os.listdir(input_folder))
+                 if f.lower().endswith(('.png', '.jpg', '.jpeg', '.bmp', '.tiff'))]
+
+    results = {}
+    loaded = {}
+    with tempfile.TemporaryDirectory() as output_folder:
+        for mode, draft_decode in (('full', False), ('draft', True)):
+            best = None
+            for _ in range(repeat):
+                generator = AtlasGenerator(output_folder=output_folder, max_image_size=max_image_size,
+                                           draft_decode=draft_decode)
+                with contextlib.redirect_stdout(io.StringIO()):
+                    images = [generator.load_image(os.path.join(input_folder, f), f, '') for f in filenames]
+                stats = generator.decode_stats
+                if best is None or stats['seconds'] < best['seconds']:
+                    best = dict(stats)
+            results[mode] = best
+            loaded[mode] = images
+
+    errors = [image_error(draft, full) for draft, full in zip(loaded['draft'], loaded['full'])
+              if draft.size == full.size]
+    results['error'] = {
+        'mean': sum(e['mean'] for e in errors) / len(errors) if errors else 0,
+        'max': max((e['max'] for e in errors), default=0),
+        'psnr': min((e['psnr'] for e in errors), default=float('inf'))
+    }
+
+    mb = 1024 * 1024
+    full, draft = results['full'], results['draft']
+    print(f"{len(filenames)} images, {draft['drafted']} drafted")
+    for mode in ('full', 'draft'):
+        stats = results[mode]
+        print(f"  {mode:<6} {stats['seconds'] * 1000:8.0f} ms | decoded {stats['decoded_bytes'] / mb:8.0f} MB "
+              f"| largest buffer {stats['peak_decoded_bytes'] / mb:6.0f} MB")
+    if full['seconds'] > 0:
+        print(f"  saved  {(full['seconds'] - draft['seconds']) * 1000:8.0f} ms "
+              f"({(1 - draft['seconds'] / full['seconds']) * 100:.0f}%), "
+              f"largest buffer -{(full['peak_decoded_bytes'] - draft['peak_decoded_bytes']) / mb:.0f} MB")
+    print(f"  draft vs full: mean error {results['error']['mean']:.2f}, max {results['error']['max']}, "
+          f"worst PSNR {results['error']['psnr']:.1f} dB")
+
+    return results
+
+
+# Aspect ratio (width / height) ranges of each catalog mix, one range picked at random per image
+ASPECT_MIXES = {
+    'square': [(0.9, 1.1)],
+    'portrait': [(0.6, 0.8)],
+    'landscape': [(1.25, 1.8)],
+    'mixed': [(0.5, 0.8), (0.9, 1.1), (1.25, 2.0), (2.5, 4.0)],
+}
+
+SUITE_TARGETS = ('binpacker', 'pack_images_in_atlas', 'find_best_single_atlas', 'find_best_packing')
+
+
+def synthetic_catalog(count, aspect_mix='mixed', size_spread=2.0, mean_side=256, seed=0):
+    """
+    Generates poster dimensions with a given aspect ratio mix and size spread
+
+    Args:
+        count: Number of images
+        aspect_mix: Key of ASPECT_MIXES
+        size_spread: Ratio between the largest and the smallest image side (1 = all the same size)
+        mean_side: Geometric mean of the image sides
+        seed: Random seed
+
+    Returns:
+        list: List of (filename, width, height) tuples
+    """
+    rng = random.Random(seed)
+    ranges = ASPECT_MIXES[aspect_mix]
+    entries = []
+    for index in range(count):
+        low, high = rng.choice(ranges)
+        ratio = rng.uniform(low, high)
+        side = mean_side * size_spread ** rng.uniform(-0.5, 0.5)
+        width = max(1, int(side * ratio ** 0.5))
+        height = max(1, int(side / ratio ** 0.5))
+        entries.append((f"poster_{index:04d}.png", width, height))
+    return entries
+
+
+def _peak_rss_mb():
+    """Peak resident memory of the current process in MB, None where unavailable (Windows)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes on Linux
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _run_suite_case(case):
+    """
+    Runs one benchmark case, meant to be called in a fresh process so peak RSS is per case
+
+    Args:
+        case: Dict with target, strategy, catalog parameters and atlas size
+
+    Returns:
+        dict: The case with its measures
+    """
+    entries = synthetic_catalog(case['count'], case['aspect_mix'], case['size_spread'], case['mean_side'], case['seed'])
+    atlas_size = case['atlas_size']
+    target = case['target']
+    strategy = case['strategy']
+
+    with tempfile.TemporaryDirectory() as output_folder:
+        generator = AtlasGenerator(max_atlas_size=atlas_size, output_folder=output_folder,
+                                   packer_engine=strategy if target.startswith('find_best') else 'python',
+                                   local_search=case['local_search'])
+
+        images = None
+        if target != 'binpacker':
+            color = (128, 128, 128, 255)
+            images = [(filename, Image.new('RGBA', (width, height), color)) for filename, width, height in entries]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            if target == 'binpacker':
+                # Greedy fill in area order, a new bin whenever the current one is full
+                padding = generator.padding * 2
+                packers = []
+                for _, width, height in sorted(entries, key=lambda e: e[1] * e[2], reverse=True):
+                    if not packers or packers[-1].insert(width + padding, height + padding) is None:
+                        packers.append(create_bin_packer(atlas_size, atlas_size, strategy))
+                        packers[-1].insert(width + padding, height + padding)
+                evaluations = len(entries)
+                atlases = [(atlas_size, atlas_size)] * len(packers)
+                placed = len(entries)
+            elif target == 'pack_images_in_atlas':
+                # Same loop as test_packing_configuration, one placement strategy
+                atlases = []
+                remaining = images
+                while remaining:
+                    atlas, uv_coords = generator.pack_images_in_atlas(remaining, 'area', strategy)
+                    if not uv_coords:
+                        break
+                    atlases.append(atlas.size)
+                    remaining = [(name, img) for name, img in remaining if name not in uv_coords]
+                evaluations = generator.layouts_evaluated
+                placed = len(images) - len(remaining)
+            elif target == 'find_best_single_atlas':
+                result = generator.find_best_single_atlas(images)
+                atlases = [(result['width'], result['height'])] if result else []
+                evaluations = generator.layouts_evaluated
+                placed = result['count'] if result else 0
+            else:
+                result = generator.find_best_packing(images)
+                atlases = [(a['width'], a['height']) for a in result['atlases']]
+                evaluations = generator.layouts_evaluated
+                placed = sum(a['count'] for a in result['atlases'])
+            elapsed = time.perf_counter() - start
+        generator.close()
+
+    placed_area = sum(width * height for _, width, height in entries) if placed == len(entries) else None
+    atlas_area = sum(width * height for width, height in atlases)
+    return dict(case,
+                seconds=elapsed,
+                evaluations=evaluations,
+                evaluations_per_second=evaluations / elapsed if elapsed > 0 else None,
+                atlases=len(atlases),
+                placed=placed,
+                atlas_area=atlas_area,
+                efficiency=placed_area / atlas_area * 100 if placed_area and atlas_area else None,
+                peak_rss_mb=_peak_rss_mb())
+
+
+def run_suite(counts, aspect_mixes, size_spreads, targets=SUITE_TARGETS, mean_side=256, atlas_size=2048, seed=0,
+              local_search='random'):
+    """
+    Runs every target and strategy on every synthetic catalog, each case in its own process
+
+    Args:
+        counts: Catalog sizes
+        aspect_mixes: Keys of ASPECT_MIXES
+        size_spreads: Size spreads (see synthetic_catalog)
+        targets: Functions to measure (see SUITE_TARGETS)
+        mean_side: Geometric mean of the image sides
+        atlas_size: Max atlas size
+        seed: Random seed of the catalogs
+        local_search: Local search of the find_best targets (see LOCAL_SEARCHES)
+
+    Returns:
+        dict: Run information and one result per case
+    """
+    placement_strategies = [strategy for family_strategies in PACKER_FAMILIES.values() for strategy in family_strategies]
+    engines = [engine for engine in PACKER_ENGINES if engine != 'numpy' or np is not None]
+
+    cases = []
+    for count in counts:
+        for aspect_mix in aspect_mixes:
+            for size_spread in size_spreads:
+                for target in targets:
+                    strategies = engines if target.startswith('find_best') else placement_strategies
+                    for strategy in strategies:
+                        cases.append({'target': target, 'strategy': strategy, 'count': count,
+                                      'aspect_mix': aspect_mix, 'size_spread': size_spread,
+                                      'mean_side': mean_side, 'atlas_size': atlas_size, 'seed': seed,
+                                      'local_search': local_search})
+
+    results = []
+    for case in cases:
+        # A fresh process per case keeps peak RSS measures independent
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            result = executor.submit(_run_suite_case, case).result()
+        results.append(result)
+
+        efficiency = f"{result['efficiency']:5.1f}%" if result['efficiency'] is not None else "  n/a "
+        rss = f"{result['peak_rss_mb']:6.0f} MB" if result['peak_rss_mb'] is not None else "   n/a"
+        print(f"{result['target']:<22} {result['strategy']:<30} {result['count']:>5} {result['aspect_mix']:<9} "
+              f"x{result['size_spread']:<4} | {result['seconds'] * 1000:9.1f} ms | "
+              f"{result['evaluations_per_second'] or 0:9.1f} eval/s | {result['atlases']:>3} atlases | "
+              f"{efficiency} | {rss}", flush=True)
+
+    return {
+        'version': 1,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'numpy': np is not None,
+        'results': results
+    }
+
+
+def _case_key(result):
+    return (result['target'], result['strategy'], result['count'], result['aspect_mix'],
+            result['size_spread'], result['mean_side'], result['atlas_size'], result['seed'],
+            result.get('local_search', 'random'))
+
+
+def compare_suites(current, baseline, tolerance=0.2):
+    """
+    Lists the regressions of a suite run against a baseline run
+
+    A case regresses when it is slower than the baseline by more than tolerance, or when it
+    produces more atlases or a lower efficiency (layouts are deterministic for a given seed).
+
+    Returns:
+        list: Human readable regression messages
+    """
+    baseline_results = {_case_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        previous = baseline_results.get(_case_key(result))
+        if previous is None:
+            continue
+        name = f"{result['target']}/{result['strategy']} n={result['count']} {result['aspect_mix']} x{result['size_spread']}"
+        if result['seconds'] > previous['seconds'] * (1 + tolerance):
+            regressions.append(f"{name}: {previous['seconds'] * 1000:.1f} ms → {result['seconds'] * 1000:.1f} ms")
+        if result['atlases'] > previous['atlases']:
+            regressions.append(f"{name}: {previous['atlases']} → {result['atlases']} atlases")
+        if (result['efficiency'] is not None and previous['efficiency'] is not None
+                and result['efficiency'] < previous['efficiency'] - 1e-9):
+            regressions.append(f"{name}: efficiency {previous['efficiency']:.2f}% → {result['efficiency']:.2f}%")
+    return regressions
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmarks the atlas packing code')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    binpacker_parser = subparsers.add_parser('binpacker', help='BinPacker insert scaling')
+    binpacker_parser.add_argument('--counts', type=int, nargs='+', default=[50, 200, 500, 1000, 2000, 5000],
+                                  help='Numbers of inserts (default: 50 200 500 1000 2000 5000)')
+    binpacker_parser.add_argument('--bin-size', type=int, default=2048,
+                                  help='Side of the bin (default: 2048)')
+    binpacker_parser.add_argument('--placement', default='best_area_fit',
+                                  help='Placement strategy (default: best_area_fit)')
+    binpacker_parser.add_argument('--legacy-max', type=int, default=1000,
+                                  help='Largest insert count also run without the index (default: 1000)')
+    binpacker_parser.add_argument('--seed', type=int, default=0,
+                                  help='Random seed (default: 0)')
+
+    mip_parser = subparsers.add_parser('mip-error', help='Pixel error of mip chain modes against independent LANCZOS')
+    mip_parser.add_argument('--input', default='input_images',
+                            help='Input images folder (default: input_images)')
+    mip_parser.add_argument('--max-image-size', type=int, default=2048,
+                            help='Max image size before processing (default: 2048)')
+    mip_parser.add_argument('--modes', nargs='+', choices=[m for m in MIP_MODES if m != 'independent'], default=None,
+                            help='Mip modes to compare (default: all available)')
+
+    decode_parser = subparsers.add_parser('decode', help='Source loading with and without JPEG draft decoding')
+    decode_parser.add_argument('--input', default='input_images',
+                               help='Input images folder (default: input_images)')
+    decode_parser.add_argument('--max-image-size', type=int, default=2048,
+                               help='Max image size before processing (default: 2048)')
+    decode_parser.add_argument('--repeat', type=int, default=3,
+                               help='Runs per mode, the fastest one is kept (default: 3)')
+
+    suite_parser = subparsers.add_parser('suite', help='Packing functions on seeded synthetic catalogs, saved as JSON')
+    suite_parser.add_argument('--counts', type=int, nargs='+', default=[50, 200],
+                              help='Catalog sizes (default: 50 200)')
+    suite_parser.add_argument('--aspects', nargs='+', choices=list(ASPECT_MIXES), default=['mixed', 'portrait'],
+                              help='Aspect ratio mixes (default: mixed portrait)')
+    suite_parser.add_argument('--spreads', type=float, nargs='+', default=[1.5, 4.0],
+                              help='Size spreads, largest / smallest side (default: 1.5 4)')
+    suite_parser.add_argument('--targets', nargs='+', choices=SUITE_TARGETS, default=list(SUITE_TARGETS),
+                              help='Functions to measure (default: all)')
+    suite_parser.add_argument('--mean-side', type=int, default=256,
+                              help='Geometric mean of the image sides (default: 256)')
+    suite_parser.add_argument('--atlas-size', type=int, default=2048,
+                              help='Max atlas size (default: 2048)')
+    suite_parser.add_argument('--seed', type=int, default=0,
+                              help='Random seed of the catalogs (default: 0)')
+    suite_parser.add_argument('--local-search', choices=LOCAL_SEARCHES, default='random',
+                              help='Local search of find_best_single_atlas and find_best_packing (default: random)')
+    suite_parser.add_argument('--output', default='benchmark_results.json',
+                              help='JSON results file (default: benchmark_results.json)')
+    suite_parser.add_argument('--baseline', default=None,
+                              help='Previous JSON results to compare with, exits with 1 on regression')
+    suite_parser.add_argument('--tolerance', type=float, default=0.2,
+                              help='Allowed slowdown against the baseline (default: 0.2 = 20%%)')
+
+    args = parser.parse_args()
+
+    if args.command == 'binpacker':
+        bench_binpacker(args.counts, args.bin_size, args.placement, args.legacy_max, args.seed)
+    elif args.command == 'mip-error':
+        check_mip_error(args.input, args.max_image_size, args.modes)
+    elif args.command == 'decode':
+        bench_decode(args.input, args.max_image_size, args.repeat)
+    elif args.command == 'suite':
+        suite = run_suite(args.counts, args.aspects, args.spreads, args.targets, args.mean_side, args.atlas_size, args.seed,
+                          args.local_search)
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(suite, f, indent=2)
+        print(f"Results saved to {args.output}")
+
+        if args.baseline:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            regressions = compare_suites(suite, baseline, args.tolerance)
+            for regression in regressions:
+                print(f"REGRESSION {regression}")
+            if regressions:
+                sys.exit(1)
+            print("No regression against the baseline")
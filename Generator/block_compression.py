@@ -0,0 +1,157 @@
+"""
+BC1 / BC3 (DXT1 / DXT5) block compression of RGBA atlases, written as DDS files
+
+GPUs sample these formats directly, so an atlas takes 4 bits (BC1) or 8 bits (BC3) per pixel
+in VRAM instead of 32. Each 4x4 block stores two RGB565 endpoints taken along the principal
+axis of its colors, every pixel picking the interpolated color nearest to its projection on
+them; BC3 adds an interpolated alpha block (8 levels between the block's min and max alpha).
+BC1 keeps no alpha.
+
+Requires NumPy: all blocks of an atlas are encoded in a few vectorized passes.
+"""
+
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # Optional, only needed when block formats are requested
+    np = None
+
+# Block compressed formats and their DDS FourCC and bytes per 4x4 block
+BLOCK_FORMATS = ('bc1', 'bc3')
+BLOCK_FORMAT_INFO = {
+    'bc1': (b'DXT1', 8),
+    'bc3': (b'DXT5', 16),
+}
+
+# Side of a compression block, in pixels: atlas placements are aligned on it
+BLOCK_SIZE = 4
+
+DDSD_CAPS, DDSD_HEIGHT, DDSD_WIDTH, DDSD_PIXELFORMAT, DDSD_LINEARSIZE = 0x1, 0x2, 0x4, 0x1000, 0x80000
+DDPF_FOURCC = 0x4
+DDSCAPS_TEXTURE = 0x1000
+
+# Power iterations estimating the principal color axis of each block
+PRINCIPAL_AXIS_ITERATIONS = 4
+
+
+def _blocks(pixels: 'np.ndarray') -> 'np.ndarray':
+    """Splits an (height, width, 4) array into (blocks, 16, 4) pixel blocks, row by row
+
+    Sizes that are not multiples of 4 are padded by repeating the last row and column.
+    """
+    height, width = pixels.shape[:2]
+    padded_height, padded_width = -(-height // BLOCK_SIZE) * BLOCK_SIZE, -(-width // BLOCK_SIZE) * BLOCK_SIZE
+    if (padded_height, padded_width) != (height, width):
+        pixels = np.pad(pixels, ((0, padded_height - height), (0, padded_width - width), (0, 0)), mode='edge')
+    blocks = pixels.reshape(padded_height // 4, 4, padded_width // 4, 4, 4).swapaxes(1, 2)
+    return blocks.reshape(-1, 16, 4)
+
+
+def _to_565(colors: 'np.ndarray') -> 'np.ndarray':
+    """Packs (n, 3) RGB values into RGB565 integers"""
+    r = (colors[:, 0] * 31 + 127) // 255
+    g = (colors[:, 1] * 63 + 127) // 255
+    b = (colors[:, 2] * 31 + 127) // 255
+    return (r << 11) | (g << 5) | b
+
+
+def _from_565(values: 'np.ndarray') -> 'np.ndarray':
+    """Expands RGB565 integers into (n, 3) 8-bit RGB values, as GPUs decode them"""
+    r, g, b = (values >> 11) & 31, (values >> 5) & 63, values & 31
+    return np.stack([(r << 3) | (r >> 2), (g << 2) | (g >> 4), (b << 3) | (b >> 2)], axis=1)
+
+
+def _encode_color(rgb: 'np.ndarray') -> 'np.ndarray':
+    """Encodes (n, 16, 3) RGB blocks as (n, 8) bytes of BC1 color blocks (4 color mode)"""
+    rgb = rgb.astype(np.float32)
+    centered = rgb - rgb.mean(axis=1, keepdims=True)
+    covariance = centered.transpose(0, 2, 1) @ centered
+
+    axis = np.ones((len(rgb), 3, 1), dtype=np.float32)
+    for _ in range(PRINCIPAL_AXIS_ITERATIONS):
+        axis = covariance @ axis
+        axis /= np.maximum(np.abs(axis).max(axis=1, keepdims=True), 1e-9)
+
+    # Endpoints: the block colors furthest apart along the principal axis
+    projection = (centered @ axis)[:, :, 0]
+    rows = np.arange(len(rgb))
+    rgb = rgb.astype(np.int32)
+    color0 = _to_565(rgb[rows, projection.argmax(axis=1)])
+    color1 = _to_565(rgb[rows, projection.argmin(axis=1)])
+
+    # color0 > color1 selects the 4 color mode
+    swap = color0 < color1
+    color0, color1 = np.where(swap, color1, color0), np.where(swap, color0, color1)
+
+    # Each pixel takes the palette color nearest to its projection on the endpoint segment:
+    # steps 0-3 from endpoint0 are indices 0, 2, 3, 1
+    endpoint0, endpoint1 = _from_565(color0).astype(np.float32), _from_565(color1).astype(np.float32)
+    direction = (endpoint1 - endpoint0)[:, :, np.newaxis]
+    length = np.maximum((direction ** 2).sum(axis=1), 1e-9)
+    steps = ((rgb - endpoint0[:, np.newaxis, :]) @ direction)[:, :, 0] * 3 / length
+    steps = np.clip(np.rint(steps), 0, 3).astype(np.uint32)
+    indices = np.array([0, 2, 3, 1], dtype=np.uint32)[steps]
+    indices[color0 == color1] = 0  # Single color block (3 color mode, index 3 would be transparent)
+
+    packed = (indices << (2 * np.arange(16, dtype=np.uint32))).sum(axis=1, dtype=np.uint32)
+    blocks = np.empty((len(rgb), 8), dtype=np.uint8)
+    blocks[:, 0:2] = color0.astype('<u2').view(np.uint8).reshape(-1, 2)
+    blocks[:, 2:4] = color1.astype('<u2').view(np.uint8).reshape(-1, 2)
+    blocks[:, 4:8] = packed.astype('<u4').view(np.uint8).reshape(-1, 4)
+    return blocks
+
+
+def _encode_alpha(alpha: 'np.ndarray') -> 'np.ndarray':
+    """Encodes (n, 16) alpha blocks as (n, 8) bytes of BC3 alpha blocks (8 level mode)"""
+    alpha = alpha.astype(np.int32)
+    alpha0 = alpha.max(axis=1)
+    alpha1 = alpha.min(axis=1)
+    spread = np.maximum(alpha0 - alpha1, 1)[:, np.newaxis]
+
+    # Level k between alpha0 (0) and alpha1 (7): codes 0 and 1 are the endpoints, 2-7 the levels between
+    level = ((alpha0[:, np.newaxis] - alpha) * 7 * 2 + spread) // (spread * 2)
+    codes = np.where(level == 0, 0, np.where(level == 7, 1, level + 1)).astype(np.uint64)
+    codes[alpha0 == alpha1] = 0
+
+    packed = (codes << (3 * np.arange(16, dtype=np.uint64))).sum(axis=1, dtype=np.uint64)
+    blocks = np.empty((len(alpha), 8), dtype=np.uint8)
+    blocks[:, 0] = alpha0
+    blocks[:, 1] = alpha1
+    blocks[:, 2:8] = packed.astype('<u8').view(np.uint8).reshape(-1, 8)[:, :6]
+    return blocks
+
+
+def compress_blocks(image, block_format: str) -> bytes:
+    """Block data of an RGBA image in a block format, blocks row by row from the top left
+
+    Args:
+        image: PIL image (converted to RGBA)
+        block_format: One of BLOCK_FORMATS
+    """
+    if np is None:
+        raise ImportError("Block compressed formats require NumPy (pip install numpy)")
+    if block_format not in BLOCK_FORMATS:
+        raise ValueError(f"Unknown block format '{block_format}' (expected one of {', '.join(BLOCK_FORMATS)})")
+
+    blocks = _blocks(np.asarray(image.convert('RGBA')))
+    color = _encode_color(blocks[:, :, :3])
+    if block_format == 'bc1':
+        return color.tobytes()
+    return np.concatenate([_encode_alpha(blocks[:, :, 3]), color], axis=1).tobytes()
+
+
+def dds_header(width: int, height: int, block_format: str) -> bytes:
+    """DDS magic and header (128 bytes, no DX10 extension) of a single level block compressed texture"""
+    fourcc, block_bytes = BLOCK_FORMAT_INFO[block_format]
+    linear_size = -(-width // BLOCK_SIZE) * -(-height // BLOCK_SIZE) * block_bytes
+    flags = DDSD_CAPS | DDSD_HEIGHT | DDSD_WIDTH | DDSD_PIXELFORMAT | DDSD_LINEARSIZE
+    header = struct.pack('<4s7I11I', b'DDS ', 124, flags, height, width, linear_size, 0, 0, *([0] * 11))
+    pixel_format = struct.pack('<2I4s5I', 32, DDPF_FOURCC, fourcc, 0, 0, 0, 0, 0)
+    caps = struct.pack('<5I', DDSCAPS_TEXTURE, 0, 0, 0, 0)
+    return header + pixel_format + caps
+
+
+def encode_dds(image, block_format: str) -> bytes:
+    """Encodes an image as a DDS file in a block format (see compress_blocks)"""
+    return dds_header(image.width, image.height, block_format) + compress_blocks(image, block_format)
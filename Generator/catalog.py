@@ -0,0 +1,165 @@
+"""
+Shared index of the source images of an input folder
+
+Used by make_metadata.py, generate_posters.py and the CI script so they list the same
+images. Each file is indexed with its size, modification time, SHA256, dimensions (read
+from the header, pixels are not decoded) and format; re-scanning unchanged files only costs
+a stat.
+"""
+
+import os
+import json
+import hashlib
+from PIL import Image
+from typing import Dict
+
+# Image extensions listed by every script (the formats atlases are built from)
+SUPPORTED_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
+
+# Bytes read at a time when hashing a file
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Index file name used next to build outputs (the CI script keeps it in the output folder)
+CATALOG_INDEX_FILE = '.catalog_index.json'
+CATALOG_INDEX_VERSION = 1
+
+# Folder of the default index files, in the user cache directory: input folders may be
+# read-only, shared or versioned, so nothing is written there unless asked for
+CATALOG_CACHE_FOLDER = 'udon_poster_catalog'
+
+
+def default_index_path(folder: str) -> str:
+    """Default index file of an image folder, in the user cache directory
+
+    One file per absolute folder path, so make_metadata.py and generate_posters.py share it.
+    The cache directory is XDG_CACHE_HOME, LOCALAPPDATA on Windows, or ~/.cache.
+    """
+    cache_root = (os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA')
+                  or os.path.join(os.path.expanduser('~'), '.cache'))
+    key = hashlib.sha256(os.path.abspath(folder).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_root, CATALOG_CACHE_FOLDER, f"{key}.json")
+
+
+def file_sha256(path: str) -> str:
+    """SHA256 of a file, read by chunks so large sources are never held in memory"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class CatalogEntry:
+    """Indexed source image"""
+    __slots__ = ('path', 'size', 'mtime_ns', 'sha', 'width', 'height', 'format')
+
+    def __init__(self, path: str, size: int, mtime_ns: int, sha: str, width: int, height: int, format: str):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.sha = sha
+        self.width = width
+        self.height = height
+        self.format = format
+
+    def to_dict(self) -> Dict:
+        return {'size': self.size, 'mtime_ns': self.mtime_ns, 'sha': self.sha,
+                'width': self.width, 'height': self.height, 'format': self.format}
+
+
+class CatalogIndex:
+    """Index of the images of a folder, cached in a JSON file keyed by file name, size and mtime"""
+
+    def __init__(self, folder: str, index_path: str = None):
+        """
+        Args:
+            folder: Folder containing the images
+            index_path: Index file (default: default_index_path of the folder)
+        """
+        self.folder = folder
+        self.index_path = index_path or default_index_path(folder)
+        self.entries = {}  # Filename -> CatalogEntry, in folder listing order after scan
+        self.reused = 0  # Files of the last scan taken from the index
+        self.indexed = 0  # Files of the last scan hashed again
+        self.load()
+
+    def load(self):
+        """Loads the index file, ignoring it when missing or unreadable"""
+        if not os.path.exists(self.index_path):
+            return
+
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Ignoring catalog index {self.index_path}: {e}")
+            return
+
+        if data.get('version') != CATALOG_INDEX_VERSION:
+            return
+        self.entries = {
+            filename: CatalogEntry(os.path.join(self.folder, filename), **entry)
+            for filename, entry in data.get('images', {}).items()
+        }
+
+    def save(self):
+        """Writes the index file, creating its folder (a read-only location only prints a warning)"""
+        data = {
+            'version': CATALOG_INDEX_VERSION,
+            'images': {filename: entry.to_dict() for filename, entry in self.entries.items()}
+        }
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            print(f"⚠️ Could not save catalog index {self.index_path}: {e}")
+
+    @staticmethod
+    def is_supported(filename: str) -> bool:
+        return filename.lower().endswith(SUPPORTED_EXTENSIONS)
+
+    def scan(self) -> Dict[str, CatalogEntry]:
+        """Lists the images of the folder, indexing new and modified files
+
+        Files whose size and modification time match the index are not opened. Others are
+        hashed; their dimensions and format are read from the header unless the hash matches
+        the indexed one (touched but unchanged files). Unreadable images are skipped.
+
+        Returns:
+            dict: Filename -> CatalogEntry, in folder listing order
+        """
+        previous = self.entries
+        self.entries = {}
+        self.reused = 0
+        self.indexed = 0
+
+        for filename in os.listdir(self.folder):
+            path = os.path.join(self.folder, filename)
+            if not self.is_supported(filename) or not os.path.isfile(path):
+                continue
+
+            stat = os.stat(path)
+            entry = previous.get(filename)
+            if entry is not None and entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+                self.entries[filename] = entry
+                self.reused += 1
+                continue
+
+            try:
+                sha = file_sha256(path)
+
+                if entry is not None and entry.sha == sha:
+                    width, height, image_format = entry.width, entry.height, entry.format
+                else:
+                    # Image.open only parses the header, pixels are decoded on first access
+                    with Image.open(path) as img:
+                        (width, height), image_format = img.size, img.format
+            except Exception as e:
+                print(f"Error indexing {filename}: {e}")
+                continue
+
+            self.entries[filename] = CatalogEntry(path, stat.st_size, stat.st_mtime_ns, sha, width, height, image_format)
+            self.indexed += 1
+
+        return self.entries
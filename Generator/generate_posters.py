@@ -1,10 +1,35 @@
 import os
 import json
 import math
+import random
+import mmap
+import shutil
+import struct
 import hashlib
+import tempfile
+import time
+import cProfile
+import pstats
+import threading
+import multiprocessing
+import tracemalloc
+from array import array
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field, fields, replace
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from PIL import Image, ImageDraw
 from typing import List, Tuple, Dict, Any
 
+from catalog import CatalogIndex
+from block_compression import BLOCK_FORMATS, BLOCK_SIZE, encode_dds
+
+try:
+    import numpy as np
+except ImportError:  # Optional, only needed by the 'numpy' packer engine
+    np = None
+
 class Rectangle:
     """Represents a rectangle with position and dimensions"""
     def __init__(self, x: int = 0, y: int = 0, width: int = 0, height: int = 0):
@@ -21,19 +46,95 @@ class Rectangle:
         """Checks if a point is in this rectangle"""
         return self.x <= x < self.x + self.width and self.y <= y < self.y + self.height
 
+class FreeRectangleIndex:
+    """Grid buckets over free rectangles, used to find the ones overlapping an area
+    
+    Each rectangle is registered in every cell it covers, so a query only looks at
+    the rectangles sharing a cell with the queried area.
+    """
+    
+    def __init__(self, width: int, height: int, cells_per_side: int = 8):
+        self.cell_size = max(16, -(-max(width, height) // cells_per_side))
+        self.cells = {}
+    
+    def _cell_range(self, x: int, y: int, width: int, height: int):
+        """Returns the cell keys covered by an area"""
+        size = self.cell_size
+        for cy in range(y // size, (y + height - 1) // size + 1):
+            for cx in range(x // size, (x + width - 1) // size + 1):
+                yield cx, cy
+    
+    def add(self, rect: Rectangle):
+        """Registers a rectangle in all the cells it covers"""
+        for key in self._cell_range(rect.x, rect.y, rect.width, rect.height):
+            bucket = self.cells.get(key)
+            if bucket is None:
+                self.cells[key] = {rect}
+            else:
+                bucket.add(rect)
+    
+    def remove(self, rect: Rectangle):
+        """Unregisters a rectangle"""
+        for key in self._cell_range(rect.x, rect.y, rect.width, rect.height):
+            bucket = self.cells[key]
+            bucket.discard(rect)
+            if not bucket:
+                del self.cells[key]
+    
+    def query(self, rect: Rectangle) -> set:
+        """Returns the rectangles sharing at least one cell with the given one (superset of overlaps)"""
+        found = set()
+        cells = self.cells
+        for key in self._cell_range(rect.x, rect.y, rect.width, rect.height):
+            bucket = cells.get(key)
+            if bucket:
+                found.update(bucket)
+        return found
+
 class BinPacker:
-    """Optimized bin packing algorithm for atlases"""
+    """Optimized bin packing algorithm for atlases
+    
+    Free rectangles are kept in a list (its order decides ties between placements). Once
+    the list grows past INDEX_THRESHOLD, and unless use_index is False, they are also kept
+    in a FreeRectangleIndex so that splitting and pruning only visit the rectangles
+    overlapping the placed one.
     
-    def __init__(self, width: int, height: int, placement_strategy: str = 'best_area_fit'):
+    With allow_rotation, every packer also scores a rectangle turned by 90 degrees and keeps
+    the better orientation (the unrotated one on ties); the returned rectangle then has its
+    width and height swapped.
+    """
+    
+    INDEX_THRESHOLD = 32
+    
+    def __init__(self, width: int, height: int, placement_strategy: str = 'best_area_fit', use_index: bool = True,
+                 allow_rotation: bool = False):
         self.width = width
         self.height = height
         self.placement_strategy = placement_strategy
         self.free_rectangles = [Rectangle(0, 0, width, height)]
         self.used_rectangles = []
+        self.use_index = use_index
+        self.index = None
+        self.allow_rotation = allow_rotation
     
     def insert(self, width: int, height: int) -> Rectangle:
         """Inserts a rectangle and returns its position, or None if impossible"""
+        best_rect, best_key = self._find_position(width, height)
+        if self.allow_rotation and width != height:
+            rect, key = self._find_position(height, width)
+            if rect and (best_rect is None or key < best_key):
+                best_rect = rect
+        
+        if best_rect:
+            self._split_free_rectangle(best_rect)
+            self.used_rectangles.append(best_rect)
+        
+        return best_rect
+    
+    def _find_position(self, width: int, height: int) -> Tuple[Rectangle, Tuple]:
+        """Returns the best position for a rectangle and its score (lower is better), or (None, None)"""
         best_rect = None
+        key = None
         
         if self.placement_strategy == 'best_area_fit':
             # Minimize wasted space
@@ -51,6 +152,7 @@ class BinPacker:
                         best_rect = Rectangle(rect.x, rect.y, width, height)
                         best_area_fit = area_fit
                         best_short_side_fit = short_side_fit
+            key = (best_area_fit, best_short_side_fit)
         
         elif self.placement_strategy == 'best_short_side_fit':
             # Minimize the smallest remaining side
@@ -68,6 +170,7 @@ class BinPacker:
                         best_rect = Rectangle(rect.x, rect.y, width, height)
                         best_short_side_fit = short_side_fit
                         best_long_side_fit = long_side_fit
+            key = (best_short_side_fit, best_long_side_fit)
         
         elif self.placement_strategy == 'best_long_side_fit':
             # Minimize the largest remaining side
@@ -85,6 +188,7 @@ class BinPacker:
                         best_rect = Rectangle(rect.x, rect.y, width, height)
                         best_long_side_fit = long_side_fit
                         best_short_side_fit = short_side_fit
+            key = (best_long_side_fit, best_short_side_fit)
         
         elif self.placement_strategy == 'bottom_left':
             # Place at bottom left (smallest y then x)
@@ -97,6 +201,7 @@ class BinPacker:
                         best_rect = Rectangle(rect.x, rect.y, width, height)
                         best_y = rect.y
                         best_x = rect.x
+            key = (best_y, best_x)
         
         elif self.placement_strategy == 'contact_point':
             # Maximize contact with already placed rectangles
@@ -127,56 +232,128 @@ class BinPacker:
                         best_rect = Rectangle(rect.x, rect.y, width, height)
                         best_contact = contact
                         best_area_fit = area_fit
+            key = (-best_contact, best_area_fit)
         
-        if best_rect:
-            self._split_free_rectangle(best_rect)
-            self.used_rectangles.append(best_rect)
-        
-        return best_rect
+        return best_rect, key
     
     def _split_free_rectangle(self, used_rect: Rectangle):
         """Splits free rectangles after insertion"""
+        if self.index is None and self.use_index and len(self.free_rectangles) >= self.INDEX_THRESHOLD:
+            self.index = FreeRectangleIndex(self.width, self.height)
+            for rect in self.free_rectangles:
+                self.index.add(rect)
+        
+        if self.index is not None:
+            self._split_indexed(used_rect)
+            return
+        
         rectangles_to_process = self.free_rectangles[:]
         self.free_rectangles = []
         
         for rect in rectangles_to_process:
-            if self._split_rectangle(rect, used_rect):
-                continue
-            self.free_rectangles.append(rect)
+            pieces = self._split_rectangle(rect, used_rect)
+            if pieces is None:
+                self.free_rectangles.append(rect)
+            else:
+                self.free_rectangles.extend(pieces)
         
         self._prune_free_rectangles()
     
-    def _split_rectangle(self, rect: Rectangle, used_rect: Rectangle) -> bool:
-        """Splits a free rectangle if it overlaps with the used rectangle"""
+    def _split_indexed(self, used_rect: Rectangle):
+        """Same result as the list-based split + prune, but only visits overlapping rectangles
+        
+        Rectangles that do not overlap the used one were already pruned against each other,
+        and none of them can fit inside a piece of a split rectangle, so only the new
+        pieces need a containment check. Identical pieces keep the last copy, like
+        _prune_free_rectangles does.
+        """
+        overlapping = {rect for rect in self.index.query(used_rect)
+                       if self._split_rectangle(rect, used_rect, check_only=True)}
+        if not overlapping:
+            return
+        
+        # Replace each split rectangle by its pieces, in place, to keep the list order
+        new_pieces = []
+        free_rectangles = []
+        for rect in self.free_rectangles:
+            if rect in overlapping:
+                pieces = self._split_rectangle(rect, used_rect)
+                new_pieces.extend(pieces)
+                free_rectangles.extend(pieces)
+            else:
+                free_rectangles.append(rect)
+        
+        for rect in overlapping:
+            self.index.remove(rect)
+        for rect in new_pieces:
+            self.index.add(rect)
+        
+        # Prune pieces contained in another free rectangle
+        order = {rect: i for i, rect in enumerate(new_pieces)}
+        redundant = set()
+        for rect in new_pieces:
+            for other in self.index.query(rect):
+                if other is rect or not self._contains(other, rect):
+                    continue
+                if self._contains(rect, other) and order.get(other, -1) < order[rect]:
+                    # Identical earlier copy: that one is removed instead
+                    continue
+                redundant.add(rect)
+                self.index.remove(rect)
+                break
+        
+        if redundant:
+            free_rectangles = [rect for rect in free_rectangles if rect not in redundant]
+        self.free_rectangles = free_rectangles
+    
+    @staticmethod
+    def _contains(outer: Rectangle, inner: Rectangle) -> bool:
+        """Checks if inner lies entirely within outer"""
+        return (inner.x >= outer.x and inner.y >= outer.y and
+                inner.x + inner.width <= outer.x + outer.width and
+                inner.y + inner.height <= outer.y + outer.height)
+    
+    def _split_rectangle(self, rect: Rectangle, used_rect: Rectangle, check_only: bool = False):
+        """Splits a free rectangle if it overlaps with the used rectangle
+        
+        Returns:
+            None if there is no overlap, otherwise the list of remaining pieces
+            (or True when check_only is set)
+        """
         if (rect.x >= used_rect.x + used_rect.width or 
             rect.x + rect.width <= used_rect.x or
             rect.y >= used_rect.y + used_rect.height or
             rect.y + rect.height <= used_rect.y):
-            return False
+            return None
+        
+        if check_only:
+            return True
+        
+        pieces = []
         
         # Rectangle on the right
         if rect.x < used_rect.x + used_rect.width and rect.x + rect.width > used_rect.x + used_rect.width:
             new_rect = Rectangle(used_rect.x + used_rect.width, rect.y, 
                                rect.x + rect.width - (used_rect.x + used_rect.width), rect.height)
-            self.free_rectangles.append(new_rect)
+            pieces.append(new_rect)
         
         # Rectangle on the left
         if rect.x < used_rect.x and rect.x + rect.width > used_rect.x:
             new_rect = Rectangle(rect.x, rect.y, used_rect.x - rect.x, rect.height)
-            self.free_rectangles.append(new_rect)
+            pieces.append(new_rect)
         
         # Rectangle at bottom
         if rect.y < used_rect.y + used_rect.height and rect.y + rect.height > used_rect.y + used_rect.height:
             new_rect = Rectangle(rect.x, used_rect.y + used_rect.height, 
                                rect.width, rect.y + rect.height - (used_rect.y + used_rect.height))
-            self.free_rectangles.append(new_rect)
+            pieces.append(new_rect)
         
         # Rectangle at top
         if rect.y < used_rect.y and rect.y + rect.height > used_rect.y:
             new_rect = Rectangle(rect.x, rect.y, rect.width, used_rect.y - rect.y)
-            self.free_rectangles.append(new_rect)
+            pieces.append(new_rect)
         
-        return True
+        return pieces
     
     def _prune_free_rectangles(self):
         """Removes redundant rectangles"""
@@ -201,219 +378,1709 @@ class BinPacker:
                 j += 1
             i += 1
 
-class AtlasGenerator:
-    def __init__(self, max_atlas_size: int = 2048, input_folder: str = "", output_folder: str = "", padding: int = 2, max_image_size: int = None):
-        self.max_atlas_size = max_atlas_size
-        self.input_folder = input_folder or "input_images"
-        self.output_folder = output_folder or "output_atlases"
-        self.padding = padding  # Spacing between images to avoid artifacts
-        self.max_image_size = max_image_size if max_image_size is not None else max_atlas_size  # Max image resolution before processing
+class NumpyBinPacker:
+    """BinPacker variant keeping free rectangles as NumPy arrays (structure of arrays)
+    
+    Every placement strategy is scored over all free rectangles in one vectorized pass,
+    and split/prune use array masks. Ties resolve to the first rectangle in list order
+    and the list order is maintained like BinPacker does, so placements are identical.
+    """
+    
+    def __init__(self, width: int, height: int, placement_strategy: str = 'best_area_fit', allow_rotation: bool = False):
+        if np is None:
+            raise ImportError("The 'numpy' packer engine requires NumPy (pip install numpy)")
+        self.width = width
+        self.height = height
+        self.placement_strategy = placement_strategy
+        self.allow_rotation = allow_rotation
+        self.fx = np.zeros(1, dtype=np.int64)
+        self.fy = np.zeros(1, dtype=np.int64)
+        self.fw = np.array([width], dtype=np.int64)
+        self.fh = np.array([height], dtype=np.int64)
+        self.used_rectangles = []
+        self._used = np.empty((0, 4), dtype=np.int64)
+    
+    @property
+    def free_rectangles(self) -> List[Rectangle]:
+        """Free rectangles as Rectangle objects, in list order"""
+        return [Rectangle(int(x), int(y), int(w), int(h))
+                for x, y, w, h in zip(self.fx, self.fy, self.fw, self.fh)]
+    
+    @staticmethod
+    def _first_min(primary, secondary) -> int:
+        """Index of the lexicographic minimum of (primary, secondary), first one on ties"""
+        candidates = primary == primary.min()
+        secondary = np.where(candidates, secondary, np.iinfo(np.int64).max)
+        return int(np.argmax(candidates & (secondary == secondary.min())))
+    
+    def insert(self, width: int, height: int) -> Rectangle:
+        """Inserts a rectangle and returns its position, or None if impossible (see BinPacker)"""
+        best_rect, best_key = self._find_position(width, height)
+        if self.allow_rotation and width != height:
+            rect, key = self._find_position(height, width)
+            if rect and (best_rect is None or key < best_key):
+                best_rect = rect
+        
+        if best_rect is None:
+            return None
         
-        # Create output folder if it doesn't exist
-        os.makedirs(self.output_folder, exist_ok=True)
+        self._split_free_rectangle(best_rect)
+        self.used_rectangles.append(best_rect)
+        self._used = np.vstack([self._used, [[best_rect.x, best_rect.y, best_rect.width, best_rect.height]]])
+        return best_rect
     
-    def resize_image_if_needed(self, image: Image.Image) -> Image.Image:
-        """Resizes image if it exceeds 2048x2048 while maintaining ratio"""
-        width, height = image.size
+    def _find_position(self, width: int, height: int) -> Tuple[Rectangle, Tuple]:
+        """Returns the best position for a rectangle and its score (lower is better), or (None, None)"""
+        fit = np.flatnonzero((self.fw >= width) & (self.fh >= height))
+        if fit.size == 0:
+            return None, None
         
-        if width <= self.max_atlas_size and height <= self.max_atlas_size:
-            return image
+        fx, fy, fw, fh = self.fx[fit], self.fy[fit], self.fw[fit], self.fh[fit]
+        leftover_horizontal = fw - width
+        leftover_vertical = fh - height
         
-        # Calculate resize ratio
-        ratio = min(self.max_atlas_size / width, self.max_atlas_size / height)
-        new_width = int(width * ratio)
-        new_height = int(height * ratio)
+        if self.placement_strategy == 'best_area_fit':
+            primary = fw * fh - width * height
+            secondary = np.minimum(leftover_horizontal, leftover_vertical)
+        elif self.placement_strategy == 'best_short_side_fit':
+            primary = np.minimum(leftover_horizontal, leftover_vertical)
+            secondary = np.maximum(leftover_horizontal, leftover_vertical)
+        elif self.placement_strategy == 'best_long_side_fit':
+            primary = np.maximum(leftover_horizontal, leftover_vertical)
+            secondary = np.minimum(leftover_horizontal, leftover_vertical)
+        elif self.placement_strategy == 'bottom_left':
+            primary, secondary = fy, fx
+        elif self.placement_strategy == 'contact_point':
+            contact = np.where(fx == 0, height, 0) + np.where(fy == 0, width, 0)
+            if len(self._used):
+                ux, uy, uw, uh = (self._used[:, i][np.newaxis, :] for i in range(4))
+                x, y = fx[:, np.newaxis], fy[:, np.newaxis]
+                # Contact on the right
+                right = (ux + uw == x) & ~((y + height <= uy) | (y >= uy + uh))
+                # Contact at bottom
+                bottom = (uy + uh == y) & ~((x + width <= ux) | (x >= ux + uw))
+                contact = (contact + np.where(right, np.minimum(height, uh), 0).sum(axis=1)
+                           + np.where(bottom, np.minimum(width, uw), 0).sum(axis=1))
+            primary, secondary = -contact, fw * fh - width * height
+        else:
+            return None, None
         
-        return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        choice = self._first_min(primary, secondary)
+        return (Rectangle(int(fx[choice]), int(fy[choice]), width, height),
+                (int(primary[choice]), int(secondary[choice])))
     
-    def downscale_image(self, image: Image.Image, scale_factor: int) -> Image.Image:
-        """Downscales image by a multiple of 2"""
-        width, height = image.size
-        new_width = width // scale_factor
-        new_height = height // scale_factor
-        
-        if new_width < 1 or new_height < 1:
-            new_width = max(1, new_width)
-            new_height = max(1, new_height)
+    def _split_free_rectangle(self, used_rect: Rectangle):
+        """Splits free rectangles after insertion and prunes the new pieces"""
+        fx, fy, fw, fh = self.fx, self.fy, self.fw, self.fh
+        ux, uy = used_rect.x, used_rect.y
+        ux2, uy2 = ux + used_rect.width, uy + used_rect.height
+        
+        overlap = ~((fx >= ux2) | (fx + fw <= ux) | (fy >= uy2) | (fy + fh <= uy))
+        if not overlap.any():
+            return
+        
+        rows = np.flatnonzero(overlap)
+        ox, oy, ow, oh = fx[rows], fy[rows], fw[rows], fh[rows]
+        
+        # Pieces in BinPacker order: right, left, bottom, top
+        pieces = [
+            (ox + ow > ux2, np.full_like(ox, ux2), oy, ox + ow - ux2, oh),
+            (ox < ux, ox, oy, ux - ox, oh),
+            (oy + oh > uy2, ox, np.full_like(oy, uy2), ow, oy + oh - uy2),
+            (oy < uy, ox, oy, ow, uy - oy),
+        ]
+        
+        # Each split rectangle is replaced by its pieces at the same position in the list
+        kept = np.flatnonzero(~overlap)
+        keys = [kept * 4]
+        xs, ys, ws, hs = [fx[kept]], [fy[kept]], [fw[kept]], [fh[kept]]
+        for order, (valid, px, py, pw, ph) in enumerate(pieces):
+            keys.append(rows[valid] * 4 + order)
+            xs.append(px[valid])
+            ys.append(py[valid])
+            ws.append(pw[valid])
+            hs.append(ph[valid])
+        
+        keys = np.concatenate(keys)
+        sort = np.argsort(keys, kind='stable')
+        x, y, w, h = (np.concatenate(a)[sort] for a in (xs, ys, ws, hs))
+        is_new = np.ones(len(keys), dtype=bool)
+        is_new[:len(kept)] = False
+        is_new = is_new[sort]
+        
+        # Prune pieces contained in another free rectangle; among identical
+        # pieces the last one is kept, like BinPacker._prune_free_rectangles
+        new = np.flatnonzero(is_new)
+        if new.size:
+            nx, ny = x[new][:, np.newaxis], y[new][:, np.newaxis]
+            nw, nh = w[new][:, np.newaxis], h[new][:, np.newaxis]
+            contained = (x <= nx) & (y <= ny) & (x + w >= nx + nw) & (y + h >= ny + nh)
+            equal = (x == nx) & (y == ny) & (w == nw) & (h == nh)
+            position = np.arange(len(x))
+            later = position[np.newaxis, :] > new[:, np.newaxis]
+            redundant = (contained & (~equal | later)).any(axis=1)
+            if redundant.any():
+                keep = np.ones(len(x), dtype=bool)
+                keep[new[redundant]] = False
+                x, y, w, h = x[keep], y[keep], w[keep], h[keep]
+        
+        self.fx, self.fy, self.fw, self.fh = x, y, w, h
+
+class SkylinePacker:
+    """Skyline bin packer: keeps only the top outline of the packed rectangles
+    
+    Much cheaper per insert than MaxRects (one pass over the skyline segments) but space
+    under an overhang is lost, which matters little for many small rectangles.
+    Placement strategies: bottom_left (lowest top edge) and min_waste (least area lost
+    under the rectangle).
+    """
+    
+    PLACEMENT_STRATEGIES = ('bottom_left', 'min_waste')
+    
+    def __init__(self, width: int, height: int, placement_strategy: str = 'bottom_left', allow_rotation: bool = False):
+        self.width = width
+        self.height = height
+        self.placement_strategy = placement_strategy
+        self.allow_rotation = allow_rotation
+        self.skyline = [[0, 0, width]]  # Segments [x, y, width], left to right
+        self.used_rectangles = []
+    
+    @property
+    def free_rectangles(self) -> List[Rectangle]:
+        """Free area above each skyline segment"""
+        return [Rectangle(x, y, width, self.height - y) for x, y, width in self.skyline]
+    
+    def _fit(self, index: int, width: int, height: int) -> int:
+        """Returns the y where a rectangle lands when its left edge is on segment index, or None"""
+        x = self.skyline[index][0]
+        if x + width > self.width:
+            return None
         
-        return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        y = 0
+        remaining = width
+        while remaining > 0:
+            _, segment_y, segment_width = self.skyline[index]
+            y = max(y, segment_y)
+            if y + height > self.height:
+                return None
+            remaining -= segment_width
+            index += 1
+        return y
     
-    def _sort_images(self, images: List[Tuple[str, Image.Image]], sort_strategy: str) -> List[Tuple[str, Image.Image]]:
-        """Sorts images according to the given strategy
+    def _waste(self, index: int, width: int, y: int) -> int:
+        """Area left empty under a rectangle placed at y from segment index"""
+        left = self.skyline[index][0]
+        right = left + width
+        waste = 0
+        while index < len(self.skyline) and self.skyline[index][0] < right:
+            segment_x, segment_y, segment_width = self.skyline[index]
+            waste += (min(right, segment_x + segment_width) - max(left, segment_x)) * (y - segment_y)
+            index += 1
+        return waste
+    
+    def insert(self, width: int, height: int) -> Rectangle:
+        """Inserts a rectangle and returns its position, or None if impossible (see BinPacker)"""
+        best_index, best_key, best_y = self._find_position(width, height)
+        if self.allow_rotation and width != height:
+            index, key, y = self._find_position(height, width)
+            if index is not None and (best_index is None or key < best_key):
+                best_index, best_y = index, y
+                width, height = height, width
+        
+        if best_index is None:
+            return None
         
-        Args:
-            images: List of images to sort
-            sort_strategy: Sort strategy
+        rect = Rectangle(self.skyline[best_index][0], best_y, width, height)
+        self._add_level(best_index, rect)
+        self.used_rectangles.append(rect)
+        return rect
+    
+    def _find_position(self, width: int, height: int) -> Tuple[int, Tuple, int]:
+        """Returns the best segment index for a rectangle, its score (lower is better) and landing y"""
+        best_index = None
+        best_key = None
+        best_y = 0
+        
+        for index in range(len(self.skyline)):
+            y = self._fit(index, width, height)
+            if y is None:
+                continue
             
-        Returns:
-            Sorted list of images
-        """
-        if sort_strategy == 'none':
-            # No sorting, keep existing order
-            return images[:]
-        elif sort_strategy == 'area':
-            return sorted(images, key=lambda x: x[1].size[0] * x[1].size[1], reverse=True)
-        elif sort_strategy == 'area_asc':
-            return sorted(images, key=lambda x: x[1].size[0] * x[1].size[1], reverse=False)
-        elif sort_strategy == 'height':
-            return sorted(images, key=lambda x: x[1].size[1], reverse=True)
-        elif sort_strategy == 'height_asc':
-            return sorted(images, key=lambda x: x[1].size[1], reverse=False)
-        elif sort_strategy == 'width':
-            return sorted(images, key=lambda x: x[1].size[0], reverse=True)
-        elif sort_strategy == 'width_asc':
-            return sorted(images, key=lambda x: x[1].size[0], reverse=False)
-        elif sort_strategy == 'perimeter':
-            return sorted(images, key=lambda x: x[1].size[0] + x[1].size[1], reverse=True)
-        elif sort_strategy == 'max_side':
-            return sorted(images, key=lambda x: max(x[1].size[0], x[1].size[1]), reverse=True)
-        elif sort_strategy == 'min_side':
-            return sorted(images, key=lambda x: min(x[1].size[0], x[1].size[1]), reverse=True)
-        elif sort_strategy == 'ratio':
-            return sorted(images, key=lambda x: x[1].size[0] / max(x[1].size[1], 1), reverse=True)
-        elif sort_strategy == 'ratio_inv':
-            return sorted(images, key=lambda x: x[1].size[1] / max(x[1].size[0], 1), reverse=True)
-        elif sort_strategy == 'diagonal':
-            return sorted(images, key=lambda x: (x[1].size[0]**2 + x[1].size[1]**2)**0.5, reverse=True)
-        elif sort_strategy == 'pathological':
-            sorted_by_area = sorted(images, key=lambda x: x[1].size[0] * x[1].size[1], reverse=True)
-            result = []
-            left, right = 0, len(sorted_by_area) - 1
-            while left <= right:
-                result.append(sorted_by_area[left])
-                if left != right:
-                    result.append(sorted_by_area[right])
-                left += 1
-                right -= 1
-            return result
-        else:
-            return images[:]
+            if self.placement_strategy == 'min_waste':
+                key = (self._waste(index, width, y), y + height)
+            elif self.placement_strategy == 'bottom_left':
+                key = (y + height, self.skyline[index][0])
+            else:
+                return None, None, 0
+            
+            if best_key is None or key < best_key:
+                best_index, best_key, best_y = index, key, y
+        
+        return best_index, best_key, best_y
     
-    def pack_images_in_atlas(self, images: List[Tuple[str, Image.Image]], sort_strategy: str = 'area', placement_strategy: str = 'best_area_fit') -> Tuple[Image.Image, Dict[str, Dict[str, float]]]:
-        """Packs images into an atlas using an optimized algorithm
+    def _add_level(self, index: int, rect: Rectangle):
+        """Raises the skyline over a placed rectangle"""
+        skyline = self.skyline
+        skyline.insert(index, [rect.x, rect.y + rect.height, rect.width])
+        
+        # Cut or remove the segments now hidden under the new one
+        right = rect.x + rect.width
+        next_index = index + 1
+        while next_index < len(skyline) and skyline[next_index][0] < right:
+            segment = skyline[next_index]
+            segment_right = segment[0] + segment[2]
+            if segment_right <= right:
+                del skyline[next_index]
+            else:
+                segment[2] = segment_right - right
+                segment[0] = right
+                break
         
-        Args:
-            images: List of tuples (filename, Image)
-            sort_strategy: Sort strategy (area, height, width, etc.)
-            placement_strategy: Placement strategy (best_area_fit, best_short_side_fit, best_long_side_fit, bottom_left, contact_point)
-        """
-        if not images:
-            return None, {}
+        # Merge neighbours at the same height
+        merged = [skyline[0]]
+        for segment in skyline[1:]:
+            if segment[1] == merged[-1][1]:
+                merged[-1][2] += segment[2]
+            else:
+                merged.append(segment)
+        self.skyline = merged
+
+class GuillotinePacker:
+    """Guillotine bin packer: each placement cuts its free rectangle in two disjoint parts
+    
+    Free rectangles never overlap, so an insert only scans the free list once and no
+    pruning is needed. The cut follows the shorter leftover axis.
+    Placement strategies: best_area_fit, best_short_side_fit, best_long_side_fit.
+    """
+    
+    PLACEMENT_STRATEGIES = ('best_area_fit', 'best_short_side_fit', 'best_long_side_fit')
+    
+    def __init__(self, width: int, height: int, placement_strategy: str = 'best_area_fit', allow_rotation: bool = False):
+        self.width = width
+        self.height = height
+        self.placement_strategy = placement_strategy
+        self.allow_rotation = allow_rotation
+        self.free_rectangles = [Rectangle(0, 0, width, height)]
+        self.used_rectangles = []
+    
+    def insert(self, width: int, height: int) -> Rectangle:
+        """Inserts a rectangle and returns its position, or None if impossible (see BinPacker)"""
+        best_index, best_key = self._find_position(width, height)
+        if self.allow_rotation and width != height:
+            index, key = self._find_position(height, width)
+            if index is not None and (best_index is None or key < best_key):
+                best_index = index
+                width, height = height, width
+        
+        if best_index is None:
+            return None
         
-        # Sort images according to strategy
-        sorted_images = self._sort_images(images, sort_strategy)
+        free_rect = self.free_rectangles.pop(best_index)
+        rect = Rectangle(free_rect.x, free_rect.y, width, height)
         
-        # Create atlas
-        atlas_width = self.max_atlas_size
-        atlas_height = self.max_atlas_size
-        atlas = Image.new('RGBA', (atlas_width, atlas_height), (0, 0, 0, 0))
+        # Split the rest of the free rectangle along the shorter leftover axis
+        leftover_horizontal = free_rect.width - width
+        leftover_vertical = free_rect.height - height
+        if leftover_horizontal <= leftover_vertical:
+            bottom = Rectangle(free_rect.x, free_rect.y + height, free_rect.width, leftover_vertical)
+            right = Rectangle(free_rect.x + width, free_rect.y, leftover_horizontal, height)
+        else:
+            bottom = Rectangle(free_rect.x, free_rect.y + height, width, leftover_vertical)
+            right = Rectangle(free_rect.x + width, free_rect.y, leftover_horizontal, free_rect.height)
         
-        # Initialize bin packer with placement strategy
-        packer = BinPacker(atlas_width, atlas_height, placement_strategy)
+        for piece in (bottom, right):
+            if piece.width > 0 and piece.height > 0:
+                self.free_rectangles.append(piece)
         
-        # UV coordinates for each image
-        uv_coords = {}
-        max_right = 0
-        max_bottom = 0
+        self.used_rectangles.append(rect)
+        return rect
+    
+    def _find_position(self, width: int, height: int) -> Tuple[int, Tuple]:
+        """Returns the index of the best free rectangle for a rectangle and its score (lower is better)"""
+        best_index = None
+        best_key = None
         
-        for filename, img in sorted_images:
-            img_width, img_height = img.size
-            
-            # Add padding to dimensions
-            padded_width = img_width + self.padding * 2
-            padded_height = img_height + self.padding * 2
-            
-            # Try to place image in atlas
-            rect = packer.insert(padded_width, padded_height)
-            
-            if rect is None:
-                # No more space in this atlas
-                break
-            
-            # Place image in atlas (with padding offset)
-            atlas.paste(img, (rect.x + self.padding, rect.y + self.padding))
-            
-            # Calculate UV coordinates (actual image coordinates, without padding)
-            uv_coords[filename] = {
-                'x': rect.x + self.padding,
-                'y': rect.y + self.padding,
-                'width': img_width,
-                'height': img_height
-            }
+        for index, free_rect in enumerate(self.free_rectangles):
+            if free_rect.width < width or free_rect.height < height:
+                continue
             
-            # Track maximum used dimensions
-            max_right = max(max_right, rect.x + rect.width)
-            max_bottom = max(max_bottom, rect.y + rect.height)
-        
-        # Resize atlas to eliminate empty margins
-        if max_right > 0 and max_bottom > 0:
-            # Ensure dimensions are at least 1x1
-            actual_width = max(1, max_right)
-            actual_height = max(1, max_bottom)
+            leftover_horizontal = free_rect.width - width
+            leftover_vertical = free_rect.height - height
+            short_side = min(leftover_horizontal, leftover_vertical)
+            long_side = max(leftover_horizontal, leftover_vertical)
             
-            # Crop atlas to actually used dimensions
-            atlas = atlas.crop((0, 0, actual_width, actual_height))
+            if self.placement_strategy == 'best_area_fit':
+                key = (free_rect.width * free_rect.height - width * height, short_side)
+            elif self.placement_strategy == 'best_short_side_fit':
+                key = (short_side, long_side)
+            elif self.placement_strategy == 'best_long_side_fit':
+                key = (long_side, short_side)
+            else:
+                return None, None
             
-            # Calculate UV coordinates with new dimensions (Unity compatible)
-            for filename in uv_coords:
-                coord = uv_coords[filename]
-                # Unity uses origin at bottom left, so invert Y axis
-                uv_coords[filename] = {
-                    'width': coord['width'],
-                    'height': coord['height'],
-                    # Add coordinates for Unity Rect (x, y, width, height normalized)
-                    'rect_x': coord['x'] / actual_width,
-                    'rect_y': 1.0 - (coord['y'] + coord['height']) / actual_height,
-                    'rect_width': coord['width'] / actual_width,
-                    'rect_height': coord['height'] / actual_height
-                }
+            if best_key is None or key < best_key:
+                best_index, best_key = index, key
         
-        return atlas, uv_coords
+        return best_index, best_key
+
+PACKER_ENGINES = ('python', 'numpy')
+
+# Atlas shapes tried by the layout search: squares of max_atlas_size, 3/4 and 1/2 of it,
+# or also the rectangles combining these sides and 1/4 of it (2048x1024, 1024x512...)
+ATLAS_SHAPES = ('square', 'rectangular')
+
+# Rounding of atlas dimensions: none (cropped to the images), multiple_of_4 (whole 4x4
+# compression blocks) or pow2 (power of two sides, no driver padding on upload)
+ATLAS_SNAPS = ('none', 'multiple_of_4', 'pow2')
+
+# Sort strategies of the layout search grid (see AtlasGenerator._sort_images)
+SEARCH_SORT_STRATEGIES = ['area', 'height', 'width', 'perimeter', 'max_side',
+                          'min_side', 'ratio', 'ratio_inv', 'diagonal',
+                          'height_asc', 'width_asc', 'pathological']
+
+# How search_packing splits images between atlases: one atlas at a time (greedy) or
+# all atlases at once, aiming at the fewest atlases then the smallest total area (global)
+PACKING_MODES = ('greedy', 'global')
+
+# Placement strategies of each packer family searched by search_single_atlas. MaxRects
+# strategies are plain names (BinPacker / NumpyBinPacker), the other families are prefixed
+PACKER_FAMILIES = {
+    'maxrects': ('best_area_fit', 'best_short_side_fit', 'best_long_side_fit', 'bottom_left', 'contact_point'),
+    'skyline': tuple(f'skyline_{s}' for s in SkylinePacker.PLACEMENT_STRATEGIES),
+    'guillotine': tuple(f'guillotine_{s}' for s in GuillotinePacker.PLACEMENT_STRATEGIES),
+}
+
+# How scale levels are derived: 'independent' resizes the full image with LANCZOS for each
+# level, the other modes build a mip chain where each level comes from the previous one
+MIP_MODES = ('independent', 'lanczos', 'box', 'numpy')
+
+# Local search run after the fixed grid of sort/placement configurations: 'random' tries
+# 10 random insertion orders, 'annealing' runs simulated annealing from the best grid layout
+LOCAL_SEARCHES = ('random', 'annealing')
+
+# Simulated annealing: neighbours packed per step (a fixed number, so results do not depend
+# on workers) and temperature range, in images (losing one image is accepted with probability
+# exp(-1 / T))
+ANNEALING_NEIGHBOURS = 4
+ANNEALING_TEMPERATURES = (0.5, 0.005)
+
+# Draft decoding scales JPEG sources down by 1/2, 1/4 or 1/8 while they stay at least this many
+# times larger than their target size (like Pillow's reducing_gap), LANCZOS does the final resize.
+# 1 keeps ~58 dB PSNR against a full decode on poster scans (see benchmark.py decode)
+DRAFT_REDUCING_GAP = 1
+
+# Duplicate images packed once: none, exact (same file SHA256 or same normalized pixels) or
+# perceptual (also near-duplicates: 64-bit difference hashes at most DEDUP_HASH_DISTANCE bits
+# apart, aspect ratios within DEDUP_ASPECT_TOLERANCE, confirmed by color thumbnails whose pixels
+# all stay within DEDUP_COLOR_TOLERANCE). The hash is computed on brightness only, so posters
+# that share a layout but differ in color or text can match it; the thumbnail check rejects them
+DEDUP_MODES = ('none', 'exact', 'perceptual')
+DEDUP_HASH_DISTANCE = 4
+DEDUP_ASPECT_TOLERANCE = 0.01
+DEDUP_THUMBNAIL_SIZE = 32
+DEDUP_COLOR_TOLERANCE = 32  # Max mean RGB difference of a thumbnail pixel (recompressed copies stay under ~25)
+
+# Build cache written next to the atlases, used by incremental builds
+BUILD_CACHE_FILE = '.build_cache.json'
+BUILD_CACHE_VERSION = 1
+
+# Phase timings and counters of the last build, plus the cProfile dump of profiled builds
+BUILD_STATS_FILE = 'build_stats.json'
+PROFILE_FILE = 'build_profile.prof'
+
+# Number of atlases won by each search configuration in previous builds, used to try the
+# most successful configurations first when the search has a budget
+SEARCH_HISTORY_FILE = '.search_history.json'
+
+# Layouts computed by previous builds, kept when the layout cache is persistent
+LAYOUT_CACHE_FILE = '.layout_cache.json'
+LAYOUT_CACHE_VERSION = 3
+
+def create_bin_packer(width: int, height: int, placement_strategy: str = 'best_area_fit', engine: str = 'python',
+                      allow_rotation: bool = False):
+    """Creates a bin packer for a placement strategy (see PACKER_FAMILIES)
     
-    def evaluate_atlas_configuration(self, atlas_list: List[Dict]) -> Dict[str, Any]:
-        """Evaluates the quality of an atlas configuration
+    skyline_* and guillotine_* strategies select SkylinePacker and GuillotinePacker, other
+    strategies are MaxRects ones, run by the given engine ('python' or 'numpy'). With
+    allow_rotation, the packer may turn rectangles by 90 degrees.
+    """
+    if placement_strategy.startswith('skyline_'):
+        return SkylinePacker(width, height, placement_strategy[len('skyline_'):], allow_rotation)
+    if placement_strategy.startswith('guillotine_'):
+        return GuillotinePacker(width, height, placement_strategy[len('guillotine_'):], allow_rotation)
+    if engine == 'numpy':
+        return NumpyBinPacker(width, height, placement_strategy, allow_rotation)
+    return BinPacker(width, height, placement_strategy, allow_rotation=allow_rotation)
+
+def snap_atlas_size(width: int, height: int, snap: str, max_width: int, max_height: int) -> Tuple[int, int]:
+    """Rounds cropped atlas dimensions up to the given snapping (see ATLAS_SNAPS), within the max size"""
+    if snap == 'pow2':
+        width, height = 1 << (width - 1).bit_length(), 1 << (height - 1).bit_length()
+    elif snap == 'multiple_of_4':
+        width, height = -(-width // 4) * 4, -(-height // 4) * 4
+    return min(width, max_width), min(height, max_height)
+
+def align_padded_size(size: int, align: int) -> int:
+    """Padded image size rounded up to a multiple of align (1 = unchanged)"""
+    return -(-size // align) * align
+
+def aligned_rect(rect: Rectangle, padded_width: int, padded_height: int, align: int) -> Tuple[Rectangle, bool]:
+    """Rectangle of a padded image packed at rect with aligned sizes, and whether it was rotated
+    
+    The packer returns the aligned size; the image keeps its own size at the same position,
+    the rest of the aligned cell staying empty.
+    """
+    rotated = rect.width != align_padded_size(padded_width, align)
+    if align == 1:
+        return rect, rotated
+    if rotated:
+        padded_width, padded_height = padded_height, padded_width
+    return Rectangle(rect.x, rect.y, padded_width, padded_height), rotated
+
+def alpha_bounds(image: Image.Image) -> Tuple[int, int, int, int]:
+    """Box (left, top, right, bottom) of the pixels that are not fully transparent
+    
+    The whole image when it has no transparent margin, or no visible pixel at all.
+    """
+    return image.getchannel('A').getbbox() or (0, 0, image.width, image.height)
+
+def perceptual_hash(image: Image.Image) -> int:
+    """64-bit difference hash of an image: brightness gradients of a 9x8 thumbnail over black"""
+    thumbnail = image.convert('RGBA').resize((9, 8), Image.Resampling.BOX)
+    gray = Image.alpha_composite(Image.new('RGBA', thumbnail.size, (0, 0, 0, 255)), thumbnail).convert('L')
+    pixels = gray.tobytes()
+    bits = 0
+    for row in range(8):
+        for column in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + column] > pixels[row * 9 + column + 1])
+    return bits
+
+def color_thumbnail(image: Image.Image) -> bytes:
+    """RGB bytes of a DEDUP_THUMBNAIL_SIZE square thumbnail of an image over black"""
+    thumbnail = image.convert('RGBA').resize((DEDUP_THUMBNAIL_SIZE, DEDUP_THUMBNAIL_SIZE), Image.Resampling.BOX)
+    return Image.alpha_composite(Image.new('RGBA', thumbnail.size, (0, 0, 0, 255)), thumbnail).convert('RGB').tobytes()
+
+def thumbnail_distance(first: bytes, second: bytes) -> float:
+    """Largest mean RGB difference between the pixels of two color thumbnails (see color_thumbnail)"""
+    return max(abs(first[i] - second[i]) + abs(first[i + 1] - second[i + 1]) + abs(first[i + 2] - second[i + 2])
+               for i in range(0, len(first), 3)) / 3
+
+class Layout:
+    """Compact layout of one atlas, as built for every candidate of the layout search
+    
+    Holds the image names in placement order and a flat array of their pixel rectangles
+    (x, y, width, height, padding excluded), with the aggregate areas summed while packing so
+    scoring a candidate never walks its images. The dict forms (placements, UV coordinates)
+    are only built for the layouts that are composited and written to the manifest.
+    
+    Rotated images are stored turned 90 degrees clockwise: their rectangle has the atlas
+    orientation (width and height swapped compared to the source image).
+    """
+    __slots__ = ('names', 'rects', 'width', 'height', 'image_area', 'padded_area', 'rotated')
+    
+    def __init__(self, names: List[str] = None, rects: array = None, width: int = 0, height: int = 0,
+                 image_area: int = 0, padded_area: int = 0, rotated: set = None):
+        self.names = names if names is not None else []
+        self.rects = rects if rects is not None else array('i')
+        self.width = width  # Atlas dimensions (used extent while packing)
+        self.height = height
+        self.image_area = image_area  # Sum of the image areas
+        self.padded_area = padded_area  # Sum of the image areas padding included
+        self.rotated = rotated if rotated is not None else set()  # Names of the rotated images
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    @property
+    def atlas_area(self) -> int:
+        return self.width * self.height
+    
+    def add(self, filename: str, rect: Rectangle, padding: int, rotated: bool = False):
+        """Records an image packed at rect (padding included) and grows the used extent"""
+        self.names.append(filename)
+        if rotated:
+            self.rotated.add(filename)
+        self.rects.extend((rect.x + padding, rect.y + padding, rect.width - padding * 2, rect.height - padding * 2))
+        self.image_area += (rect.width - padding * 2) * (rect.height - padding * 2)
+        self.padded_area += rect.width * rect.height
+        self.width = max(self.width, rect.x + rect.width)
+        self.height = max(self.height, rect.y + rect.height)
+    
+    def finish(self, snap: str, max_width: int, max_height: int) -> 'Layout':
+        """Sets the final atlas dimensions: used extent (at least 1x1) rounded by snap"""
+        self.width, self.height = snap_atlas_size(max(1, self.width), max(1, self.height), snap, max_width, max_height)
+        return self
+    
+    def placements(self) -> Dict[str, Dict[str, int]]:
+        """Pixel placements by filename: x, y, width and height in the atlas (padding excluded),
+        plus 'rotated' for rotated images"""
+        rects = self.rects
+        placements = {}
+        for i, name in enumerate(self.names):
+            placements[name] = {'x': rects[i * 4], 'y': rects[i * 4 + 1], 'width': rects[i * 4 + 2], 'height': rects[i * 4 + 3]}
+            if name in self.rotated:
+                placements[name]['rotated'] = True
+        return placements
+    
+    def uv(self) -> Dict[str, Dict[str, float]]:
+        """Normalized UV coordinates by filename (Unity compatible)
         
-        Returns:
-            dict: Score with number of atlases, total size and efficiency
+        'width' and 'height' are the source image dimensions and the rect_* fields the area it
+        covers in the atlas; rotated images also get 'rotated': true (the area holds the image
+        turned 90 degrees clockwise, see Runtime/Poster.cs).
         """
-        total_atlas_area = sum(a['width'] * a['height'] for a in atlas_list)
-        total_image_area = sum(
-            sum(uv['width'] * uv['height'] for uv in a['uv'].values())
-            for a in atlas_list
-        )
-        
-        # Calculate space reserved for padding (padding * 2 per image on each axis)
-        total_padding_area = sum(
-            sum(
-                (uv['width'] + self.padding * 2) * (uv['height'] + self.padding * 2) - uv['width'] * uv['height']
-                for uv in a['uv'].values()
-            )
-            for a in atlas_list
-        )
-        
-        # Efficiency = images surface + padding / total surface
-        # Padding is necessary so we count it as "used"
-        used_area = total_image_area + total_padding_area
-        efficiency = (used_area / total_atlas_area * 100) if total_atlas_area > 0 else 0
-        
-        return {
-            'num_atlases': len(atlas_list),
-            'total_area': total_atlas_area,
-            'image_area': total_image_area,
-            'efficiency': efficiency,
-            'wasted_area': total_atlas_area - used_area
-        }
+        rects = self.rects
+        uv_coords = {}
+        for i, name in enumerate(self.names):
+            x, y, width, height = rects[i * 4:i * 4 + 4]
+            rotated = name in self.rotated
+            # Unity uses origin at bottom left, so invert Y axis
+            uv_coords[name] = {
+                'width': height if rotated else width,
+                'height': width if rotated else height,
+                # Add coordinates for Unity Rect (x, y, width, height normalized)
+                'rect_x': x / self.width,
+                'rect_y': 1.0 - (y + height) / self.height,
+                'rect_width': width / self.width,
+                'rect_height': height / self.height
+            }
+            if rotated:
+                uv_coords[name]['rotated'] = True
+        return uv_coords
+
+def compute_layout(entries: List[Tuple[str, int, int]], atlas_width: int, atlas_height: int,
+                   padding: int, placement_strategy: str, engine: str = 'python',
+                   snap: str = 'none', allow_rotation: bool = False, align: int = 1) -> Layout:
+    """Packs image dimensions into one atlas, in the given order, without touching pixels
     
-    def test_packing_configuration(self, images: List[Tuple[str, Image.Image]], 
-                                   atlas_size: int, sort_strategy: str, 
-                                   reoptimize_each_atlas: bool = True) -> List[Dict]:
-        """Tests a specific packing configuration
+    Args:
+        entries: List of tuples (filename, width, height), already sorted
+        atlas_width: Max atlas width
+        atlas_height: Max atlas height
+        padding: Spacing around each image
+        placement_strategy: Placement strategy (see PACKER_FAMILIES)
+        engine: Packer engine, see create_bin_packer
+        snap: Rounding of the cropped atlas dimensions (see ATLAS_SNAPS)
+        allow_rotation: Let the packer turn images by 90 degrees
+        align: Padded image sizes are rounded up to this multiple, so with a 4x4 block
+               compressed output every image owns whole blocks (see align_padded_size)
+    
+    Returns:
+        Layout: The images packed before the first one that did not fit, in an atlas whose
+                dimensions are the used extent once empty margins are cropped (and snapped)
+    """
+    packer = create_bin_packer(atlas_width, atlas_height, placement_strategy, engine, allow_rotation)
+    layout = Layout()
+    
+    for filename, img_width, img_height in entries:
+        # Add padding to dimensions
+        padded_width, padded_height = img_width + padding * 2, img_height + padding * 2
+        rect = packer.insert(align_padded_size(padded_width, align), align_padded_size(padded_height, align))
         
-        Args:
-            images: Images to pack
-            atlas_size: Max atlas size
-            sort_strategy: Sort strategy
-            reoptimize_each_atlas: If True, re-optimize sorting for each new atlas
+        if rect is None:
+            # No more space in this atlas
+            break
+        
+        rect, rotated = aligned_rect(rect, padded_width, padded_height, align)
+        layout.add(filename, rect, padding, rotated)
+    
+    return layout.finish(snap, atlas_width, atlas_height)
+
+def _compute_layout_task(task: Tuple) -> Layout:
+    """Process pool entry point for compute_layout"""
+    return compute_layout(*task)
+
+def compute_multi_bin_layout(entries: List[Tuple[str, int, int]], bin_count: int, atlas_width: int, atlas_height: int,
+                             padding: int, placement_strategy: str, engine: str = 'python',
+                             snap: str = 'none', allow_rotation: bool = False, align: int = 1) -> List[Layout]:
+    """Packs image dimensions into bin_count atlases at once, each image going to the first atlas it fits in
+    
+    Unlike the atlas-by-atlas search, every atlas stays open until all images are placed, so
+    small images fill the gaps left in earlier atlases instead of opening a new one.
+    
+    Args:
+        entries: List of tuples (filename, width, height), already sorted
+        bin_count: Number of atlases available
+        atlas_width: Max atlas width
+        atlas_height: Max atlas height
+        padding: Spacing around each image
+        placement_strategy: Placement strategy (see PACKER_FAMILIES)
+        engine: Packer engine, see create_bin_packer
+        snap: Rounding of the cropped atlas dimensions (see ATLAS_SNAPS)
+        allow_rotation: Let the packers turn images by 90 degrees
+        align: Multiple padded image sizes are rounded up to, see compute_layout
+    
+    Returns:
+        list: One Layout per non-empty atlas, see compute_layout, or None when some image
+              fits in none of the atlases
+    """
+    packers = [create_bin_packer(atlas_width, atlas_height, placement_strategy, engine, allow_rotation)
+               for _ in range(bin_count)]
+    layouts = [Layout() for _ in range(bin_count)]
+    
+    for filename, img_width, img_height in entries:
+        padded_width, padded_height = img_width + padding * 2, img_height + padding * 2
+        for packer, layout in zip(packers, layouts):
+            rect = packer.insert(align_padded_size(padded_width, align), align_padded_size(padded_height, align))
+            if rect is not None:
+                rect, rotated = aligned_rect(rect, padded_width, padded_height, align)
+                layout.add(filename, rect, padding, rotated)
+                break
+        else:
+            return None
+    
+    return [layout.finish(snap, atlas_width, atlas_height) for layout in layouts if layout]
+
+def _compute_multi_bin_task(task: Tuple) -> List[Layout]:
+    """Process pool entry point for compute_multi_bin_layout"""
+    return compute_multi_bin_layout(*task)
+
+def packing_lower_bound(entries: List[Tuple[str, int, int]], atlas_width: int, atlas_height: int, padding: int,
+                        allow_rotation: bool = False, align: int = 1) -> int:
+    """Minimum number of atlases any packing needs for these image dimensions
+    
+    The larger of two classic bounds: the padded image area divided by the atlas area, and the
+    number of images wider than half AND taller than half the atlas (no two of them can share
+    one, they can neither sit side by side nor stack). With allow_rotation, an image only counts
+    when this holds in both orientations. Padded sizes are rounded up to align (see compute_layout).
+    """
+    padded = [(align_padded_size(width + padding * 2, align), align_padded_size(height + padding * 2, align))
+              for _, width, height in entries]
+    area_bound = math.ceil(sum(width * height for width, height in padded) / (atlas_width * atlas_height))
+    large_images = sum(1 for width, height in padded
+                       if width * 2 > atlas_width and height * 2 > atlas_height
+                       and (not allow_rotation or (height * 2 > atlas_width and width * 2 > atlas_height)))
+    return max(area_bound, large_images)
+
+class ImageCache:
+    """Content-addressed on-disk cache of normalized RGBA pixels
+    
+    Entries are keyed by the source SHA256 plus the parameters that produced the pixels
+    (max image size, scale level). Each file is a small header followed by raw RGBA bytes,
+    memory-mapped on load so warm runs skip decoding and resampling entirely.
+    """
+    
+    MAGIC = b'UPRGBA01'
+    HEADER = struct.Struct('<8sII')
+    
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.folder, exist_ok=True)
+    
+    @staticmethod
+    def key(sha: str, max_image_size: int, scale_factor: int, mip_mode: str = 'independent', draft: bool = False,
+            trim: bool = False) -> str:
+        """Cache key of an image at a scale level (trim: levels derived from the alpha-trimmed image)"""
+        key = f"{sha}_m{max_image_size}{'d' if draft else ''}_x{scale_factor:02d}"
+        if scale_factor > 1 and mip_mode != 'independent':
+            key += f"_{mip_mode}"
+        if scale_factor > 1 and trim:
+            key += "_t"
+        return key
+    
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, key[:2], key + '.rgba')
+    
+    def load(self, key: str) -> Image.Image:
+        """Returns the cached image (read-only, memory-mapped) or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        
+        magic, width, height = self.HEADER.unpack_from(mapped)
+        if magic != self.MAGIC or len(mapped) != self.HEADER.size + width * height * 4:
+            mapped.close()
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        pixels = memoryview(mapped)[self.HEADER.size:]
+        return Image.frombuffer('RGBA', (width, height), pixels, 'raw', 'RGBA', 0, 1)
+    
+    def store(self, key: str, image: Image.Image):
+        """Writes an RGBA image to the cache"""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, image.width, image.height))
+            f.write(image.tobytes())
+        os.replace(temp_path, path)
+
+class LayoutCache:
+    """LRU cache of compute_layout results keyed by the packed size sequence
+    
+    Layouts only depend on the (width, height) sequence in insertion order, the atlas size,
+    padding, placement strategy, engine, snapping and rotation, not on file names: identical
+    posters, sort strategies giving the same order and repeated sub-problems share one entry.
+    Entries store the atlas dimensions, the aggregate areas, the positions of the placed images
+    in sequence order and the sequence indices of the rotated ones.
+    """
+    
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.added = {}  # Entries computed since the cache was loaded, see merge
+        self.hits = 0
+    
+    @staticmethod
+    def key(task: Tuple) -> str:
+        """Canonical hash of a compute_layout task"""
+        entries, *config = task
+        sizes = [(width, height) for _, width, height in entries]
+        return hashlib.sha1(repr((sizes, config)).encode()).hexdigest()
+    
+    @staticmethod
+    def compact(layout: Layout) -> List:
+        """[width, height, image_area, padded_area, [x, y, x, y...], [rotated indices]] of a layout,
+        images in sequence order"""
+        return [layout.width, layout.height, layout.image_area, layout.padded_area,
+                [value for i in range(0, len(layout.rects), 4) for value in layout.rects[i:i + 2]],
+                [index for index, name in enumerate(layout.names) if name in layout.rotated]]
+    
+    @staticmethod
+    def expand(value: List, entries: List[Tuple[str, int, int]]) -> Layout:
+        """Layout of a cached entry for these images (see compute_layout)"""
+        width, height, image_area, padded_area, positions, rotated_indices = value
+        placed = entries[:len(positions) // 2]
+        rotated_indices = set(rotated_indices)
+        rects = array('i')
+        for index, (_, img_width, img_height) in enumerate(placed):
+            if index in rotated_indices:
+                img_width, img_height = img_height, img_width
+            rects.extend((positions[index * 2], positions[index * 2 + 1], img_width, img_height))
+        return Layout([filename for filename, _, _ in placed], rects, width, height, image_area, padded_area,
+                      {placed[index][0] for index in rotated_indices})
+    
+    def get(self, key: str) -> List:
+        value = self.entries.get(key)
+        if value is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return value
+    
+    def put(self, key: str, value: List):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        self.added[key] = value
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def merge(self, entries: Dict[str, List]):
+        """Adds entries computed by another process (scale level searches)"""
+        for key, value in entries.items():
+            self.put(key, value)
+    
+    def load(self, path: str):
+        """Loads a persistent store written by save, ignoring it when unreadable"""
+        if not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Ignoring layout cache {path}: {e}")
+            return
+        if data.get('version') != LAYOUT_CACHE_VERSION:
+            return
+        for key, value in data.get('layouts', {}).items():
+            self.entries[key] = value
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+    
+    def save(self, path: str):
+        """Writes the cached layouts, least recently used first"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': LAYOUT_CACHE_VERSION, 'layouts': self.entries}, f, separators=(',', ':'))
+
+class BuildStats:
+    """Wall time and counters of the build phases, saved next to the manifest (BUILD_STATS_FILE)
+    
+    Phases are accumulated for the whole build and per scale level. Encoding runs on worker
+    threads, so its time is summed over threads rather than measured as wall time.
+    """
+    
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.counters = {}
+        self.scales = {}
+        self._lock = threading.Lock()
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    @contextmanager
+    def phase(self, name: str, scale_factor: int = None):
+        """Times the enclosed block as one call of a phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, scale_factor)
+    
+    def add(self, name: str, seconds: float, scale_factor: int = None):
+        """Adds one call of a phase, to the scale level too when given"""
+        with self._lock:
+            targets = [self.phases]
+            if scale_factor is not None:
+                targets.append(self.scale(scale_factor).setdefault('phases', {}))
+            for phases in targets:
+                phase = phases.setdefault(name, {'seconds': 0.0, 'calls': 0})
+                phase['seconds'] += seconds
+                phase['calls'] += 1
+    
+    def count(self, name: str, value: int = 1):
+        """Increments a build counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+    
+    def scale(self, scale_factor: int) -> Dict[str, Any]:
+        """Stats record of a scale level"""
+        return self.scales.setdefault(str(scale_factor), {})
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': 1,
+            'total_seconds': time.perf_counter() - self.started,
+            'phases': self.phases,
+            'counters': self.counters,
+            'scales': self.scales
+        }
+
+class SourceImage:
+    """Source image known by its dimensions only, pixels are loaded on demand (streaming mode)"""
+    
+    __slots__ = ('path', 'sha', 'width', 'height')
+    
+    def __init__(self, path: str, sha: str, width: int, height: int):
+        self.path = path
+        self.sha = sha
+        self.width = width
+        self.height = height
+    
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.width, self.height
+
+class _SearchCancelled(Exception):
+    """Raised in a scale worker once the build no longer needs its search"""
+
+_scale_stop_event = None  # Set in scale worker processes by _init_scale_worker
+
+def _init_scale_worker(stop_event):
+    """Process pool initializer of the scale level workers"""
+    global _scale_stop_event
+    _scale_stop_event = stop_event
+
+def _search_scale_task(options: 'AtlasOptions', output_folder: str, entries: List[Tuple[str, int, int]]) -> Dict[str, Any]:
+    """Process pool entry point searching the layouts of one scale level
+    
+    The worker builds its own generator from the options: only the search history and the
+    persistent layout cache are read back from output_folder. Returns None when the build
+    set the stop event before the search finished.
+    """
+    # Scale levels already run in parallel; pixels and build caches stay in the parent process
+    generator = AtlasGenerator(output_folder=output_folder, options=replace(
+        options, workers=1, incremental=False, image_cache_folder=None, streaming=False, profile=False))
+    generator.stop_event = _scale_stop_event
+    generator._load_search_history()
+    if generator.persistent_layout_cache:
+        generator.layout_cache.load(os.path.join(output_folder, LAYOUT_CACHE_FILE))
+    try:
+        result = generator.search_packing(entries)
+    except _SearchCancelled:
+        return None
+    finally:
+        generator.close()
+    if generator.layout_cache is not None:
+        result['layout_cache_entries'] = generator.layout_cache.added  # Merged into the parent cache
+    return result
+
+def _option(default, help: str, **argument) -> Any:
+    """Dataclass field of an AtlasOptions option, with its command line help and extra argparse keywords
+    ('flag' renames the command line flag)"""
+    return field(default=default, metadata={'help': help, 'argument': argument})
+
+@dataclass
+class AtlasOptions:
+    """Options of an atlas build, filled by the command line (add_arguments / from_args)
+    and passed as is from main() to AtlasGenerator"""
+    
+    max_atlas_size: int = _option(2048, 'Taille maximale des atlas (par défaut: 2048)', type=int)
+    padding: int = _option(2, 'Padding entre les images dans l\'atlas (par défaut: 2)', type=int)
+    max_image_size: int = _option(None, 'Taille maximale des images avant traitement (par défaut: même que max_atlas_size)',
+                                  type=int)
+    workers: int = _option(1, 'Nombre de processus pour la recherche de packing, 0 = tous les cœurs (par défaut: 1)',
+                           type=int)
+    packer_engine: str = _option('python', 'Moteur de packing: python ou numpy (vectorisé, nécessite NumPy) '
+                                           '(par défaut: python)', choices=PACKER_ENGINES)
+    incremental: bool = _option(False, 'Réutilise les atlas dont les images sont inchangées depuis le build précédent')
+    image_cache_folder: str = _option(None, 'Dossier du cache des images décodées et redimensionnées '
+                                            '(par défaut: désactivé)', flag='image_cache',
+                                      metavar='IMAGE_CACHE')
+    mip_mode: str = _option('independent', 'Calcul des niveaux de downscale: independent (LANCZOS depuis la taille '
+                                           'pleine), ou chaîne de mips lanczos, box ou numpy (moyenne 2x2) '
+                                           '(par défaut: independent)', choices=MIP_MODES)
+    scale_workers: int = _option(1, 'Nombre de niveaux de downscale recherchés en parallèle, 0 = tous les cœurs '
+                                    '(par défaut: 1)', type=int)
+    png_compress_level: int = _option(None, 'Niveau de compression PNG, plus bas = plus rapide (par défaut: '
+                                            'compression maximale)', type=int, choices=range(10), metavar='{0-9}')
+    encode_workers: int = _option(0, 'Nombre de threads d\'encodage PNG, 0 = tous les cœurs (par défaut: 0)', type=int)
+    streaming: bool = _option(False, 'Mode basse mémoire: seules les dimensions restent en mémoire, les pixels sont '
+                                     'relus depuis le cache d\'images (--image_cache ou dossier temporaire) à la '
+                                     'composition')
+    memory_limit_mb: int = _option(None, 'Mémoire max des atlas en cours de composition/encodage, en Mo '
+                                         '(par défaut: illimitée)', type=int,
+                                   flag='memory_limit', metavar='MEMORY_LIMIT')
+    draft_decode: bool = _option(False, 'Décode les JPEG plus grands que max_image_size à résolution réduite '
+                                        '(1/2, 1/4, 1/8) avant le redimensionnement LANCZOS final')
+    profile: bool = _option(False, 'Profile le build avec cProfile et tracemalloc (build_profile.prof et '
+                                   'build_stats.json dans le dossier de sortie)')
+    time_budget: float = _option(None, 'Temps max en secondes de la recherche de chaque atlas, la meilleure '
+                                       'configuration trouvée est gardée (par défaut: recherche complète)', type=float)
+    max_evaluations: int = _option(None, 'Nombre max de configurations testées par atlas, les plus souvent gagnantes '
+                                         'd\'abord (par défaut: recherche complète)', type=int)
+    local_search: str = _option('random', 'Recherche après la grille de configurations: random (10 ordres aléatoires) '
+                                          'ou annealing (recuit simulé sur l\'ordre d\'insertion et le placement) '
+                                          '(par défaut: random)', choices=LOCAL_SEARCHES)
+    annealing_steps: int = _option(200, 'Nombre d\'étapes du recuit simulé, 4 configurations par étape '
+                                        '(par défaut: 200)', type=int)
+    search_seed: int = _option(0, 'Graine du recuit simulé (par défaut: 0)', type=int)
+    packers: Tuple[str, ...] = _option(('maxrects',), 'Familles de packers essayées par la recherche: maxrects, '
+                                                      'skyline (rapide, adapté aux nombreuses petites images) et '
+                                                      'guillotine (par défaut: maxrects)',
+                                       choices=list(PACKER_FAMILIES))
+    packing_mode: str = _option('greedy', 'Répartition des images: greedy (un atlas à la fois) ou global (tous les '
+                                          'atlas à la fois, le moins d\'atlas possible puis la plus petite surface) '
+                                          '(par défaut: greedy)', choices=PACKING_MODES)
+    atlas_shapes: str = _option('square', 'Formes d\'atlas essayées: square (max_atlas_size, 3/4 et 1/2) ou '
+                                          'rectangular (aussi 2048x1024, 1024x512...) (par défaut: square)',
+                                choices=ATLAS_SHAPES)
+    atlas_snap: str = _option('none', 'Arrondi des dimensions des atlas: none, multiple_of_4 (blocs de compression '
+                                      '4x4) ou pow2 (puissances de deux, sans padding du driver) (par défaut: none)',
+                              choices=ATLAS_SNAPS)
+    layout_cache_size: int = _option(4096, 'Nombre de layouts gardés en mémoire, les séquences de tailles déjà '
+                                           'packées ne sont pas recalculées (0 = désactivé, par défaut: 4096)',
+                                     type=int)
+    persistent_layout_cache: bool = _option(False, 'Garde le cache de layouts entre deux builds (.layout_cache.json '
+                                                   'dans le dossier de sortie)')
+    catalog_index: str = _option(None, 'Fichier d\'index des images sources (taille, date, SHA, dimensions), seuls '
+                                       'les fichiers modifiés sont relus (par défaut: fichier par dossier d\'entrée '
+                                       'dans le cache utilisateur, ~/.cache/udon_poster_catalog)')
+    allow_rotation: bool = _option(False, 'Autorise la rotation des images de 90° dans les atlas (drapeau rotated '
+                                          'dans les UV, géré par Runtime/Poster.cs)')
+    trim_alpha: bool = _option(False, 'Retire les marges transparentes des images avant le packing (position de la '
+                                      'partie gardée dans trim des UV)')
+    dedup: str = _option('none', 'Packe une seule fois les images en double, qui partagent le même rectangle UV: '
+                                 'exact (même fichier ou mêmes pixels) ou perceptual (aussi les quasi-doublons) '
+                                 '(par défaut: none)', choices=DEDUP_MODES)
+    block_formats: Tuple[str, ...] = _option((), 'Écrit aussi chaque atlas en texture compressée par blocs DDS: bc1 '
+                                                 '(DXT1, opaque) et/ou bc3 (DXT5, avec alpha), listées dans formats du '
+                                                 'manifest; les images sont alignées sur les blocs 4x4 (nécessite '
+                                                 'numpy)', choices=BLOCK_FORMATS)
+    
+    @classmethod
+    def add_arguments(cls, parser):
+        """Declares one command line flag per option (--<name>, store_true for booleans, lists for tuples)"""
+        for option in fields(cls):
+            argument = dict(option.metadata['argument'])
+            flag = '--' + argument.pop('flag', option.name)
+            if isinstance(option.default, bool):
+                argument['action'] = 'store_true'
+            elif isinstance(option.default, tuple):
+                argument.update(nargs='+', default=list(option.default))
+            else:
+                argument['default'] = option.default
+            parser.add_argument(flag, dest=option.name, help=option.metadata['help'], **argument)
+    
+    @classmethod
+    def from_args(cls, args) -> 'AtlasOptions':
+        """Options parsed by a parser, from the attributes named after the fields (others keep their default)"""
+        values = {}
+        for option in fields(cls):
+            if hasattr(args, option.name):
+                value = getattr(args, option.name)
+                values[option.name] = tuple(value) if isinstance(value, list) else value
+        return cls(**values)
+
+class AtlasGenerator:
+    def __init__(self, max_atlas_size: int = None, input_folder: str = "", output_folder: str = "", padding: int = None,
+                 max_image_size: int = None, options: 'AtlasOptions' = None, **overrides):
+        """
+        Args:
+            max_atlas_size: Max atlas side (None = options.max_atlas_size, 2048 by default)
+            input_folder: Folder of the source images
+            output_folder: Folder of the atlases, manifest and build caches
+            padding: Spacing between images (None = options.padding, 2 by default)
+            max_image_size: Max image side before processing (None = options.max_image_size)
+            options: Build options (default: AtlasOptions defaults)
+            **overrides: AtlasOptions fields replacing those of options
+        """
+        for name, value in (('max_atlas_size', max_atlas_size), ('padding', padding), ('max_image_size', max_image_size)):
+            if value is not None:
+                overrides.setdefault(name, value)
+        options = replace(options or AtlasOptions(), **overrides)
+        self.options = options  # Effective options (atlas_snap may be raised for block formats)
+        self.max_atlas_size = options.max_atlas_size
+        self.input_folder = input_folder or "input_images"
+        self.catalog_index = options.catalog_index  # Catalog index file (None = catalog.default_index_path of the input folder)
+        self.output_folder = output_folder or "output_atlases"
+        self.padding = options.padding  # Spacing between images to avoid artifacts
+        self.max_image_size = options.max_image_size if options.max_image_size is not None else options.max_atlas_size  # Max image resolution before processing
+        self.workers = options.workers if options.workers and options.workers > 0 else (os.cpu_count() or 1)  # Processes used by the packing search
+        self.scale_workers = options.scale_workers if options.scale_workers and options.scale_workers > 0 else (os.cpu_count() or 1)  # Scale levels searched concurrently
+        self._executor = None
+        self.layouts_evaluated = 0  # compute_layout calls made by the packing search
+        self.stop_event = None  # multiprocessing Event cancelling the search (scale workers, see _search_scale_task)
+        if options.layout_cache_size < 0:
+            raise ValueError(f"Layout cache size must be positive or 0, got {options.layout_cache_size}")
+        self.layout_cache = LayoutCache(options.layout_cache_size) if options.layout_cache_size else None  # Memoized layouts (None = disabled)
+        self.persistent_layout_cache = options.persistent_layout_cache and self.layout_cache is not None  # Kept in LAYOUT_CACHE_FILE
+        self.encode_workers = options.encode_workers if options.encode_workers and options.encode_workers > 0 else (os.cpu_count() or 1)  # Threads encoding PNG atlases
+        self._encode_executor = None
+        
+        if options.png_compress_level is not None and not 0 <= options.png_compress_level <= 9:
+            raise ValueError(f"PNG compress level must be between 0 and 9, got {options.png_compress_level}")
+        self.png_compress_level = options.png_compress_level  # None = maximum compression (optimize)
+        
+        if options.packer_engine not in PACKER_ENGINES:
+            raise ValueError(f"Unknown packer engine '{options.packer_engine}' (expected one of {', '.join(PACKER_ENGINES)})")
+        if options.packer_engine == 'numpy' and np is None:
+            raise ImportError("The 'numpy' packer engine requires NumPy (pip install numpy)")
+        self.packer_engine = options.packer_engine  # Free rectangle engine: pure Python or vectorized NumPy
+        
+        unknown_packers = [family for family in options.packers if family not in PACKER_FAMILIES]
+        if not options.packers or unknown_packers:
+            raise ValueError(f"Unknown packers {unknown_packers} (expected some of {', '.join(PACKER_FAMILIES)})")
+        self.packers = tuple(options.packers)  # Packer families tried by the search
+        if options.packing_mode not in PACKING_MODES:
+            raise ValueError(f"Unknown packing mode '{options.packing_mode}' (expected one of {', '.join(PACKING_MODES)})")
+        self.packing_mode = options.packing_mode
+        if options.atlas_shapes not in ATLAS_SHAPES:
+            raise ValueError(f"Unknown atlas shapes '{options.atlas_shapes}' (expected one of {', '.join(ATLAS_SHAPES)})")
+        if options.atlas_snap not in ATLAS_SNAPS:
+            raise ValueError(f"Unknown atlas snap '{options.atlas_snap}' (expected one of {', '.join(ATLAS_SNAPS)})")
+        unknown_formats = [block_format for block_format in options.block_formats if block_format not in BLOCK_FORMATS]
+        if unknown_formats:
+            raise ValueError(f"Unknown block formats {unknown_formats} (expected some of {', '.join(BLOCK_FORMATS)})")
+        if options.block_formats and np is None:
+            raise ImportError("Block compressed formats require NumPy (pip install numpy)")
+        self.block_formats = tuple(dict.fromkeys(options.block_formats))  # DDS variants written next to each PNG atlas
+        # Block compressed atlases keep every padded image on whole 4x4 blocks, so no block mixes
+        # two images, and their dimensions on whole blocks
+        self.block_align = BLOCK_SIZE if self.block_formats else 1
+        if self.block_formats and options.atlas_snap == 'none':
+            options.atlas_snap = 'multiple_of_4'
+        self.atlas_shapes = options.atlas_shapes
+        self.atlas_snap = options.atlas_snap
+        self.allow_rotation = options.allow_rotation  # Let the packers turn images by 90 degrees (flagged 'rotated' in UVs)
+        self.incremental = options.incremental  # Reuse unchanged atlases from the previous build (see BUILD_CACHE_FILE)
+        self.image_cache = ImageCache(options.image_cache_folder) if options.image_cache_folder else None  # Normalized pixels per scale
+        
+        # Streaming mode keeps only dimensions in memory and reads pixels back from the image
+        # cache when compositing, so it needs one (a temporary folder removed by close())
+        self.streaming = options.streaming
+        self._temporary_cache_folder = None
+        if options.streaming and self.image_cache is None:
+            self._temporary_cache_folder = tempfile.mkdtemp(prefix='atlas_pixels_')
+            self.image_cache = ImageCache(self._temporary_cache_folder)
+        if options.memory_limit_mb is not None and options.memory_limit_mb <= 0:
+            raise ValueError(f"Memory limit must be positive, got {options.memory_limit_mb} MB")
+        self.memory_limit = options.memory_limit_mb * 1024 * 1024 if options.memory_limit_mb else None  # Atlas pixels in flight (None = unlimited)
+        self.scale_factors = [1, 2, 4, 8, 16]  # Downscale levels
+        
+        if options.mip_mode not in MIP_MODES:
+            raise ValueError(f"Unknown mip mode '{options.mip_mode}' (expected one of {', '.join(MIP_MODES)})")
+        if options.mip_mode == 'numpy' and np is None:
+            raise ImportError("The 'numpy' mip mode requires NumPy (pip install numpy)")
+        self.mip_mode = options.mip_mode
+        
+        self.draft_decode = options.draft_decode  # Decode oversized JPEG sources at reduced resolution (DCT scaling)
+        self.trim_alpha = options.trim_alpha  # Pack only the non transparent part of each image
+        self.trims = {}  # Filename -> (x, y, width, height, source width, source height) of trimmed images
+        if options.dedup not in DEDUP_MODES:
+            raise ValueError(f"Unknown dedup mode '{options.dedup}' (expected one of {', '.join(DEDUP_MODES)})")
+        self.dedup = options.dedup
+        self.duplicates = {}  # Packed filename -> filenames sharing its UV rect (see find_duplicates)
+        self.dedup_matches = {}  # Duplicates found by kind in the last find_duplicates
+        # Anytime search: each single atlas search stops once its budget is spent (None = full search)
+        if options.time_budget is not None and options.time_budget <= 0:
+            raise ValueError(f"Time budget must be positive, got {options.time_budget}")
+        if options.max_evaluations is not None and options.max_evaluations <= 0:
+            raise ValueError(f"Max evaluations must be positive, got {options.max_evaluations}")
+        self.time_budget = options.time_budget  # Seconds per single atlas search
+        self.max_evaluations = options.max_evaluations  # Layouts per single atlas search
+        if options.local_search not in LOCAL_SEARCHES:
+            raise ValueError(f"Unknown local search '{options.local_search}' (expected one of {', '.join(LOCAL_SEARCHES)})")
+        if options.annealing_steps <= 0:
+            raise ValueError(f"Annealing steps must be positive, got {options.annealing_steps}")
+        self.local_search = options.local_search
+        self.annealing_steps = options.annealing_steps
+        self.search_seed = options.search_seed  # Seed of the annealing moves
+        self.search_history = {}  # Configuration key -> atlases won in previous builds
+        self._search_wins = {}  # Atlases won in the current build
+        
+        self.stats = BuildStats()  # Phase timings of the current build
+        self.profile = options.profile  # Run builds under cProfile and tracemalloc
+        self.decode_stats = {'decoded': 0, 'drafted': 0, 'seconds': 0.0, 'full_bytes': 0, 'decoded_bytes': 0,
+                             'peak_full_bytes': 0, 'peak_decoded_bytes': 0}
+        
+        # Create output folder if it doesn't exist
+        os.makedirs(self.output_folder, exist_ok=True)
+    
+    def _map_layouts(self, tasks: List[Tuple], task_function=_compute_layout_task) -> List[Any]:
+        """Runs compute_layout (or task_function) for each task, across the process pool when workers > 1
+        
+        Results are returned in task order so parallel and serial runs pick the same winner.
+        compute_layout tasks already in the layout cache, or repeated in the batch, are packed once.
+        """
+        self.layouts_evaluated += len(tasks)
+        if self.layout_cache is None or task_function is not _compute_layout_task:
+            return self._run_tasks(tasks, task_function)
+        
+        keys = [LayoutCache.key(task) for task in tasks]
+        values = {}
+        pending = {}  # Key -> first task needing it
+        for index, key in enumerate(keys):
+            if key in values or key in pending:
+                self.layout_cache.hits += 1
+                continue
+            value = self.layout_cache.get(key)
+            if value is not None:
+                values[key] = value
+            else:
+                pending[key] = index
+        
+        results = [None] * len(tasks)
+        computed = self._run_tasks([tasks[index] for index in pending.values()], task_function)
+        for (key, index), layout in zip(pending.items(), computed):
+            results[index] = layout
+            values[key] = LayoutCache.compact(layout)
+            self.layout_cache.put(key, values[key])
+        
+        return [result if result is not None else LayoutCache.expand(values[key], task[0])
+                for result, key, task in zip(results, keys, tasks)]
+    
+    def _run_tasks(self, tasks: List[Tuple], task_function) -> List[Any]:
+        """Runs task_function for each task, across the process pool when workers > 1"""
+        if self.stop_event is not None:
+            # Scale worker: checked between layouts so a search the build no longer needs stops early
+            results = []
+            for task in tasks:
+                if self.stop_event.is_set():
+                    raise _SearchCancelled()
+                results.append(task_function(task))
+            return results
+        if self.workers <= 1 or len(tasks) < 2:
+            return [task_function(task) for task in tasks]
+        
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        chunksize = max(1, len(tasks) // (self.workers * 4))
+        return list(self._executor.map(task_function, tasks, chunksize=chunksize))
+    
+    def encode_atlas(self, atlas: Image.Image) -> bytes:
+        """Encodes an atlas as PNG in memory
+        
+        png_compress_level None keeps maximum compression (optimize=True), 0-9 trades
+        file size for speed (1 is fastest with compression, 0 stores uncompressed).
+        """
+        buffer = BytesIO()
+        if self.png_compress_level is None:
+            atlas.save(buffer, format='PNG', optimize=True)
+        else:
+            atlas.save(buffer, format='PNG', compress_level=self.png_compress_level)
+        return buffer.getvalue()
+    
+    def _timed_encode(self, atlas: Image.Image, scale_factor: int = None) -> Tuple[bytes, Dict[str, bytes]]:
+        """PNG bytes of an atlas and its DDS files by block format"""
+        with self.stats.phase('encode', scale_factor):
+            png = self.encode_atlas(atlas)
+        variants = {}
+        for block_format in self.block_formats:
+            with self.stats.phase('encode_blocks', scale_factor):
+                variants[block_format] = encode_dds(atlas, block_format)
+        return png, variants
+    
+    def _submit_encode(self, atlas: Image.Image, scale_factor: int = None):
+        """Schedules encode_atlas on the encode thread pool (Pillow releases the GIL while compressing)"""
+        if self._encode_executor is None:
+            self._encode_executor = ThreadPoolExecutor(max_workers=self.encode_workers)
+        return self._encode_executor.submit(self._timed_encode, atlas, scale_factor)
+    
+    def close(self):
+        """Shuts down the worker pools, if any, and removes the temporary pixel cache"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self._encode_executor is not None:
+            self._encode_executor.shutdown()
+            self._encode_executor = None
+        if self._temporary_cache_folder is not None:
+            shutil.rmtree(self._temporary_cache_folder, ignore_errors=True)
+            self._temporary_cache_folder = None
+    
+    def _encoded_atlases(self, atlas_infos: List[Dict], render, scale_factor: int = None):
+        """Composites and encodes atlases, yielding their PNG bytes and block compressed variants in order
+        
+        At most memory_limit bytes of RGBA atlas pixels are composited or being encoded at
+        once (always at least one atlas), so the peak memory does not grow with the number
+        of atlases of a scale level.
+        
+        Args:
+            atlas_infos: Atlases to encode
+            render: Function returning the atlas Image of an atlas info
+            scale_factor: Scale level, for the build stats
+        """
+        pending = deque()
+        in_flight = 0
+        for atlas_info in atlas_infos:
+            atlas_bytes = atlas_info['width'] * atlas_info['height'] * 4
+            while pending and self.memory_limit is not None and in_flight + atlas_bytes > self.memory_limit:
+                future, done_bytes = pending.popleft()
+                in_flight -= done_bytes
+                yield future.result()
+            with self.stats.phase('composite', scale_factor):
+                atlas = render(atlas_info)
+            pending.append((self._submit_encode(atlas, scale_factor), atlas_bytes))
+            in_flight += atlas_bytes
+        
+        while pending:
+            future, _ = pending.popleft()
+            yield future.result()
+    
+    def resize_image_if_needed(self, image: Image.Image) -> Image.Image:
+        """Resizes image if it exceeds 2048x2048 while maintaining ratio"""
+        width, height = image.size
+        
+        if width <= self.max_atlas_size and height <= self.max_atlas_size:
+            return image
+        
+        # Calculate resize ratio
+        ratio = min(self.max_atlas_size / width, self.max_atlas_size / height)
+        new_width = int(width * ratio)
+        new_height = int(height * ratio)
+        
+        return image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+    
+    @staticmethod
+    def _scaled_size(width: int, height: int, scale_factor: int) -> Tuple[int, int]:
+        """Dimensions of an image downscaled by scale_factor (at least 1x1)"""
+        return max(1, width // scale_factor), max(1, height // scale_factor)
+    
+    def downscale_image(self, image: Image.Image, scale_factor: int) -> Image.Image:
+        """Downscales image by a multiple of 2"""
+        return image.resize(self._scaled_size(image.width, image.height, scale_factor), Image.Resampling.LANCZOS)
+    
+    @staticmethod
+    def _reduce_2x2(image: Image.Image, size: Tuple[int, int]) -> Image.Image:
+        """Halves an image by averaging 2x2 blocks with NumPy (alpha premultiplied, like Pillow)"""
+        width, height = size
+        if image.width < width * 2 or image.height < height * 2:
+            return image.resize(size, Image.Resampling.BOX)
+        
+        pixels = np.asarray(image)[:height * 2, :width * 2].astype(np.uint32)
+        alpha = pixels[..., 3]
+        premultiplied = pixels[..., :3] * alpha[..., np.newaxis]
+        
+        # Sum each 2x2 block
+        alpha_sum = alpha[0::2, 0::2] + alpha[1::2, 0::2] + alpha[0::2, 1::2] + alpha[1::2, 1::2]
+        color_sum = (premultiplied[0::2, 0::2] + premultiplied[1::2, 0::2] +
+                     premultiplied[0::2, 1::2] + premultiplied[1::2, 1::2])
+        
+        result = np.empty((height, width, 4), dtype=np.uint8)
+        divisor = np.maximum(alpha_sum, 1)[..., np.newaxis]
+        result[..., :3] = (color_sum + divisor // 2) // divisor
+        result[..., 3] = (alpha_sum + 2) // 4
+        return Image.fromarray(result, 'RGBA')
+    
+    def _mip_reduce(self, image: Image.Image, size: Tuple[int, int]) -> Image.Image:
+        """Derives a mip level from the previous one with the configured mip_mode"""
+        if self.mip_mode == 'numpy':
+            return self._reduce_2x2(image, size)
+        if self.mip_mode == 'box':
+            return image.resize(size, Image.Resampling.BOX)
+        return image.resize(size, Image.Resampling.LANCZOS)
+    
+    def normalized_size(self, width: int, height: int) -> Tuple[int, int]:
+        """Size of a source image once shrunk to max_image_size by load_image"""
+        if width > self.max_image_size or height > self.max_image_size:
+            ratio = min(self.max_image_size / width, self.max_image_size / height)
+            return int(width * ratio), int(height * ratio)
+        return width, height
+    
+    def load_image(self, filepath: str, filename: str, sha: str) -> Image.Image:
+        """Loads a source image as RGBA, resized to max_image_size, from the image cache when possible"""
+        cache_key = None
+        if self.image_cache is not None:
+            cache_key = ImageCache.key(sha, self.max_image_size, 1, draft=self.draft_decode)
+            with self.stats.phase('load'):
+                img = self.image_cache.load(cache_key)
+            if img is not None:
+                return img
+        
+        start = time.perf_counter()
+        load_start = start
+        img = Image.open(filepath)
+        
+        # Resize image if it exceeds max_image_size
+        width, height = img.size
+        new_width, new_height = self.normalized_size(width, height)
+        if (new_width, new_height) != (width, height):
+            if self.draft_decode and img.format == 'JPEG':
+                # Let the JPEG decoder scale down by 1/2, 1/4 or 1/8 before the final resize
+                img.draft(None, (new_width * DRAFT_REDUCING_GAP, new_height * DRAFT_REDUCING_GAP))
+        
+        drafted = img.size != (width, height)
+        img = img.convert('RGBA')  # Ensure RGBA format
+        decoded_size = img.size
+        self.stats.add('load', time.perf_counter() - load_start)
+        
+        stats = self.decode_stats
+        stats['decoded'] += 1
+        stats['drafted'] += drafted
+        stats['full_bytes'] += width * height * 4
+        stats['decoded_bytes'] += img.width * img.height * 4
+        stats['peak_full_bytes'] = max(stats['peak_full_bytes'], width * height * 4)
+        stats['peak_decoded_bytes'] = max(stats['peak_decoded_bytes'], img.width * img.height * 4)
+        
+        if (new_width, new_height) != (width, height):
+            with self.stats.phase('resize', 1):
+                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
+            draft_note = f" (decoded at {decoded_size[0]}x{decoded_size[1]})" if drafted else ""
+            print(f"  📐 {filename}: {width}x{height} → {new_width}x{new_height}{draft_note}")
+        stats['seconds'] += time.perf_counter() - start
+        
+        if cache_key is not None:
+            self.image_cache.store(cache_key, img)
+        return img
+    
+    def get_scaled_image(self, image: Image.Image, sha: str, scale_factor: int, previous: Tuple[int, Image.Image] = None) -> Image.Image:
+        """Returns image at the given scale level, from the image cache when possible
+        
+        Args:
+            image: Full size image (scale 1)
+            sha: SHA256 of the source file
+            scale_factor: Scale level
+            previous: (scale, image) of a lower level already built; mip chains continue
+                      from it instead of starting again from the full size image
+        """
+        if scale_factor == 1:
+            return image
+        
+        if self.mip_mode == 'independent':
+            steps = [scale_factor]
+            current = image
+        else:
+            # Walk the chain one level at a time from the closest level available
+            start_scale, current = previous if previous and previous[0] < scale_factor else (1, image)
+            steps = [s for s in self.scale_factors if start_scale < s <= scale_factor]
+            if not steps or steps[-1] != scale_factor:
+                steps.append(scale_factor)
+        
+        for step in steps:
+            cache_key = None
+            if self.image_cache is not None:
+                cache_key = ImageCache.key(sha, self.max_image_size, step, self.mip_mode, self.draft_decode, self.trim_alpha)
+                with self.stats.phase('load', step):
+                    cached = self.image_cache.load(cache_key)
+                if cached is not None:
+                    current = cached
+                    continue
+            
+            with self.stats.phase('resize', step):
+                if self.mip_mode == 'independent':
+                    current = self.downscale_image(current, step)
+                else:
+                    current = self._mip_reduce(current, self._scaled_size(image.width, image.height, step))
+            
+            if cache_key is not None:
+                self.image_cache.store(cache_key, current)
+        
+        return current
+    
+    def trim_image(self, filename: str, image: Image.Image) -> Image.Image:
+        """Crops a normalized image to its non transparent pixels, recording the box in self.trims
+        
+        Scale levels are then derived from the cropped image, so the recorded box (in scale 1
+        pixels) locates the packed area within the source image at every level.
+        """
+        with self.stats.phase('trim'):
+            left, top, right, bottom = alpha_bounds(image)
+        if (left, top, right, bottom) == (0, 0, image.width, image.height):
+            return image
+        self.trims[filename] = (left, top, right - left, bottom - top, image.width, image.height)
+        return image.crop((left, top, right, bottom))
+    
+    def find_duplicates(self, image_files: List[Tuple[str, Any]], image_sha_map: Dict[str, str]) -> Dict[str, List[str]]:
+        """Groups the images that can share one packed copy (see DEDUP_MODES)
+        
+        Byte-identical files are matched by SHA256 without decoding, then images with the same
+        normalized (and trimmed) pixels; the perceptual mode finally merges near-duplicates into
+        the largest image of their group, hash matches being confirmed on color thumbnails. Streamed images are decoded for the pixel checks.
+        
+        Returns:
+            dict: Kept filename -> duplicate filenames, with 'sha', 'pixels' and 'perceptual'
+                  match counts in self.dedup_matches
+        """
+        duplicates = {}
+        matches = {'sha': 0, 'pixels': 0, 'perceptual': 0}
+        
+        def merge(kept, filename, kind):
+            duplicates.setdefault(kept, []).append(filename)
+            duplicates[kept].extend(duplicates.pop(filename, []))
+            matches[kind] += 1
+        
+        def pixels(filename, img):
+            return self.load_scaled_source(filename, img, 1) if isinstance(img, SourceImage) else img
+        
+        unique = []
+        kept_by_key = {}
+        for filename, img in sorted(image_files, key=lambda item: item[0]):
+            kept = kept_by_key.setdefault(image_sha_map[filename], filename)
+            if kept != filename:
+                merge(kept, filename, 'sha')
+            else:
+                unique.append((filename, img))
+        
+        distinct = []
+        kept_by_key = {}
+        for filename, img in unique:
+            with self.stats.phase('dedup'):
+                data = pixels(filename, img)
+                key = (data.size, self.trims.get(filename), hashlib.sha256(data.tobytes()).hexdigest())
+            kept = kept_by_key.setdefault(key, filename)
+            if kept != filename:
+                merge(kept, filename, 'pixels')
+            else:
+                distinct.append((filename, img))
+        
+        if self.dedup == 'perceptual':
+            # (hash, color thumbnail, width, height, filename) of the images kept so far, largest first
+            kept_hashes = []
+            for filename, img in sorted(distinct, key=lambda item: (-item[1].width * item[1].height, item[0])):
+                with self.stats.phase('dedup'):
+                    data = pixels(filename, img)
+                    image_hash = perceptual_hash(data)
+                    thumbnail = color_thumbnail(data)
+                for kept_hash, kept_thumbnail, kept_width, kept_height, kept in kept_hashes:
+                    if ((image_hash ^ kept_hash).bit_count() <= DEDUP_HASH_DISTANCE and
+                            abs(img.width * kept_height - kept_width * img.height)
+                            <= DEDUP_ASPECT_TOLERANCE * kept_width * img.height and
+                            thumbnail_distance(thumbnail, kept_thumbnail) <= DEDUP_COLOR_TOLERANCE):
+                        merge(kept, filename, 'perceptual')
+                        break
+                else:
+                    kept_hashes.append((image_hash, thumbnail, img.width, img.height, filename))
+        
+        self.dedup_matches = matches
+        return duplicates
+    
+    def load_scaled_source(self, filename: str, source: SourceImage, scale_factor: int) -> Image.Image:
+        """Loads the pixels of a streamed source image at a scale level (image cache first)"""
+        image = self.load_image(source.path, filename, source.sha)
+        trim = self.trims.get(filename)
+        if trim is not None:
+            x, y, width, height = trim[:4]
+            image = image.crop((x, y, x + width, y + height))
+        return self.get_scaled_image(image, source.sha, scale_factor)
+    
+    def composite_streamed_atlas(self, sources: Dict[str, SourceImage], placements: Dict[str, Dict[str, int]],
+                                 atlas_width: int, atlas_height: int, scale_factor: int) -> Image.Image:
+        """Pastes the images of a layout into a new atlas, loading one source at a time
+        
+        Args:
+            sources: Streamed source images by filename
+            placements: Pixel placements (see Layout.placements)
+            atlas_width: Atlas width
+            atlas_height: Atlas height
+            scale_factor: Scale level of the atlas
+        """
+        atlas = Image.new('RGBA', (atlas_width, atlas_height), (0, 0, 0, 0))
+        
+        for filename, placement in placements.items():
+            img = self.load_scaled_source(filename, sources[filename], scale_factor)
+            if placement.get('rotated'):
+                img = img.transpose(Image.Transpose.ROTATE_270)
+            if img.size != (placement['width'], placement['height']):
+                # Single image atlases may shrink the image (see individual_atlas_layout)
+                img = img.resize((placement['width'], placement['height']), Image.Resampling.LANCZOS)
+            atlas.paste(img, (placement['x'], placement['y']))
+        
+        return atlas
+    
+    @staticmethod
+    def _dims(item: Tuple) -> Tuple[int, int]:
+        """Returns (width, height) of a (filename, Image) or (filename, width, height) entry"""
+        if len(item) == 3:
+            return item[1], item[2]
+        return item[1].size
+    
+    def _sort_images(self, images: List[Tuple], sort_strategy: str) -> List[Tuple]:
+        """Sorts images according to the given strategy
+        
+        Args:
+            images: List of images to sort, as (filename, Image) or (filename, width, height)
+            sort_strategy: Sort strategy
+            
+        Returns:
+            Sorted list of images
+        """
+        dims = self._dims
+        if sort_strategy == 'none':
+            # No sorting, keep existing order
+            return images[:]
+        elif sort_strategy == 'area':
+            return sorted(images, key=lambda x: dims(x)[0] * dims(x)[1], reverse=True)
+        elif sort_strategy == 'area_asc':
+            return sorted(images, key=lambda x: dims(x)[0] * dims(x)[1], reverse=False)
+        elif sort_strategy == 'height':
+            return sorted(images, key=lambda x: dims(x)[1], reverse=True)
+        elif sort_strategy == 'height_asc':
+            return sorted(images, key=lambda x: dims(x)[1], reverse=False)
+        elif sort_strategy == 'width':
+            return sorted(images, key=lambda x: dims(x)[0], reverse=True)
+        elif sort_strategy == 'width_asc':
+            return sorted(images, key=lambda x: dims(x)[0], reverse=False)
+        elif sort_strategy == 'perimeter':
+            return sorted(images, key=lambda x: dims(x)[0] + dims(x)[1], reverse=True)
+        elif sort_strategy == 'max_side':
+            return sorted(images, key=lambda x: max(dims(x)[0], dims(x)[1]), reverse=True)
+        elif sort_strategy == 'min_side':
+            return sorted(images, key=lambda x: min(dims(x)[0], dims(x)[1]), reverse=True)
+        elif sort_strategy == 'ratio':
+            return sorted(images, key=lambda x: dims(x)[0] / max(dims(x)[1], 1), reverse=True)
+        elif sort_strategy == 'ratio_inv':
+            return sorted(images, key=lambda x: dims(x)[1] / max(dims(x)[0], 1), reverse=True)
+        elif sort_strategy == 'diagonal':
+            return sorted(images, key=lambda x: (dims(x)[0]**2 + dims(x)[1]**2)**0.5, reverse=True)
+        elif sort_strategy == 'pathological':
+            sorted_by_area = sorted(images, key=lambda x: dims(x)[0] * dims(x)[1], reverse=True)
+            result = []
+            left, right = 0, len(sorted_by_area) - 1
+            while left <= right:
+                result.append(sorted_by_area[left])
+                if left != right:
+                    result.append(sorted_by_area[right])
+                left += 1
+                right -= 1
+            return result
+        else:
+            return images[:]
+    
+    def pack_layout(self, entries: List[Tuple[str, int, int]], sort_strategy: str = 'area', placement_strategy: str = 'best_area_fit') -> Layout:
+        """Computes an atlas layout from image dimensions only (no pixels involved)
+        
+        Args:
+            entries: List of tuples (filename, width, height)
+            sort_strategy: Sort strategy (area, height, width, etc.)
+            placement_strategy: Placement strategy (see PACKER_FAMILIES)
+            
+        Returns:
+            Layout: See compute_layout
+        """
+        if not entries:
+            return Layout()
+        
+        sorted_entries = self._sort_images(entries, sort_strategy)
+        self.layouts_evaluated += 1
+        return compute_layout(sorted_entries, self.max_atlas_size, self.max_atlas_size,
+                              self.padding, placement_strategy, self.packer_engine, self.atlas_snap,
+                              self.allow_rotation, self.block_align)
+    
+    def composite_atlas(self, images: List[Tuple[str, Image.Image]], placements: Dict[str, Dict[str, int]],
+                        atlas_width: int, atlas_height: int) -> Image.Image:
+        """Pastes the images of a layout into a new atlas
+        
+        Args:
+            images: List of tuples (filename, Image), may contain images absent from the layout
+            placements: Pixel placements (see Layout.placements)
+            atlas_width: Atlas width
+            atlas_height: Atlas height
+        """
+        atlas = Image.new('RGBA', (atlas_width, atlas_height), (0, 0, 0, 0))
+        
+        for filename, img in images:
+            placement = placements.get(filename)
+            if placement is not None:
+                if placement.get('rotated'):
+                    # Stored turned 90 degrees clockwise (see Layout)
+                    img = img.transpose(Image.Transpose.ROTATE_270)
+                atlas.paste(img, (placement['x'], placement['y']))
+        
+        return atlas
+    
+    def pack_images_in_atlas(self, images: List[Tuple[str, Image.Image]], sort_strategy: str = 'area', placement_strategy: str = 'best_area_fit') -> Tuple[Image.Image, Dict[str, Dict[str, float]]]:
+        """Packs images into an atlas using an optimized algorithm
+        
+        Args:
+            images: List of tuples (filename, Image)
+            sort_strategy: Sort strategy (area, height, width, etc.)
+            placement_strategy: Placement strategy (best_area_fit, best_short_side_fit, best_long_side_fit, bottom_left, contact_point,
+                                or a skyline_* / guillotine_* strategy, see PACKER_FAMILIES)
+        
+        With allow_rotation, images may be turned by 90 degrees in the atlas ('rotated' in their UVs).
+        """
+        if not images:
+            return None, {}
+        
+        entries = [(filename, img.size[0], img.size[1]) for filename, img in images]
+        layout = self.pack_layout(entries, sort_strategy, placement_strategy)
+        
+        if not layout:
+            return None, {}
+        
+        atlas = self.composite_atlas(images, layout.placements(), layout.width, layout.height)
+        return atlas, layout.uv()
+    
+    def evaluate_atlas_configuration(self, atlas_list: List[Dict]) -> Dict[str, Any]:
+        """Evaluates the quality of an atlas configuration
+        
+        Returns:
+            dict: Score with number of atlases, total size and efficiency
+        """
+        total_atlas_area = sum(a['width'] * a['height'] for a in atlas_list)
+        total_image_area = sum(a['layout'].image_area for a in atlas_list)
+        
+        # Space reserved for padding (padding * 2 per image on each axis), precomputed by the layout
+        total_padding_area = sum(a['layout'].padded_area for a in atlas_list) - total_image_area
+        
+        # Efficiency = images surface + padding / total surface
+        # Padding is necessary so we count it as "used"
+        used_area = total_image_area + total_padding_area
+        efficiency = (used_area / total_atlas_area * 100) if total_atlas_area > 0 else 0
+        
+        return {
+            'num_atlases': len(atlas_list),
+            'total_area': total_atlas_area,
+            'image_area': total_image_area,
+            'efficiency': efficiency,
+            'wasted_area': total_atlas_area - used_area
+        }
+    
+    def test_packing_configuration(self, images: List[Tuple[str, Image.Image]], 
+                                   atlas_size: int, sort_strategy: str, 
+                                   reoptimize_each_atlas: bool = True) -> List[Dict]:
+        """Tests a specific packing configuration
+        
+        Args:
+            images: Images to pack
+            atlas_size: Max atlas size
+            sort_strategy: Sort strategy
+            reoptimize_each_atlas: If True, re-optimize sorting for each new atlas
         
         Returns:
             list: List of atlases generated for this configuration
@@ -461,244 +2128,361 @@ class AtlasGenerator:
         # Restore original size
         self.max_atlas_size = original_size
         
-        return atlases
+        return atlases
+    
+    @staticmethod
+    def _score_layout(layout: Layout) -> Dict[str, Any]:
+        """Scores a single atlas layout from its precomputed areas"""
+        atlas_area = layout.atlas_area
+        efficiency = (layout.image_area / atlas_area * 100) if atlas_area > 0 else 0
+        
+        return {
+            'num_images': len(layout),
+            'efficiency': efficiency,
+            'total_area': atlas_area,
+            'image_area': layout.image_area
+        }
+    
+    @staticmethod
+    def _is_better_score(score: Dict[str, Any], best_score: Dict[str, Any]) -> bool:
+        """More images first, then smaller atlas, then higher efficiency"""
+        if best_score is None:
+            return True
+        if score['num_images'] > best_score['num_images']:
+            return True
+        if score['num_images'] == best_score['num_images']:
+            if score['total_area'] < best_score['total_area']:
+                return True
+            if score['total_area'] == best_score['total_area']:
+                return score['efficiency'] > best_score['efficiency']
+        return False
+    
+    def _search_atlas_sizes(self) -> List[Tuple[int, int]]:
+        """Atlas (width, height) tried by the layout search, the max_atlas_size square first
+        
+        Squares come first in decreasing size, then the rectangular shapes by decreasing area.
+        Sides are powers of two with the pow2 snapping and multiples of 4 with multiple_of_4.
+        """
+        max_side = self.max_atlas_size
+        if self.atlas_snap == 'pow2':
+            max_side = 1 << (max_side.bit_length() - 1)
+            sides = [max_side, max_side // 2]
+        else:
+            sides = [max_side, max_side * 3 // 4, max_side // 2]
+            if self.atlas_snap == 'multiple_of_4':
+                sides = [side // 4 * 4 for side in sides]
+        
+        sizes = [(side, side) for side in sides]
+        if self.atlas_shapes == 'rectangular':
+            sides.append(max_side // 4 // 4 * 4 if self.atlas_snap == 'multiple_of_4' else max_side // 4)
+            rectangles = [(width, height) for width in sides for height in sides if width != height]
+            sizes += sorted(rectangles, key=lambda size: -size[0] * size[1])
+        return [size for size in sizes if min(size) > 0]
     
-    def find_best_single_atlas(self, images: List[Tuple[str, Image.Image]], use_random: bool = True, permutations_per_config: int = 5) -> Dict[str, Any]:
-        """Finds the best configuration to generate A SINGLE atlas with the given images
+    @staticmethod
+    def _size_label(width: int, height: int) -> str:
+        """Atlas size as shown in logs and search history keys: 2048 or 2048x1024"""
+        return str(width) if width == height else f"{width}x{height}"
+    
+    def _search_placement_strategies(self) -> List[str]:
+        """Placement strategies tried by the layout search, from the selected packer families"""
+        return [strategy for family in self.packers for strategy in PACKER_FAMILIES[family]]
+    
+    @staticmethod
+    def _config_key(atlas_size: str, placement_strategy: str, sort_label: str) -> str:
+        """Key of a search configuration in the search history"""
+        return f"{atlas_size}/{placement_strategy}/{sort_label}"
+    
+    def search_single_atlas(self, entries: List[Tuple[str, int, int]], use_random: bool = True, permutations_per_config: int = 5) -> Dict[str, Any]:
+        """Finds the best layout for A SINGLE atlas, working on image dimensions only
+        
+        Candidates are tried by decreasing number of wins in the search history. Ties between
+        equal scores go to the candidate coming first in the fixed grid order, so a full search
+        returns the same layout whatever the history. With time_budget or max_evaluations the
+        search stops once the budget is spent and returns the best layout found so far.
         
         Args:
-            images: Images to pack
+            entries: Images to pack as (filename, width, height)
             use_random: Also use random permutations
             permutations_per_config: Number of random permutations per configuration
             
         Returns:
-            dict: Best atlas with its configuration or None
+            dict: Best Layout ('layout') with its configuration (no atlas image, no UV coordinates) or None
         """
-        if not images:
+        if not entries:
             return None
         
+        # Configurations to test
+        atlas_sizes = self._search_atlas_sizes()
+        sort_strategies = SEARCH_SORT_STRATEGIES
+        placement_strategies = self._search_placement_strategies()
+        
         # Check if images are too large to fit in an atlas
-        max_img_width = max(img.size[0] for _, img in images)
-        max_img_height = max(img.size[1] for _, img in images)
+        max_img_width = max(width for _, width, _ in entries)
+        max_img_height = max(height for _, _, height in entries)
         
-        if max_img_width + self.padding * 2 > 2048 or max_img_height + self.padding * 2 > 2048:
+        max_width, max_height = atlas_sizes[0]
+        if max_img_width + self.padding * 2 > max_width or max_img_height + self.padding * 2 > max_height:
             print(f"  ⚠️ Images too large (max: {max_img_width}x{max_img_height}), impossible to pack")
             return None
         
-        import random
-        
-        # Configurations to test
-        atlas_sizes = [2048, 1536, 1024]
-        sort_strategies = ['area', 'height', 'width', 'perimeter', 'max_side', 
-                          'min_side', 'ratio', 'ratio_inv', 'diagonal', 
-                          'height_asc', 'width_asc', 'pathological']
-        placement_strategies = ['best_area_fit', 'best_short_side_fit', 'best_long_side_fit', 
-                               'bottom_left', 'contact_point']
-        
-        best_result = None
-        best_score = None
-        
-        configs_tested = 0
-        
-        # Test all combinations placement × sort
-        for atlas_size in atlas_sizes:
-            for placement_strategy in placement_strategies:
-                for sort_strategy in sort_strategies:
-                    # For each config, test deterministic order
-                    configs_tested += 1
-                    
-                    original_size = self.max_atlas_size
-                    self.max_atlas_size = atlas_size
-                    
-                    atlas, uv_coords = self.pack_images_in_atlas(images, sort_strategy, placement_strategy)
-                    
-                    self.max_atlas_size = original_size
-                    
-                    if atlas and uv_coords:
-                        atlas_area = atlas.width * atlas.height
-                        image_area = sum(uv['width'] * uv['height'] for uv in uv_coords.values())
-                        efficiency = (image_area / atlas_area * 100) if atlas_area > 0 else 0
-                        num_images = len(uv_coords)
-                        
-                        score = {
-                            'num_images': num_images,
-                            'efficiency': efficiency,
-                            'total_area': atlas_area,
-                            'image_area': image_area
-                        }
-                        
-                        is_better = False
-                        if best_score is None:
-                            is_better = True
-                        elif score['num_images'] > best_score['num_images']:
-                            is_better = True
-                        elif score['num_images'] == best_score['num_images']:
-                            if score['total_area'] < best_score['total_area']:
-                                is_better = True
-                            elif score['total_area'] == best_score['total_area']:
-                                if score['efficiency'] > best_score['efficiency']:
-                                    is_better = True
-                        
-                        if is_better:
-                            best_result = {
-                                'atlas': atlas,
-                                'uv': uv_coords,
-                                'width': atlas.width,
-                                'height': atlas.height,
-                                'count': num_images,
-                                'atlas_size': atlas_size,
-                                'sort_strategy': sort_strategy,
-                                'placement_strategy': placement_strategy,
-                                'score': score
-                            }
-                            best_score = score
-                
-                # Permutations for this combination placement + sort (limited to avoid explosion)
-                if permutations_per_config > 0:
-                    for perm_idx in range(min(2, permutations_per_config)):  # Only 2 permutations per combo
+        def grid_candidates():
+            """Deterministic candidate list, in the order used for tie-breaking"""
+            configs_tested = 0
+            candidates = []
+            
+            # Test all combinations placement × sort
+            for atlas_size in atlas_sizes:
+                for placement_strategy in placement_strategies:
+                    for sort_strategy in sort_strategies:
+                        # For each config, test deterministic order
                         configs_tested += 1
-                        
-                        sorted_images = self._sort_images(images, sort_strategy)
-                        block_size = max(3, len(sorted_images) // 10)
-                        shuffled_images = sorted_images.copy()
-                        random.seed(atlas_size + configs_tested + perm_idx * 1000)
-                        
-                        for i in range(0, len(shuffled_images) - block_size, block_size // 2):
-                            block = shuffled_images[i:i + block_size]
-                            random.shuffle(block)
-                            shuffled_images[i:i + block_size] = block
-                        
-                        original_size = self.max_atlas_size
-                        self.max_atlas_size = atlas_size
-                        
-                        atlas, uv_coords = self.pack_images_in_atlas(shuffled_images, 'none', placement_strategy)
-                        
-                        self.max_atlas_size = original_size
-                        
-                        if not atlas or not uv_coords:
-                            continue
-                        
-                        atlas_area = atlas.width * atlas.height
-                        image_area = sum(uv['width'] * uv['height'] for uv in uv_coords.values())
-                        efficiency = (image_area / atlas_area * 100) if atlas_area > 0 else 0
-                        num_images = len(uv_coords)
-                        
-                        score = {
-                            'num_images': num_images,
-                            'efficiency': efficiency,
-                            'total_area': atlas_area,
-                            'image_area': image_area
-                        }
-                        
-                        is_better = False
-                        if score['num_images'] > best_score['num_images']:
-                            is_better = True
-                        elif score['num_images'] == best_score['num_images']:
-                            if score['total_area'] < best_score['total_area']:
-                                is_better = True
-                            elif score['total_area'] == best_score['total_area']:
-                                if score['efficiency'] > best_score['efficiency']:
-                                    is_better = True
-                        
-                        if is_better:
-                            best_result = {
-                                'atlas': atlas,
-                                'uv': uv_coords,
-                                'width': atlas.width,
-                                'height': atlas.height,
-                                'count': num_images,
-                                'atlas_size': atlas_size,
-                                'sort_strategy': f'{sort_strategy}_perm{perm_idx}',
-                                'placement_strategy': placement_strategy,
-                                'score': score
-                            }
-                            best_score = score
+                        candidates.append((len(candidates), self._sort_images(entries, sort_strategy), atlas_size,
+                                           sort_strategy, placement_strategy))
+                    
+                    # Permutations for this combination placement + sort (limited to avoid explosion)
+                    if permutations_per_config > 0:
+                        for perm_idx in range(min(2, permutations_per_config)):  # Only 2 permutations per combo
+                            configs_tested += 1
+                            
+                            sorted_entries = self._sort_images(entries, sort_strategy)
+                            block_size = max(3, len(sorted_entries) // 10)
+                            shuffled_entries = sorted_entries.copy()
+                            random.seed(atlas_size[0] + configs_tested + perm_idx * 1000)
+                            
+                            for i in range(0, len(shuffled_entries) - block_size, block_size // 2):
+                                block = shuffled_entries[i:i + block_size]
+                                random.shuffle(block)
+                                shuffled_entries[i:i + block_size] = block
+                            
+                            candidates.append((len(candidates), shuffled_entries, atlas_size,
+                                               f'{sort_strategy}_perm{perm_idx}', placement_strategy))
+            
+            # Most successful configurations first (stable sort, grid order among equals)
+            if self.search_history:
+                candidates.sort(key=lambda c: -self.search_history.get(self._config_key(self._size_label(*c[2]), c[4], c[3]), 0))
+            return candidates
         
-        # Additional global random search
-        if use_random and best_result:
-            best_atlas_size = best_result['atlas_size']
-            best_placement = best_result.get('placement_strategy', 'best_area_fit')
-            num_random_tests = 10
+        best_layout = None
+        best_config = None
+        best_score = None
+        best_index = None
+        best_order = None
+        candidates_evaluated = 0
+        budget_exhausted = False
+        search_start = time.perf_counter()
+        has_budget = self.time_budget is not None or self.max_evaluations is not None
+        
+        def out_of_budget():
+            if self.max_evaluations is not None and candidates_evaluated >= self.max_evaluations:
+                return True
+            return self.time_budget is not None and time.perf_counter() - search_start >= self.time_budget
+        
+        def evaluate(candidates):
+            """Packs candidates (possibly in parallel) and keeps the best, lowest index wins ties
             
-            for i in range(num_random_tests):
-                random_images = images.copy()
-                random.seed(i + 5000)
-                random.shuffle(random_images)
-                
-                original_size = self.max_atlas_size
-                self.max_atlas_size = best_atlas_size
+            With a budget, candidates go by small batches and the search stops once the budget
+            is spent, as soon as a valid layout has been found.
+            """
+            nonlocal best_layout, best_config, best_score, best_index, best_order, candidates_evaluated, budget_exhausted
+            batch_size = len(candidates)
+            if has_budget:
+                batch_size = self.workers * 2 if self.workers > 1 else 1
+            
+            position = 0
+            while position < len(candidates):
+                if has_budget and best_layout is not None and out_of_budget():
+                    budget_exhausted = True
+                    return
+                batch = candidates[position:position + batch_size]
+                position += len(batch)
+                candidates_evaluated += len(batch)
                 
-                atlas, uv_coords = self.pack_images_in_atlas(random_images, 'none', best_placement)
+                tasks = [(ordered, atlas_size[0], atlas_size[1], self.padding, placement_strategy, self.packer_engine, self.atlas_snap,
+                          self.allow_rotation, self.block_align)
+                         for _, ordered, atlas_size, _, placement_strategy in batch]
+                for (index, ordered, atlas_size, sort_label, placement_strategy), layout in zip(batch, self._map_layouts(tasks)):
+                    if not layout:
+                        continue
+                    score = self._score_layout(layout)
+                    better = self._is_better_score(score, best_score)
+                    if not better and not self._is_better_score(best_score, score):
+                        better = index < best_index
+                    if better:
+                        best_layout = layout
+                        best_config = (atlas_size, sort_label, placement_strategy)
+                        best_score = score
+                        best_index = index
+                        best_order = ordered
+        
+        def anneal():
+            """Simulated annealing over insertion order and placement strategy, from the best layout
+            
+            Each step packs ANNEALING_NEIGHBOURS moves (swap two images, move one image, or change
+            the placement strategy) and considers the best of them. It replaces the current state
+            when better, or with the Metropolis probability otherwise; only strictly better layouts
+            replace the best one.
+            """
+            nonlocal best_layout, best_config, best_score, best_order, candidates_evaluated, budget_exhausted
+            rng = random.Random(self.search_seed)
+            atlas_size, _, placement = best_config
+            max_area = atlas_size[0] * atlas_size[1]
+            
+            def value(score):
+                # Images first, then the smaller atlas (fraction of the max atlas area, below 1)
+                return score['num_images'] - score['total_area'] / max_area
+            
+            def neighbour(order, placement_strategy):
+                order = order[:]
+                move = rng.random()
+                if len(order) < 2 or move >= 0.9:
+                    placement_strategy = rng.choice(placement_strategies)
+                elif move < 0.45:
+                    i, j = rng.randrange(len(order)), rng.randrange(len(order))
+                    order[i], order[j] = order[j], order[i]
+                else:
+                    order.insert(rng.randrange(len(order)), order.pop(rng.randrange(len(order))))
+                return order, placement_strategy
+            
+            current_order, current_placement, current_score = best_order, placement, best_score
+            start_temperature, end_temperature = ANNEALING_TEMPERATURES
+            steps = self.annealing_steps
+            
+            for step in range(steps):
+                if has_budget and out_of_budget():
+                    budget_exhausted = True
+                    return
+                temperature = start_temperature * (end_temperature / start_temperature) ** (step / max(1, steps - 1))
                 
-                self.max_atlas_size = original_size
+                moves = [neighbour(current_order, current_placement) for _ in range(ANNEALING_NEIGHBOURS)]
+                tasks = [(order, atlas_size[0], atlas_size[1], self.padding, placement_strategy, self.packer_engine, self.atlas_snap,
+                          self.allow_rotation, self.block_align)
+                         for order, placement_strategy in moves]
+                candidates_evaluated += len(tasks)
                 
-                if not atlas or not uv_coords:
+                step_best = None
+                for (order, placement_strategy), layout in zip(moves, self._map_layouts(tasks)):
+                    if not layout:
+                        continue
+                    score = self._score_layout(layout)
+                    if step_best is None or self._is_better_score(score, step_best[2]):
+                        step_best = (order, placement_strategy, score, layout)
+                if step_best is None:
                     continue
                 
-                atlas_area = atlas.width * atlas.height
-                image_area = sum(uv['width'] * uv['height'] for uv in uv_coords.values())
-                efficiency = (image_area / atlas_area * 100) if atlas_area > 0 else 0
-                num_images = len(uv_coords)
+                order, placement_strategy, score, layout = step_best
+                delta = value(score) - value(current_score)
+                if delta >= 0 or rng.random() < math.exp(delta / temperature):
+                    current_order, current_placement, current_score = order, placement_strategy, score
                 
-                score = {
-                    'num_images': num_images,
-                    'efficiency': efficiency,
-                    'total_area': atlas_area,
-                    'image_area': image_area
-                }
-                
-                is_better = False
-                if score['num_images'] > best_score['num_images']:
-                    is_better = True
-                elif score['num_images'] == best_score['num_images']:
-                    if score['total_area'] < best_score['total_area']:
-                        is_better = True
-                    elif score['total_area'] == best_score['total_area']:
-                        if score['efficiency'] > best_score['efficiency']:
-                            is_better = True
-                
-                if is_better:
-                    best_result = {
-                        'atlas': atlas,
-                        'uv': uv_coords,
-                        'width': atlas.width,
-                        'height': atlas.height,
-                        'count': num_images,
-                        'atlas_size': best_atlas_size,
-                        'sort_strategy': f'random_{i}',
-                        'placement_strategy': best_placement,
-                        'score': score
-                    }
+                if self._is_better_score(score, best_score):
+                    best_layout = layout
+                    best_config = (atlas_size, f'anneal_{step}', placement_strategy)
                     best_score = score
+                    best_order = order
+        
+        grid = grid_candidates()
+        evaluate(grid)
+        
+        if use_random and best_layout and not budget_exhausted and self.local_search == 'annealing':
+            anneal()
+        
+        # Additional global random search
+        elif use_random and best_layout and not budget_exhausted:
+            best_atlas_size = best_config[0]
+            best_placement = best_config[2]
+            num_random_tests = 10
+            
+            random_candidates = []
+            for i in range(num_random_tests):
+                random_entries = entries.copy()
+                random.seed(i + 5000)
+                random.shuffle(random_entries)
+                random_candidates.append((len(grid) + i, random_entries, best_atlas_size, f'random_{i}', best_placement))
+            
+            evaluate(random_candidates)
+        
+        if best_layout is None:
+            return None
+        
+        if budget_exhausted:
+            print(f"  ⏱️ Search budget reached after {candidates_evaluated} candidates, keeping the best layout so far")
+        
+        atlas_size, sort_label, placement_strategy = best_config
+        return {
+            'layout': best_layout,
+            'width': best_layout.width,
+            'height': best_layout.height,
+            'count': len(best_layout),
+            'atlas_size': self._size_label(*atlas_size),
+            'sort_strategy': sort_label,
+            'placement_strategy': placement_strategy,
+            'score': best_score,
+            'candidates': candidates_evaluated,
+            'budget_exhausted': budget_exhausted
+        }
+    
+    def find_best_single_atlas(self, images: List[Tuple[str, Image.Image]], use_random: bool = True, permutations_per_config: int = 5) -> Dict[str, Any]:
+        """Finds the best configuration to generate A SINGLE atlas with the given images
+        
+        The search only works on dimensions, pixels are composited once for the winning layout.
+        
+        Args:
+            images: Images to pack
+            use_random: Also use random permutations
+            permutations_per_config: Number of random permutations per configuration
+            
+        Returns:
+            dict: Best atlas with its configuration or None
+        """
+        if not images:
+            return None
+        
+        entries = [(filename, img.size[0], img.size[1]) for filename, img in images]
+        best_result = self.search_single_atlas(entries, use_random, permutations_per_config)
+        
+        if best_result:
+            best_result['atlas'] = self.composite_atlas(images, best_result['layout'].placements(),
+                                                        best_result['width'], best_result['height'])
+            best_result['uv'] = best_result['layout'].uv()
         
         return best_result
     
-    def find_best_packing(self, images: List[Tuple[str, Image.Image]], use_advanced_search: bool = True) -> Dict[str, Any]:
-        """Tests multiple configurations and returns the best one
+    def search_packing(self, entries: List[Tuple[str, int, int]], use_advanced_search: bool = True) -> Dict[str, Any]:
+        """Finds the layouts of all atlases needed for the given image dimensions
+        
+        Atlases are filled one at a time. In the global packing mode, _global_packing then tries
+        to pack all images into fewer atlases (or the same number with less area) and its
+        layouts replace the greedy ones when they do better.
         
         Args:
-            images: List of images to pack
+            entries: Images to pack as (filename, width, height)
             use_advanced_search: Enable advanced search with random permutations
         
         Returns:
-            dict: Best configuration with all generated atlases
+            dict: Best configuration with all atlas layouts (no atlas images)
         """
         print("\n🔍 Adaptive generation: re-optimization for each atlas...")        
+        search_start = time.perf_counter()
+        layouts_before = self.layouts_evaluated
+        cache_hits_before = self.layout_cache.hits if self.layout_cache is not None else 0
         atlases = []
-        remaining_images = images.copy()
+        remaining_entries = entries.copy()
         atlas_index = 0
         
-        while remaining_images:
-            print(f"\n  Atlas #{atlas_index + 1}: {len(remaining_images)} remaining images")
+        while remaining_entries:
+            print(f"\n  Atlas #{atlas_index + 1}: {len(remaining_entries)} remaining images")
             
             # Find best config for ONE atlas with remaining images
-            best_atlas = self.find_best_single_atlas(remaining_images, use_random=use_advanced_search)
+            atlas_start = time.perf_counter()
+            best_atlas = self.search_single_atlas(remaining_entries, use_random=use_advanced_search)
             
             if not best_atlas:
                 print("  ⚠️ Impossible to generate atlas with remaining images")
                 break
             
             # Add this atlas
+            best_atlas['search_seconds'] = time.perf_counter() - atlas_start
             atlases.append(best_atlas)
             
             print(f"  ✅ Config: size={best_atlas['atlas_size']}, placement={best_atlas.get('placement_strategy', 'N/A')}, sort={best_atlas['sort_strategy']}")
@@ -706,9 +2490,9 @@ class AtlasGenerator:
                   f"{best_atlas['score']['efficiency']:.1f}% efficiency")
             
             # Remove placed images
-            processed_filenames = set(best_atlas['uv'].keys())
-            remaining_images = [(name, img) for name, img in remaining_images 
-                              if name not in processed_filenames]
+            processed_filenames = set(best_atlas['layout'].names)
+            remaining_entries = [entry for entry in remaining_entries 
+                                 if entry[0] not in processed_filenames]
             
             atlas_index += 1
             
@@ -717,94 +2501,570 @@ class AtlasGenerator:
                 print("  ⚠️ Limit of 100 atlases reached")
                 break
         
+        max_width, max_height = self._search_atlas_sizes()[0]
+        lower_bound = packing_lower_bound(entries, max_width, max_height, self.padding,
+                                          self.allow_rotation, self.block_align) if entries else 0
+        
+        if self.packing_mode == 'global' and len(atlases) > 1:
+            global_atlases = self._global_packing(entries, len(atlases), lower_bound, use_advanced_search)
+            greedy_placed = sum(a['count'] for a in atlases)
+            greedy_key = (-greedy_placed, len(atlases), sum(a['width'] * a['height'] for a in atlases))
+            if global_atlases:
+                global_key = (-len(entries), len(global_atlases), sum(a['width'] * a['height'] for a in global_atlases))
+                if global_key < greedy_key:
+                    print(f"  🌐 Global packing: {len(atlases)} → {len(global_atlases)} atlases, "
+                          f"{greedy_key[2]} → {global_key[2]}px²")
+                    atlases = global_atlases
+                else:
+                    print("  🌐 Global packing does not beat the atlas by atlas packing")
+        
         # Calculate global score
         total_atlas_area = sum(a['width'] * a['height'] for a in atlases)
-        total_image_area = sum(
-            sum(uv['width'] * uv['height'] for uv in a['uv'].values())
-            for a in atlases
-        )
+        total_image_area = sum(a['layout'].image_area for a in atlases)
         efficiency = (total_image_area / total_atlas_area * 100) if total_atlas_area > 0 else 0
         
         result = {
             'atlases': atlases,
-            'atlas_size': atlases[0]['atlas_size'] if atlases else self.max_atlas_size,
+            'atlas_size': atlases[0]['atlas_size'] if atlases else self._size_label(max_width, max_height),
             'sort_strategy': 'adaptive',
             'score': {
                 'num_atlases': len(atlases),
                 'total_area': total_atlas_area,
                 'image_area': total_image_area,
                 'efficiency': efficiency,
-                'wasted_area': total_atlas_area - total_image_area
-            }
+                'wasted_area': total_atlas_area - total_image_area,
+                'lower_bound': lower_bound
+            },
+            'seconds': time.perf_counter() - search_start,
+            'layouts_evaluated': self.layouts_evaluated - layouts_before,
+            'layout_cache_hits': (self.layout_cache.hits if self.layout_cache is not None else 0) - cache_hits_before
         }
         
-        print(f"\n✅ Final result (adaptive):")
-        print(f"   → {len(atlases)} atlases, {efficiency:.1f}% efficiency, "
+        print(f"\n✅ Final result ({'global' if self.packing_mode == 'global' else 'adaptive'}):")
+        print(f"   → {len(atlases)} atlases (lower bound {lower_bound}), {efficiency:.1f}% efficiency, "
               f"{result['score']['wasted_area']:.0f}px² wasted")
         
         return result
     
+    def _global_packing(self, entries: List[Tuple[str, int, int]], greedy_count: int, lower_bound: int,
+                        use_advanced_search: bool = True) -> List[Dict]:
+        """Packs all images into as few atlases as possible at once
+        
+        From the lower bound up to the greedy atlas count, every sort × placement configuration
+        is packed into that many atlases with compute_multi_bin_layout; the first count some
+        configuration manages wins, the configuration with the smallest total area among them.
+        Each atlas is then compacted by search_single_atlas on its own images.
+        
+        Args:
+            entries: Images to pack as (filename, width, height)
+            greedy_count: Atlases used by the atlas by atlas packing
+            lower_bound: See packing_lower_bound
+            use_advanced_search: Enable random permutations when compacting each atlas
+        
+        Returns:
+            list: Atlas layouts (see search_single_atlas), or None if no configuration fits
+        """
+        max_width, max_height = self._search_atlas_sizes()[0]
+        grid = [(sort_strategy, placement_strategy)
+                for placement_strategy in self._search_placement_strategies()
+                for sort_strategy in SEARCH_SORT_STRATEGIES]
+        sorted_entries = {sort_strategy: self._sort_images(entries, sort_strategy) for sort_strategy in SEARCH_SORT_STRATEGIES}
+        
+        best = None
+        for bin_count in range(max(1, lower_bound), greedy_count + 1):
+            tasks = [(sorted_entries[sort_strategy], bin_count, max_width, max_height, self.padding,
+                      placement_strategy, self.packer_engine, self.atlas_snap, self.allow_rotation,
+                      self.block_align)
+                     for sort_strategy, placement_strategy in grid]
+            for config, layouts in zip(grid, self._map_layouts(tasks, _compute_multi_bin_task)):
+                if layouts is None:
+                    continue
+                key = (len(layouts), sum(layout.atlas_area for layout in layouts))
+                if best is None or key < best[0]:
+                    best = (key, config, layouts)
+            if best is not None:
+                break
+        
+        if best is None:
+            return None
+        
+        (bin_count, _), (sort_strategy, placement_strategy), layouts = best
+        print(f"  🌐 {bin_count} atlases possible at once with {placement_strategy}/{sort_strategy} "
+              f"(greedy: {greedy_count}, lower bound: {lower_bound})")
+        
+        atlases = []
+        for layout in layouts:
+            atlas_start = time.perf_counter()
+            names = set(layout.names)
+            bin_entries = [entry for entry in entries if entry[0] in names]
+            atlas_info = self.search_single_atlas(bin_entries, use_random=use_advanced_search)
+            if atlas_info is None or atlas_info['count'] < len(bin_entries):
+                # The search found no layout holding all these images, keep the multi-atlas one
+                atlas_info = {
+                    'layout': layout,
+                    'width': layout.width,
+                    'height': layout.height,
+                    'count': len(layout),
+                    'atlas_size': self._size_label(max_width, max_height),
+                    'sort_strategy': f'global_{sort_strategy}',
+                    'placement_strategy': placement_strategy,
+                    'score': self._score_layout(layout),
+                    'candidates': 0,
+                    'budget_exhausted': False
+                }
+            atlas_info['search_seconds'] = time.perf_counter() - atlas_start
+            atlases.append(atlas_info)
+        
+        return atlases
+    
+    def find_best_packing(self, images: List[Tuple[str, Image.Image]], use_advanced_search: bool = True) -> Dict[str, Any]:
+        """Tests multiple configurations and returns the best one
+        
+        Args:
+            images: List of images to pack
+            use_advanced_search: Enable advanced search with random permutations
+        
+        Returns:
+            dict: Best configuration with all generated atlases
+        """
+        entries = [(filename, img.size[0], img.size[1]) for filename, img in images]
+        result = self.search_packing(entries, use_advanced_search)
+        
+        # Composite pixels only for the chosen layouts
+        for atlas_info in result['atlases']:
+            atlas_info['atlas'] = self.composite_atlas(images, atlas_info['layout'].placements(),
+                                                       atlas_info['width'], atlas_info['height'])
+            atlas_info['uv'] = atlas_info['layout'].uv()
+        
+        return result
+    
+    def individual_atlas_layout(self, filename: str, img_width: int, img_height: int) -> Dict[str, Any]:
+        """Layout of an atlas holding a single image (fallback), without pixels
+        
+        The image is shrunk if necessary to fit within max_atlas_size with its padding, and the
+        atlas dimensions follow atlas_snap.
+        
+        Returns:
+            dict: Atlas info with 'layout' (Layout), 'width', 'height', 'uv' and 'count'
+        """
+        # Calculate max image size accounting for padding
+        max_width, max_height = self._search_atlas_sizes()[0]
+        max_image_width = max_width - self.padding * 2
+        max_image_height = max_height - self.padding * 2
+        
+        # Check if image exceeds max size and shrink it if necessary
+        if img_width > max_image_width or img_height > max_image_height:
+            ratio = min(max_image_width / img_width, max_image_height / img_height)
+            img_width = int(img_width * ratio)
+            img_height = int(img_height * ratio)
+        
+        # Atlas with padding (now guaranteed <= max_atlas_size)
+        atlas_width, atlas_height = snap_atlas_size(img_width + self.padding * 2, img_height + self.padding * 2,
+                                                    self.atlas_snap, max_width, max_height)
+        
+        # UV coordinates (image occupies entire atlas except padding and snapping margins)
+        uv_coords = {
+            filename: {
+                'x': self.padding,
+                'y': self.padding,
+                'width': img_width,
+                'height': img_height
+            }
+        }
+        
+        # Calculate normalized UV coordinates
+        uv_coords[filename]['rect_x'] = self.padding / atlas_width
+        uv_coords[filename]['rect_y'] = 1.0 - (self.padding + img_height) / atlas_height
+        uv_coords[filename]['rect_width'] = img_width / atlas_width
+        uv_coords[filename]['rect_height'] = img_height / atlas_height
+        
+        padded_area = (img_width + self.padding * 2) * (img_height + self.padding * 2)
+        return {
+            'layout': Layout([filename], array('i', (self.padding, self.padding, img_width, img_height)),
+                             atlas_width, atlas_height, img_width * img_height, padded_area),
+            'width': atlas_width,
+            'height': atlas_height,
+            'uv': uv_coords,
+            'count': 1
+        }
+    
     def create_individual_atlases(self, images: List[Tuple[str, Image.Image]]) -> List[Dict]:
         """Creates a separate atlas for each image (fallback)
         
         Each image is resized if necessary to fit within max_atlas_size
         
+        Args:
+            images: List of tuples (filename, Image)
+            
         Returns:
             list: List of generated atlases (one per image)
         """
         atlases = []
         
         for filename, img in images:
-            img_width, img_height = img.size
+            atlas_info = self.individual_atlas_layout(filename, img.width, img.height)
+            placement = atlas_info['layout'].placements()[filename]
             
-            # Calculate max image size accounting for padding
-            max_image_width = self.max_atlas_size - self.padding * 2
-            max_image_height = self.max_atlas_size - self.padding * 2
+            if img.size != (placement['width'], placement['height']):
+                img = img.resize((placement['width'], placement['height']), Image.Resampling.LANCZOS)
             
-            # Check if image exceeds max size and resize if necessary
-            if img_width > max_image_width or img_height > max_image_height:
-                ratio = min(max_image_width / img_width, max_image_height / img_height)
-                new_width = int(img_width * ratio)
-                new_height = int(img_height * ratio)
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                img_width, img_height = new_width, new_height
+            # Place image at center with padding
+            atlas = Image.new('RGBA', (atlas_info['width'], atlas_info['height']), (0, 0, 0, 0))
+            atlas.paste(img, (placement['x'], placement['y']))
+            
+            atlas_info['atlas'] = atlas
+            atlases.append(atlas_info)
+        
+        return atlases
+    
+    def _build_config(self, scale_factors: List[int]) -> Dict[str, Any]:
+        """Parameters that invalidate the build cache when they change"""
+        return {
+            'max_atlas_size': self.max_atlas_size,
+            'max_image_size': self.max_image_size,
+            'padding': self.padding,
+            'scale_factors': scale_factors,
+            'mip_mode': self.mip_mode,
+            'png_compress_level': self.png_compress_level,
+            'draft_decode': self.draft_decode,
+            'packers': list(self.packers),
+            'packing_mode': self.packing_mode,
+            'atlas_shapes': self.atlas_shapes,
+            'atlas_snap': self.atlas_snap,
+            'allow_rotation': self.allow_rotation,
+            'trim_alpha': self.trim_alpha,
+            'dedup': self.dedup,
+            'block_formats': list(self.block_formats)
+        }
+    
+    def _load_build_cache(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        """Loads the previous build cache, or None if missing, unreadable or built with another config"""
+        cache_path = os.path.join(self.output_folder, BUILD_CACHE_FILE)
+        if not os.path.exists(cache_path):
+            return None
+        
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except Exception as e:
+            print(f"⚠️ Ignoring build cache {cache_path}: {e}")
+            return None
+        
+        if cache.get('version') != BUILD_CACHE_VERSION or cache.get('config') != config:
+            print("♻️ Build configuration changed, full rebuild")
+            return None
+        
+        return cache
+    
+    def _reusable_atlases(self, build_cache: Dict[str, Any], scale_factor: int, image_sha_map: Dict[str, str]) -> List[Dict]:
+        """Returns the cached atlases of a scale whose images are all unchanged and whose PNG is intact
+        
+        Returns:
+            list: Atlas infos with the cached manifest entry ('reused'), the PNG bytes ('png'), the
+                  DDS bytes by block format ('variants') and 'count'
+        """
+        if not build_cache:
+            return []
+        
+        kept_by_duplicate = {name: kept for kept, names in self.duplicates.items() for name in names}
+        reusable = []
+        for cached in build_cache.get('scales', {}).get(str(scale_factor), []):
+            if any(image_sha_map.get(name) != sha for name, sha in cached['images'].items()):
+                continue
+            # Duplicate groups must be unchanged: no new duplicate of a packed image, no image
+            # now duplicating one of another atlas
+            names = cached['images']
+            if (any(kept_by_duplicate.get(name, name) not in names for name in names) or
+                    any(duplicate not in names for name in names for duplicate in self.duplicates.get(name, ()))):
+                continue
             
-            # Create atlas with padding (now guaranteed <= max_atlas_size)
-            atlas_width = img_width + self.padding * 2
-            atlas_height = img_height + self.padding * 2
-            atlas = Image.new('RGBA', (atlas_width, atlas_height), (0, 0, 0, 0))
+            entry = cached['entry']
+            atlas_path = os.path.join(self.output_folder, entry['file'])
+            if not os.path.exists(atlas_path):
+                continue
+            with open(atlas_path, 'rb') as f:
+                png = f.read()
+            if hashlib.sha256(png).hexdigest() != entry['sha']:
+                continue
+            variants = self._read_variants(entry)
+            if variants is None:
+                continue
             
-            # Place image at center with padding
-            atlas.paste(img, (self.padding, self.padding))
+            reusable.append({'reused': entry, 'png': png, 'variants': variants, 'images': cached['images'],
+                             'count': entry['count']})
+        
+        return reusable
+    
+    @staticmethod
+    def _atlas_files(entry: Dict[str, Any]) -> List[str]:
+        """Files of an atlas manifest entry: the PNG and its block compressed variants"""
+        return [entry['file']] + [variant['file'] for variant in entry.get('formats', {}).values()]
+    
+    def _read_variants(self, entry: Dict[str, Any]) -> Dict[str, bytes]:
+        """DDS bytes by block format of a cached atlas, or None when one is missing or altered"""
+        variants = {}
+        for block_format, variant in entry.get('formats', {}).items():
+            variant_path = os.path.join(self.output_folder, variant['file'])
+            if not os.path.exists(variant_path):
+                return None
+            with open(variant_path, 'rb') as f:
+                data = f.read()
+            if hashlib.sha256(data).hexdigest() != variant['sha']:
+                return None
+            variants[block_format] = data
+        return variants
+    
+    def _write_variants(self, atlas_filename: str, variants: Dict[str, bytes], scale_factor: int) -> Dict[str, Dict]:
+        """Writes the DDS files of an atlas next to its PNG, returning their manifest entries by format"""
+        formats = {}
+        for block_format, data in variants.items():
+            variant_filename = f"{os.path.splitext(atlas_filename)[0]}.{block_format}.dds"
+            with self.stats.phase('write', scale_factor):
+                with open(os.path.join(self.output_folder, variant_filename), 'wb') as f:
+                    f.write(data)
+            self.stats.count('bytes_written', len(data))
+            formats[block_format] = {'file': variant_filename, 'sha': hashlib.sha256(data).hexdigest(), 'size': len(data)}
+        return formats
+    
+    def _load_search_history(self):
+        """Loads the configuration wins of previous builds (SEARCH_HISTORY_FILE), if any"""
+        self.search_history = {}
+        self._search_wins = {}
+        history_path = os.path.join(self.output_folder, SEARCH_HISTORY_FILE)
+        if not os.path.exists(history_path):
+            return
+        
+        try:
+            with open(history_path, 'r', encoding='utf-8') as f:
+                self.search_history = json.load(f).get('wins', {})
+        except Exception as e:
+            print(f"⚠️ Ignoring search history {history_path}: {e}")
+    
+    def _record_search_wins(self, atlases: List[Dict]):
+        """Counts the configurations that won the atlases of a scale level"""
+        for atlas_info in atlases:
+            if atlas_info['sort_strategy'].startswith(('random_', 'anneal_', 'global_')):
+                continue  # Searched orders only exist for the images they were found for
+            key = self._config_key(atlas_info['atlas_size'], atlas_info['placement_strategy'], atlas_info['sort_strategy'])
+            self._search_wins[key] = self._search_wins.get(key, 0) + 1
+    
+    def _save_search_history(self):
+        """Adds the wins of this build to the search history
+        
+        The history used by the searches stays the one loaded at the start of the build, so
+        serial and parallel scale searches try candidates in the same order.
+        """
+        wins = dict(self.search_history)
+        for key, count in self._search_wins.items():
+            wins[key] = wins.get(key, 0) + count
+        
+        with open(os.path.join(self.output_folder, SEARCH_HISTORY_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'wins': dict(sorted(wins.items(), key=lambda item: -item[1]))}, f, indent=2)
+    
+    def _plan_scale(self, scale_factor: int, image_files: List[Tuple[str, Image.Image]],
+                    image_sha_map: Dict[str, str], previous_build: Dict[str, Any]) -> Dict[str, Any]:
+        """Decides which atlases of a scale level are reused and which images must be packed
+        
+        Returns:
+            dict: 'reused' atlases (see _reusable_atlases) and 'entries' to pack as (filename, width, height)
+        """
+        # Atlases of the previous build whose images did not change are kept as is
+        reused_atlases = self._reusable_atlases(previous_build, scale_factor, image_sha_map)
+        reused_filenames = {name for atlas_info in reused_atlases for name in atlas_info['images']}
+        previous_filenames = {name for cached in previous_build['scales'].get(str(scale_factor), [])
+                              for name in cached['images']} if previous_build else set()
+        if reused_atlases and any(filename not in previous_filenames for filename, _ in image_files):
+            # Repack the least filled atlas with the new images rather than adding a nearly empty one
+            # (changed images only repack the atlases they were in)
+            least_filled = min(reversed(reused_atlases), key=lambda a: a['count'])
+            reused_atlases.remove(least_filled)
+            reused_filenames.difference_update(least_filled['images'])
+        
+        # Duplicates are not packed, they share the UV rect of the image they duplicate
+        duplicated = {name for names in self.duplicates.values() for name in names}
+        entries = [(filename,) + self._scaled_size(img.width, img.height, scale_factor)
+                   for filename, img in image_files if filename not in reused_filenames and filename not in duplicated]
+        
+        return {'reused': reused_atlases, 'entries': entries}
+    
+    def _save_scale_atlases(self, scale_factor: int, reused_atlases: List[Dict], best_config: Dict[str, Any],
+                            image_sha_map: Dict[str, str], atlas_data: Dict[str, Any], build_cache: Dict[str, Any],
+                            render) -> int:
+        """Saves the atlases of a scale level and records them in the manifest and build cache
+        
+        Args:
+            render: Function returning the atlas Image of a new atlas info, called just before encoding
+        
+        Returns:
+            int: Number of atlases of this scale level
+        """
+        # Sort atlases by image count (descending) so most filled come first
+        sorted_atlases = sorted(reused_atlases + best_config['atlases'], key=lambda a: a['count'], reverse=True)
+        scale_cache = build_cache['scales'][str(scale_factor)] = []
+        
+        # Composite and encode new atlases in the background, within the memory limit
+        encoded = self._encoded_atlases([a for a in sorted_atlases if 'reused' not in a], render, scale_factor)
+        
+        # Sauvegarder les atlas de la meilleure configuration
+        atlas_index = 0
+        for atlas_info in sorted_atlases:
+            atlas_filename = f"atlas_x{scale_factor:02d}_{atlas_index:02d}.png"
+            atlas_path = os.path.join(self.output_folder, atlas_filename)
             
-            # UV coordinates (image occupies entire atlas except padding)
-            uv_coords = {
-                filename: {
-                    'x': self.padding,
-                    'y': self.padding,
-                    'width': img_width,
-                    'height': img_height
-                }
-            }
+            if 'reused' in atlas_info:
+                # Unchanged atlas: keep its PNG and layout, only its index may move
+                with self.stats.phase('write', scale_factor):
+                    with open(atlas_path, 'wb') as f:
+                        f.write(atlas_info['png'])
+                self.stats.count('atlases_reused')
+                atlas_data_info = dict(atlas_info['reused'], file=atlas_filename, index=atlas_index)
+                if atlas_info['variants']:
+                    atlas_data_info['formats'] = self._write_variants(atlas_filename, atlas_info['variants'], scale_factor)
+                atlas_data['atlases'].append(atlas_data_info)
+                scale_cache.append({'entry': atlas_data_info, 'images': atlas_info['images']})
+                
+                print(f"♻️ Atlas reused: {atlas_filename} ({atlas_data_info['count']} images, "
+                      f"{atlas_data_info['width']}x{atlas_data_info['height']})")
+                
+                atlas_index += 1
+                continue
             
-            # Calculate normalized UV coordinates
-            uv_coords[filename]['rect_x'] = self.padding / atlas_width
-            uv_coords[filename]['rect_y'] = 1.0 - (self.padding + img_height) / atlas_height
-            uv_coords[filename]['rect_width'] = img_width / atlas_width
-            uv_coords[filename]['rect_height'] = img_height / atlas_height
+            # Manifest form of the layout (single image atlases come with their own)
+            atlas_width, atlas_height = atlas_info['width'], atlas_info['height']
+            layout = atlas_info['layout']
+            uv_coords = atlas_info['uv'] if 'uv' in atlas_info else layout.uv()
+            for name, uv in uv_coords.items():
+                trim = self.trims.get(name)
+                if trim is not None:
+                    # Opaque box packed instead of the whole source image, in scale 1 pixels: 'width'
+                    # and 'height' stay the packed (trimmed) size, clients rebuild the source frame
+                    # from the box (Runtime/Poster.cs places the image on it, keeping the source aspect)
+                    uv['trim'] = dict(zip(('x', 'y', 'width', 'height', 'source_width', 'source_height'), trim))
+            for name in list(uv_coords):
+                for duplicate in self.duplicates.get(name, ()):
+                    uv_coords[duplicate] = dict(uv_coords[name])
             
-            atlases.append({
-                'atlas': atlas,
+            # Calculate individual efficiency of this atlas, padding counted as used
+            atlas_area = atlas_width * atlas_height
+            individual_efficiency = (layout.padded_area / atlas_area * 100) if atlas_area > 0 else 0
+            
+            # Save atlas (encoded in the background, see encode_atlas)
+            png, variants = next(encoded)
+            with self.stats.phase('write', scale_factor):
+                with open(atlas_path, 'wb') as f:
+                    f.write(png)
+            self.stats.count('atlases_written')
+            self.stats.count('bytes_written', len(png))
+            
+            # Calculate SHA256 of saved atlas
+            with self.stats.phase('hash_out', scale_factor):
+                atlas_hash = hashlib.sha256(png).hexdigest()
+            
+            # Add to data with configuration metadata
+            atlas_data_info = {
+                'file': atlas_filename,
+                'scale': scale_factor,
+                'index': atlas_index,
                 'width': atlas_width,
                 'height': atlas_height,
                 'uv': uv_coords,
-                'count': 1
+                'count': len(uv_coords),
+                'sha': atlas_hash,
+                'sort_strategy': atlas_info.get('sort_strategy', best_config['sort_strategy']),
+                'placement_strategy': atlas_info.get('placement_strategy', 'N/A'),
+                'efficiency': individual_efficiency
+            }
+            if variants:
+                # Block compressed copies of the atlas (DDS, see block_compression)
+                atlas_data_info['formats'] = self._write_variants(atlas_filename, variants, scale_factor)
+            atlas_data['atlases'].append(atlas_data_info)
+            scale_cache.append({
+                'entry': atlas_data_info,
+                'images': {name: image_sha_map[name] for name in uv_coords}
             })
+            
+            print(f"💾 Atlas saved: {atlas_filename} ({len(uv_coords)} images, "
+                  f"{atlas_width}x{atlas_height}, {individual_efficiency:.1f}% efficiency)")
+            
+            atlas_index += 1
         
-        return atlases
+        return len(sorted_atlases)
     
     def generate_atlases(self) -> Dict[str, Any]:
-        """Generates all atlases with different downscale levels"""
+        """Generates all atlases with different downscale levels
+        
+        Phase timings and counters are saved in BUILD_STATS_FILE. With profile enabled the build
+        also runs under cProfile (dumped to PROFILE_FILE) and tracemalloc, and their top entries
+        are added to the stats. Searches running in scale worker processes are not profiled.
+        """
+        self.stats = BuildStats()
+        profiler = None
+        profile_summary = None
+        if self.profile:
+            tracemalloc.start()
+            profiler = cProfile.Profile()
+            profiler.enable()
+        
+        try:
+            atlas_data = self._generate_atlases()
+        finally:
+            if profiler is not None:
+                profiler.disable()
+                profile_summary = self._profile_summary(profiler)
+                tracemalloc.stop()
+        
+        if atlas_data:
+            if self.image_cache is not None:
+                self.stats.count('image_cache_hits', self.image_cache.hits)
+                self.stats.count('image_cache_misses', self.image_cache.misses)
+            stats = self.stats.to_dict()
+            stats['decode'] = dict(self.decode_stats)
+            if profile_summary is not None:
+                stats['profile'] = profile_summary
+            with open(os.path.join(self.output_folder, BUILD_STATS_FILE), 'w', encoding='utf-8') as f:
+                json.dump(stats, f, indent=2)
+            
+            print(f"\n⏱️ Phases ({stats['total_seconds']:.1f}s total):")
+            for name, phase in stats['phases'].items():
+                print(f"   {name:<10} {phase['seconds']:8.2f}s ({phase['calls']} calls)")
+        
+        return atlas_data
+    
+    def _profile_summary(self, profiler: cProfile.Profile, top: int = 20) -> Dict[str, Any]:
+        """Dumps the profile to PROFILE_FILE and returns its heaviest functions and allocation sites"""
+        profile_path = os.path.join(self.output_folder, PROFILE_FILE)
+        profiler.dump_stats(profile_path)
+        
+        profile_stats = pstats.Stats(profiler)
+        functions = []
+        for (filename, line, name), (_, calls, total, cumulative, _) in profile_stats.stats.items():
+            functions.append({
+                'function': f"{os.path.basename(filename)}:{line}({name})",
+                'calls': calls,
+                'total_seconds': total,
+                'cumulative_seconds': cumulative
+            })
+        functions.sort(key=lambda f: f['cumulative_seconds'], reverse=True)
+        
+        # Python allocations only, Pillow pixel buffers are allocated outside of tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        allocations = [
+            {'location': f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+             'size_kb': stat.size / 1024, 'count': stat.count}
+            for stat in tracemalloc.take_snapshot().statistics('lineno')[:top]
+        ]
+        
+        print(f"🔬 Profile saved to {profile_path} (Python memory peak {peak / (1024 * 1024):.1f} MB)")
+        return {
+            'file': PROFILE_FILE,
+            'functions': functions[:top],
+            'python_memory_peak_kb': peak / 1024,
+            'python_memory_current_kb': current / 1024,
+            'allocations': allocations
+        }
+    
+    def _generate_atlases(self) -> Dict[str, Any]:
+        """Build behind generate_atlases, records its phases in self.stats"""
         
         # Load manifest.json file if it exists
         manifest_file = os.path.join(self.input_folder, "manifest.json")
@@ -830,41 +3090,82 @@ class AtlasGenerator:
             except Exception as e:
                 print(f"Error loading {manifest_file}: {e}")
         
+        # Index the source images: files unchanged since the last scan only cost a stat
+        catalog = CatalogIndex(self.input_folder, self.catalog_index)
+        with self.stats.phase('hash'):
+            catalog_entries = catalog.scan()
+        catalog.save()
+        print(f"Catalog: {len(catalog_entries)} images, {catalog.indexed} indexed, {catalog.reused} unchanged")
+        self.stats.count('images_indexed', catalog.indexed)
+        
         # Load all images
         image_files = []
         image_sha_map = {}  # Store SHA of original images
-        supported_formats = ('.png', '.jpg', '.jpeg', '.bmp', '.tiff')
-        
-        for filename in os.listdir(self.input_folder):
-            if filename.lower().endswith(supported_formats):
-                filepath = os.path.join(self.input_folder, filename)
-                try:
-                    # Calculate SHA256 of original file
-                    with open(filepath, 'rb') as f:
-                        file_hash = hashlib.sha256(f.read()).hexdigest()
-                    image_sha_map[filename] = file_hash
-                    
-                    img = Image.open(filepath)
-                    img = img.convert('RGBA')  # Ensure RGBA format
-                    
-                    # Resize image if it exceeds max_image_size
-                    width, height = img.size
-                    if width > self.max_image_size or height > self.max_image_size:
-                        ratio = min(self.max_image_size / width, self.max_image_size / height)
-                        new_width = int(width * ratio)
-                        new_height = int(height * ratio)
-                        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                        print(f"  📐 {filename}: {width}x{height} → {new_width}x{new_height}")
-                    
-                    image_files.append((filename, img))
-                except Exception as e:
-                    print(f"Error loading {filename}: {e}")
+        
+        for filename, entry in catalog_entries.items():
+            image_sha_map[filename] = entry.sha
+            try:
+                if self.streaming:
+                    # Keep dimensions only (from the index), pixels are decoded into the image
+                    # cache the first time an atlas needs them
+                    width, height = self.normalized_size(entry.width, entry.height)
+                    if self.trim_alpha:
+                        # The opaque box needs the pixels: decoded once here, then dropped
+                        width, height = self.trim_image(filename, self.load_image(entry.path, filename, entry.sha)).size
+                    img = SourceImage(entry.path, entry.sha, width, height)
+                else:
+                    img = self.load_image(entry.path, filename, entry.sha)
+                    if self.trim_alpha:
+                        img = self.trim_image(filename, img)
+                image_files.append((filename, img))
+            except Exception as e:
+                print(f"Error loading {filename}: {e}")
         
         if not image_files:
             print("No images found in input folder")
             return {}
         
         print(f"Images loaded: {len(image_files)}")
+        self.stats.count('images', len(image_files))
+        if self.trim_alpha:
+            source_area = sum(trim[4] * trim[5] for trim in self.trims.values())
+            trimmed_area = sum(trim[2] * trim[3] for trim in self.trims.values())
+            saved = (1 - trimmed_area / source_area) * 100 if source_area else 0
+            print(f"✂️ Alpha trim: {len(self.trims)} images with transparent margins, {saved:.1f}% of their area removed")
+            self.stats.count('images_trimmed', len(self.trims))
+        if self.dedup != 'none':
+            self.duplicates = self.find_duplicates(image_files, image_sha_map)
+            duplicated = {name for names in self.duplicates.values() for name in names}
+            sizes = {filename: img.size for filename, img in image_files}
+            total_area = sum(width * height for width, height in sizes.values())
+            duplicate_area = sum(sizes[name][0] * sizes[name][1] for name in duplicated)
+            matches = self.dedup_matches
+            print(f"🧬 Dedup: {len(duplicated)} duplicates of {len(self.duplicates)} images "
+                  f"({matches['sha']} identical files, {matches['pixels']} identical pixels, "
+                  f"{matches['perceptual']} near-duplicates), "
+                  f"{duplicate_area / total_area * 100 if total_area else 0:.1f}% of the image area not packed")
+            self.stats.count('images_deduplicated', len(duplicated))
+            if not self.streaming:
+                # Their pixels are never composited
+                image_files = [(filename, SourceImage(catalog_entries[filename].path, image_sha_map[filename], *img.size))
+                               if filename in duplicated else (filename, img) for filename, img in image_files]
+        if self.streaming:
+            limit = f"{self.memory_limit // (1024 * 1024)} MB" if self.memory_limit else "unlimited"
+            print(f"Streaming mode: pixels loaded on demand, atlas memory limit {limit}")
+        if self.image_cache is not None:
+            print(f"Image cache: {self.image_cache.hits} hits, {self.image_cache.misses} misses")
+        stats = self.decode_stats
+        if stats['decoded']:
+            mb = 1024 * 1024
+            print(f"Decode: {stats['decoded']} images in {stats['seconds']:.2f}s (resize included), "
+                  f"largest buffer {stats['peak_decoded_bytes'] / mb:.0f} MB")
+            if stats['drafted']:
+                print(f"  Draft decoding: {stats['drafted']} JPEG decoded at reduced size, "
+                      f"{(stats['full_bytes'] - stats['decoded_bytes']) / mb:.0f} MB of pixels not decoded, "
+                      f"largest buffer {stats['peak_decoded_bytes'] / mb:.0f} MB instead of "
+                      f"{stats['peak_full_bytes'] / mb:.0f} MB")
+                # Timing the saving would take a full decode of each source: see benchmark.py decode
+                print(f"  Decode time saved: measured by python benchmark.py decode --input {self.input_folder}")
         
         # Final results
         atlas_data = {
@@ -898,102 +3199,169 @@ class AtlasGenerator:
             atlas_data['metadata'] = custom_metadata
         
         # Generate atlases for different downscale levels
-        scale_factors = [1, 2, 4, 8, 16]  # Downscale levels
-        
-        for scale_factor in scale_factors:
-            print(f"\n{'='*60}")
-            print(f"📐 Génération des atlas avec downscale x{scale_factor}...")
-            print(f"{'='*60}")
-            
-            # Downscaler toutes les images
-            downscaled_images = []
-            for filename, img in image_files:
-                downscaled_img = self.downscale_image(img, scale_factor)
-                downscaled_images.append((filename, downscaled_img))
-            
-            # Find best packing configuration
-            best_config = self.find_best_packing(downscaled_images)
-            
-            if not best_config or not best_config['atlases']:
-                print(f"⚠️ No valid configuration found for downscale x{scale_factor}")
-                print(f"   → Creating one atlas per image (fallback mode)...")
-                
-                # Create individual atlas for each image
-                individual_atlases = self.create_individual_atlases(downscaled_images)
+        scale_factors = self.scale_factors
+        mip_levels = {}  # Last level built for each image, mip chains continue from it
+        
+        self._load_search_history()
+        if self.persistent_layout_cache:
+            self.layout_cache.load(os.path.join(self.output_folder, LAYOUT_CACHE_FILE))
+        build_config = self._build_config(scale_factors)
+        previous_build = self._load_build_cache(build_config) if self.incremental else None
+        build_cache = {'version': BUILD_CACHE_VERSION, 'config': build_config, 'scales': {}}
+        
+        def plan(scale_factor):
+            return self._plan_scale(scale_factor, image_files, image_sha_map, previous_build)
+        
+        # Packing searches only need dimensions: with scale_workers > 1 up to scale_workers
+        # levels are searched concurrently ahead of the one being saved, the next level being
+        # submitted as each one is consumed. Levels are finished in order and, as soon as one
+        # fits in one atlas, the searches of larger levels still running are stopped
+        scale_executor = None
+        searches = {}
+        if self.scale_workers > 1:
+            scale_plans = {scale_factor: plan(scale_factor) for scale_factor in scale_factors}
+            scale_worker_count = min(self.scale_workers, len(scale_factors))
+            scale_context = multiprocessing.get_context()
+            stop_event = scale_context.Event()
+            scale_executor = ProcessPoolExecutor(max_workers=scale_worker_count, mp_context=scale_context,
+                                                 initializer=_init_scale_worker, initargs=(stop_event,))
+            unsubmitted = deque(scale_factor for scale_factor in scale_factors if scale_plans[scale_factor]['entries'])
+        
+        def submit_searches():
+            while scale_executor is not None and unsubmitted and len(searches) < scale_worker_count:
+                scale_factor = unsubmitted.popleft()
+                searches[scale_factor] = scale_executor.submit(_search_scale_task, self.options, self.output_folder,
+                                                               scale_plans[scale_factor]['entries'])
+        
+        submit_searches()
+        try:
+            for scale_factor in scale_factors:
+                print(f"\n{'='*60}")
+                print(f"📐 Génération des atlas avec downscale x{scale_factor}...")
+                print(f"{'='*60}")
                 
-                if not individual_atlases:
-                    print(f"❌ Failed to create individual atlases")
-                    continue
-                
-                # Use these atlases as configuration
-                best_config = {
-                    'atlases': individual_atlases,
-                    'atlas_size': self.max_atlas_size,
-                    'sort_strategy': 'individual',
-                    'score': self.evaluate_atlas_configuration(individual_atlases)
-                }
+                scale_plan = scale_plans[scale_factor] if scale_executor else plan(scale_factor)
+                reused_atlases = scale_plan['reused']
+                if reused_atlases:
+                    print(f"♻️ {len(reused_atlases)} atlas reused, {len(scale_plan['entries'])} images to repack")
                 
-                print(f"   ✅ {len(individual_atlases)} individual atlases created")
-            
-            # Sort atlases by image count (descending) so most filled come first
-            sorted_atlases = sorted(best_config['atlases'], key=lambda a: a['count'], reverse=True)
-            
-            # Sauvegarder les atlas de la meilleure configuration
-            atlas_index = 0
-            for atlas_info in sorted_atlases:
-                atlas = atlas_info['atlas']
-                uv_coords = atlas_info['uv']
+                if scale_factor in searches:
+                    # Time spent waiting for the worker, the search time itself is reported below
+                    with self.stats.phase('search_wait', scale_factor):
+                        best_config = searches.pop(scale_factor).result()
+                    submit_searches()
+                elif scale_plan['entries']:
+                    best_config = self.search_packing(scale_plan['entries'])
+                else:
+                    best_config = {'atlases': [], 'sort_strategy': 'reused'}
                 
-                # Calculate individual efficiency of this atlas
-                atlas_area = atlas.width * atlas.height
-                image_area = sum(uv['width'] * uv['height'] for uv in uv_coords.values())
-                padding_area = sum(
-                    (uv['width'] + self.padding * 2) * (uv['height'] + self.padding * 2) - uv['width'] * uv['height']
-                    for uv in uv_coords.values()
-                )
-                individual_efficiency = ((image_area + padding_area) / atlas_area * 100) if atlas_area > 0 else 0
+                if 'layout_cache_entries' in best_config:
+                    self.layout_cache.merge(best_config.pop('layout_cache_entries'))
                 
-                # Save atlas
-                atlas_filename = f"atlas_x{scale_factor:02d}_{atlas_index:02d}.png"
-                atlas_path = os.path.join(self.output_folder, atlas_filename)
-                atlas.save(atlas_path, optimize=True)
+                if 'seconds' in best_config:
+                    self._record_search_wins(best_config['atlases'])
+                    self.stats.add('search', best_config['seconds'], scale_factor)
+                    self.stats.count('layouts_evaluated', best_config['layouts_evaluated'])
+                    scale_stats = self.stats.scale(scale_factor)
+                    scale_stats['layouts_evaluated'] = best_config['layouts_evaluated']
+                    scale_stats['layout_cache_hits'] = best_config['layout_cache_hits']
+                    self.stats.count('layout_cache_hits', best_config['layout_cache_hits'])
+                    scale_stats['lower_bound'] = best_config['score']['lower_bound']
+                    scale_stats['search'] = [
+                        {'images': a['count'], 'candidates': a['candidates'], 'seconds': a['search_seconds'],
+                         'config': f"{a['atlas_size']}/{a['placement_strategy']}/{a['sort_strategy']}"}
+                        for a in best_config['atlases']
+                    ]
                 
-                # Calculate SHA256 of saved atlas
-                with open(atlas_path, 'rb') as f:
-                    atlas_hash = hashlib.sha256(f.read()).hexdigest()
+                # Downscaler les images à packer
+                packed_filenames = {entry[0] for entry in scale_plan['entries']}
+                if self.streaming:
+                    # Pixels are read back one image at a time while compositing each atlas
+                    sources = {filename: img for filename, img in image_files if filename in packed_filenames}
+                    
+                    def render(atlas_info, sources=sources, scale_factor=scale_factor):
+                        if 'atlas' in atlas_info:
+                            return atlas_info['atlas']
+                        return self.composite_streamed_atlas(sources, atlas_info['layout'].placements(), atlas_info['width'],
+                                                             atlas_info['height'], scale_factor)
+                else:
+                    downscaled_images = []
+                    for filename, img in image_files:
+                        if filename not in packed_filenames:
+                            continue
+                        downscaled_img = self.get_scaled_image(img, image_sha_map[filename], scale_factor,
+                                                               mip_levels.get(filename))
+                        mip_levels[filename] = (scale_factor, downscaled_img)
+                        downscaled_images.append((filename, downscaled_img))
+                    
+                    # Composite pixels only for the chosen layouts
+                    def render(atlas_info, images=downscaled_images):
+                        if 'atlas' in atlas_info:
+                            return atlas_info['atlas']
+                        return self.composite_atlas(images, atlas_info['layout'].placements(), atlas_info['width'], atlas_info['height'])
                 
-                # Add to data with configuration metadata
-                atlas_data_info = {
-                    'file': atlas_filename,
-                    'scale': scale_factor,
-                    'index': atlas_index,
-                    'width': atlas.width,
-                    'height': atlas.height,
-                    'uv': uv_coords,
-                    'count': len(uv_coords),
-                    'sha': atlas_hash,
-                    'sort_strategy': atlas_info.get('sort_strategy', best_config['sort_strategy']),
-                    'placement_strategy': atlas_info.get('placement_strategy', 'N/A'),
-                    'efficiency': individual_efficiency
-                }
-                atlas_data['atlases'].append(atlas_data_info)
+                if packed_filenames and (not best_config or not best_config['atlases']):
+                    print(f"⚠️ No valid configuration found for downscale x{scale_factor}")
+                    print(f"   → Creating one atlas per image (fallback mode)...")
+                    
+                    # Create individual atlas for each image
+                    if self.streaming:
+                        individual_atlases = [self.individual_atlas_layout(*entry) for entry in scale_plan['entries']]
+                    else:
+                        with self.stats.phase('composite', scale_factor):
+                            individual_atlases = self.create_individual_atlases(downscaled_images)
+                    
+                    if not individual_atlases and not reused_atlases:
+                        print(f"❌ Failed to create individual atlases")
+                        continue
+                    
+                    # Use these atlases as configuration
+                    best_config = {
+                        'atlases': individual_atlases,
+                        'atlas_size': self.max_atlas_size,
+                        'sort_strategy': 'individual',
+                        'score': self.evaluate_atlas_configuration(individual_atlases)
+                    }
+                    
+                    print(f"   ✅ {len(individual_atlases)} individual atlases created")
                 
-                print(f"💾 Atlas saved: {atlas_filename} ({len(uv_coords)} images, "
-                      f"{atlas.width}x{atlas.height}, {individual_efficiency:.1f}% efficiency)")
+                scale_atlas_count = self._save_scale_atlases(scale_factor, reused_atlases, best_config,
+                                                             image_sha_map, atlas_data, build_cache, render)
                 
-                atlas_index += 1
-            
-            scale_atlas_count = len(best_config['atlases'])
-            
-            # If this downscale level produced only one atlas, stop
-            if scale_atlas_count == 1:
-                print(f"\n✋ Stop: Downscale x{scale_factor} produces only one atlas (all images fit)")
-                break
+                # If this downscale level produced only one atlas, stop
+                if scale_atlas_count == 1:
+                    print(f"\n✋ Stop: Downscale x{scale_factor} produces only one atlas (all images fit)")
+                    break
+        finally:
+            if scale_executor is not None:
+                # Larger scales still being searched are no longer needed: queued ones are
+                # cancelled and running ones stop at their next layout
+                stop_event.set()
+                scale_executor.shutdown(wait=False, cancel_futures=True)
         
         # Save JSON data
         json_path = os.path.join(self.output_folder, "manifest.json")
-        with open(json_path, 'w', encoding='utf-8') as f:
-            json.dump(atlas_data, f, indent=2, ensure_ascii=False)
+        with self.stats.phase('manifest'):
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(atlas_data, f, indent=2, ensure_ascii=False)
+            
+            # Save build cache for the next incremental run
+            with open(os.path.join(self.output_folder, BUILD_CACHE_FILE), 'w', encoding='utf-8') as f:
+                json.dump(build_cache, f, ensure_ascii=False)
+            
+            self._save_search_history()
+            if self.persistent_layout_cache:
+                self.layout_cache.save(os.path.join(self.output_folder, LAYOUT_CACHE_FILE))
+        
+        # Remove atlases of the previous build that are no longer referenced
+        if previous_build:
+            current_files = {file for a in atlas_data['atlases'] for file in self._atlas_files(a)}
+            for cached_scale in previous_build.get('scales', {}).values():
+                for cached in cached_scale:
+                    for stale_file in self._atlas_files(cached['entry']):
+                        stale_path = os.path.join(self.output_folder, stale_file)
+                        if stale_file not in current_files and os.path.exists(stale_path):
+                            os.remove(stale_path)
         
         print(f"\nGeneration complete!")
         print(f"Total atlases generated: {len(atlas_data['atlases'])}")
@@ -1002,14 +3370,19 @@ class AtlasGenerator:
         return atlas_data
 
 
-def main(input_folder='input_images', output_folder='output_atlases', max_atlas_size=2048, padding=2, max_image_size=None, progress_callback=None):
+def main(input_folder='input_images', output_folder='output_atlases', max_atlas_size=None, padding=None, max_image_size=None,
+         progress_callback=None, options: AtlasOptions = None):
     """
     Fonction principale pour générer les atlas
     
     Args:
         input_folder: Dossier contenant les images sources
         output_folder: Dossier de sortie pour les atlas
+        max_atlas_size: Taille maximale des atlas (None = celle de options, 2048 par défaut)
+        padding: Padding entre les images (None = celui de options, 2 par défaut)
+        max_image_size: Taille maximale des images avant traitement (None = celle de options)
         progress_callback: Fonction de callback pour la progression (step, total, message)
+        options: Options du build (voir AtlasOptions, None = options par défaut)
         
     Returns:
         dict: Les données d'atlas générées ou None en cas d'erreur
@@ -1028,19 +3401,16 @@ def main(input_folder='input_images', output_folder='output_atlases', max_atlas_
     report_progress(1, 5, "Initialisation du générateur d'atlas")
     
     # Créer le générateur d'atlas
-    generator = AtlasGenerator(
-        max_atlas_size=max_atlas_size,
-        padding=padding,
-        max_image_size=max_image_size,
-        input_folder=input_folder,
-        output_folder=output_folder
-    )
+    generator = AtlasGenerator(max_atlas_size, input_folder, output_folder, padding, max_image_size, options)
     
     report_progress(2, 5, "Chargement des images")
     
     # Générer les atlas
     report_progress(3, 5, "Génération des atlas en cours...")
-    atlas_data = generator.generate_atlases()
+    try:
+        atlas_data = generator.generate_atlases()
+    finally:
+        generator.close()
     
     report_progress(4, 5, "Sauvegarde des résultats")
     
@@ -1073,12 +3443,7 @@ if __name__ == "__main__":
                        help='Dossier des images d\'entrée (par défaut: input_images)')
     parser.add_argument('--output', default='output_atlases',
                        help='Dossier de sortie pour les atlas (par défaut: output_atlases)')
-    parser.add_argument('--max_atlas_size', type=int, default=2048,
-                       help='Taille maximale des atlas (par défaut: 2048)')
-    parser.add_argument('--padding', type=int, default=2,
-                       help='Padding entre les images dans l\'atlas (par défaut: 2)')
-    parser.add_argument('--max_image_size', type=int, default=None,
-                       help='Taille maximale des images avant traitement (par défaut: même que max_atlas_size)')
+    AtlasOptions.add_arguments(parser)
     
     args = parser.parse_args()
-    main(args.input, args.output, args.max_atlas_size, args.padding, args.max_image_size)
+    main(args.input, args.output, options=AtlasOptions.from_args(args))
@@ -46,6 +46,13 @@ def compress_atlas_data(data):
             'uv': {}
         }
 
+        # Block compressed variants, copied as atlas/{index}.{format}.dds
+        if atlas.get('formats'):
+            compressed_atlas['formats'] = {
+                block_format: {'sha': variant['sha'], 'size': variant['size']}
+                for block_format, variant in atlas['formats'].items()
+            }
+
         # Replace string keys with numeric indexes
         for image_name, uv in atlas['uv'].items():
             index = image_name_to_index[image_name]
@@ -85,6 +92,21 @@ def copy_and_rename_images(atlas_folder, output_static_folder, atlas_data):
                 print(f"Copied: {atlas['file']} -> {new_filename}")
             else:
                 print(f"Warning: File not found: {source_file}")
+            
+            # Block compressed variants follow the same index
+            for block_format, variant in atlas.get('formats', {}).items():
+                source_variant = atlas_folder / variant['file']
+                if not source_variant.exists():
+                    print(f"Warning: File not found: {source_variant}")
+                    continue
+                new_filename = f"{index}.{block_format}.dds"
+                shutil.copy2(source_variant, images_folder / new_filename)
+                copied_files.append({
+                    'original': variant['file'],
+                    'new': new_filename,
+                    'index': index
+                })
+                print(f"Copied: {variant['file']} -> {new_filename}")
     
     return copied_files
 
@@ -1,8 +1,9 @@
 import os
 import json
-from PIL import Image
 
-def generate_metadata(input_folder='input_images', progress_callback=None, auto_delete_missing=False):
+from catalog import CatalogIndex
+
+def generate_metadata(input_folder='input_images', progress_callback=None, auto_delete_missing=False, catalog_index=None):
     """
     Generates or updates the manifest.json file for images
     
@@ -10,6 +11,7 @@ def generate_metadata(input_folder='input_images', progress_callback=None, auto_
         input_folder: Folder containing images
         progress_callback: Progress callback function (step, total, message)
         auto_delete_missing: Automatically delete entries for missing files
+        catalog_index: Catalog index file shared with generate_posters.py (None = per-folder file in the user cache directory, see catalog.default_index_path)
         
     Returns:
         dict: Generated metadata or None on error
@@ -40,16 +42,10 @@ def generate_metadata(input_folder='input_images', progress_callback=None, auto_
     except json.JSONDecodeError:
         print(f"File {manifest_file} is not valid JSON. Creating new file.")
     
-    # Supported image extensions
-    supported_extensions = {'.png', '.jpg', '.jpeg', '.bmp', '.tiff', '.tif', '.webp', '.gif'}
-    
-    # Loop through all images in folder
-    image_files = []
-    for filename in sorted(os.listdir(input_folder)):
-        if os.path.isfile(os.path.join(input_folder, filename)):
-            _, ext = os.path.splitext(filename.lower())
-            if ext in supported_extensions:
-                image_files.append(filename)
+    # List images through the catalog index, so the atlas build that follows only stats them
+    catalog = CatalogIndex(input_folder, catalog_index)
+    image_files = sorted(catalog.scan())
+    catalog.save()
     
     if not image_files:
         print(f"No images found in folder {input_folder}")
@@ -154,9 +150,11 @@ def main():
                        help='Input images folder (default: input_images)')
     parser.add_argument('--auto-delete-missing', action='store_true',
                        help='Automatically delete entries for missing files from manifest')
+    parser.add_argument('--catalog-index', default=None,
+                       help='Catalog index file shared with generate_posters.py (default: per-folder file in the user cache directory, nothing is written in the input folder besides manifest.json)')
     
     args = parser.parse_args()
-    generate_metadata(args.input, auto_delete_missing=args.auto_delete_missing)
+    generate_metadata(args.input, auto_delete_missing=args.auto_delete_missing, catalog_index=args.catalog_index)
 
 if __name__ == "__main__":
     main()
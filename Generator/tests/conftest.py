@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Import the generator modules from the parent folder, like the CI scripts
+sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -0,0 +1,28 @@
+from generate_posters import AtlasGenerator, Layout, Rectangle, snap_atlas_size
+
+
+def search_sizes(tmp_path, **options):
+    return AtlasGenerator(output_folder=str(tmp_path), **options)._search_atlas_sizes()
+
+
+def test_square_sizes_follow_max_atlas_size(tmp_path):
+    assert search_sizes(tmp_path) == [(2048, 2048), (1536, 1536), (1024, 1024)]
+    assert search_sizes(tmp_path, max_atlas_size=1000, atlas_snap='multiple_of_4') == [(1000, 1000), (748, 748), (500, 500)]
+    assert search_sizes(tmp_path, max_atlas_size=3000, atlas_snap='pow2') == [(2048, 2048), (1024, 1024)]
+
+
+def test_rectangular_sizes_by_decreasing_area(tmp_path):
+    sizes = search_sizes(tmp_path, max_atlas_size=1024, atlas_shapes='rectangular')
+    assert sizes[:3] == [(1024, 1024), (768, 768), (512, 512)]
+    assert (1024, 512) in sizes and (512, 1024) in sizes and (1024, 256) in sizes
+    areas = [width * height for width, height in sizes[3:]]
+    assert areas == sorted(areas, reverse=True)
+
+
+def test_snapping_stays_within_max_size():
+    assert snap_atlas_size(37, 70, 'none', 128, 128) == (37, 70)
+    assert snap_atlas_size(37, 70, 'multiple_of_4', 128, 128) == (40, 72)
+    assert snap_atlas_size(37, 70, 'pow2', 128, 64) == (64, 64)
+    layout = Layout()
+    layout.add('a.png', Rectangle(0, 0, 37, 70), 0)
+    assert (layout.finish('pow2', 128, 128).width, layout.height) == (64, 128)
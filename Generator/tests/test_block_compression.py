@@ -0,0 +1,91 @@
+import struct
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from block_compression import BLOCK_FORMAT_INFO, compress_blocks, dds_header, encode_dds
+from generate_posters import AtlasGenerator
+
+np = pytest.importorskip('numpy')
+
+
+def gradient(width=64, height=64):
+    """RGBA image with smooth color and alpha ramps, the content BC1/BC3 endpoints fit best"""
+    x, y = np.meshgrid(np.arange(width), np.arange(height))
+    pixels = np.stack([x * 255 // (width - 1), y * 255 // (height - 1), (x + y) * 255 // (width + height - 2),
+                       255 - x * 255 // (width - 1)], axis=2)
+    return Image.fromarray(pixels.astype(np.uint8), 'RGBA')
+
+
+def psnr(decoded, source, channels):
+    error = np.asarray(decoded, dtype=np.float64)[..., channels] - np.asarray(source, dtype=np.float64)[..., channels]
+    mse = (error ** 2).mean()
+    return float('inf') if mse == 0 else 10 * np.log10(255 ** 2 / mse)
+
+
+def decode(data):
+    image = Image.open(BytesIO(data))
+    assert image.format == 'DDS'
+    return image.convert('RGBA')
+
+
+@pytest.mark.parametrize('block_format', ['bc1', 'bc3'])
+def test_dds_header_and_size(block_format):
+    fourcc, block_bytes = BLOCK_FORMAT_INFO[block_format]
+    data = encode_dds(gradient(10, 6), block_format)  # Padded to 3x2 blocks
+    magic, size, flags, height, width, linear_size = struct.unpack_from('<4s5I', data)
+    assert (magic, size, height, width) == (b'DDS ', 124, 6, 10)
+    assert linear_size == 6 * block_bytes
+    assert struct.unpack_from('<4s', data, 84)[0] == fourcc
+    assert len(dds_header(10, 6, block_format)) == 128
+    assert len(data) == 128 + linear_size
+
+
+@pytest.mark.parametrize('block_format', ['bc1', 'bc3'])
+def test_decoded_colors_stay_close(block_format):
+    image = gradient()
+    decoded = decode(encode_dds(image, block_format))
+    assert decoded.size == image.size
+    assert psnr(decoded, image, slice(0, 3)) > 35
+
+
+def test_bc3_keeps_alpha_and_bc1_drops_it():
+    image = gradient()
+    assert psnr(decode(encode_dds(image, 'bc3')), image, 3) > 45
+    assert np.asarray(decode(encode_dds(image, 'bc1')))[..., 3].min() == 255
+
+
+def test_single_color_blocks_are_exact():
+    image = Image.new('RGBA', (8, 8), (255, 0, 0, 128))  # Red is exact in RGB565
+    decoded = np.asarray(decode(encode_dds(image, 'bc3')))
+    assert (decoded == (255, 0, 0, 128)).all()
+
+
+def test_unknown_block_format():
+    with pytest.raises(ValueError):
+        compress_blocks(gradient(4, 4), 'bc7')
+
+
+def test_build_aligns_placements_on_blocks(tmp_path):
+    folder = tmp_path / 'input'
+    folder.mkdir()
+    for i, size in enumerate([(37, 53), (61, 22), (45, 45), (18, 70), (90, 31)]):
+        gradient(*size).save(folder / f'{i}.png')
+    generator = AtlasGenerator(256, str(folder), str(tmp_path / 'output'), padding=2, png_compress_level=1,
+                               catalog_index=str(tmp_path / 'catalog.json'), block_formats=('bc1', 'bc3'))
+    try:
+        atlas_data = generator.generate_atlases()
+    finally:
+        generator.close()
+
+    for atlas in atlas_data['atlases']:
+        assert atlas['width'] % 4 == 0 and atlas['height'] % 4 == 0
+        for block_format, variant in atlas['formats'].items():
+            data = (tmp_path / 'output' / variant['file']).read_bytes()
+            assert data == encode_dds(Image.open(tmp_path / 'output' / atlas['file']), block_format)
+        if atlas['count'] > 1:
+            for uv in atlas['uv'].values():
+                # Each padded image starts a 4x4 block: no block mixes two images
+                assert (round(uv['rect_x'] * atlas['width']) - 2) % 4 == 0
+                assert (round((1.0 - uv['rect_y'] - uv['rect_height']) * atlas['height']) - 2) % 4 == 0
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+from PIL import Image
+
+import catalog
+from catalog import CatalogIndex
+
+
+@pytest.fixture
+def folder(tmp_path):
+    folder = tmp_path / 'input'
+    folder.mkdir()
+    Image.new('RGB', (30, 20), (200, 40, 40)).save(folder / 'a.png')
+    Image.new('RGB', (40, 50), (40, 200, 40)).save(folder / 'b.jpg')
+    Image.new('RGB', (10, 10)).save(folder / 'c.gif')  # Not an atlas format
+    return folder
+
+
+def scan(folder, tmp_path):
+    index = CatalogIndex(str(folder), str(tmp_path / 'index.json'))
+    entries = index.scan()
+    index.save()
+    return index, entries
+
+
+def test_first_scan_indexes_supported_images(folder, tmp_path):
+    index, entries = scan(folder, tmp_path)
+    assert sorted(entries) == ['a.png', 'b.jpg']
+    assert (entries['a.png'].width, entries['a.png'].height, entries['a.png'].format) == (30, 20, 'PNG')
+    assert entries['b.jpg'].sha == catalog.file_sha256(str(folder / 'b.jpg'))
+    assert index.indexed == 2
+
+
+def test_default_index_stays_out_of_the_input_folder(folder, tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path / 'cache'))
+    index = CatalogIndex(str(folder))
+    index.scan()
+    index.save()
+    assert index.index_path.startswith(str(tmp_path / 'cache'))
+    assert sorted(os.listdir(folder)) == ['a.png', 'b.jpg', 'c.gif']
+
+
+def test_unchanged_files_are_not_hashed_again(folder, tmp_path, monkeypatch):
+    _, first = scan(folder, tmp_path)
+    
+    def fail(path):
+        raise AssertionError(f"{path} hashed again")
+    
+    monkeypatch.setattr(catalog, 'file_sha256', fail)
+    index, entries = scan(folder, tmp_path)
+    assert (index.reused, index.indexed) == (2, 0)
+    assert {name: entry.to_dict() for name, entry in entries.items()} == {name: entry.to_dict() for name, entry in first.items()}
+
+
+def test_modified_and_touched_files(folder, tmp_path, monkeypatch):
+    _, first = scan(folder, tmp_path)
+    Image.new('RGB', (60, 70), (10, 10, 10)).save(folder / 'a.png')
+    stat = os.stat(folder / 'b.jpg')
+    os.utime(folder / 'b.jpg', ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))  # Same content, new mtime
+    
+    opened = []
+    original_open = catalog.Image.open
+    monkeypatch.setattr(catalog.Image, 'open', lambda path: opened.append(os.path.basename(path)) or original_open(path))
+    index, entries = scan(folder, tmp_path)
+    assert (index.reused, index.indexed) == (0, 2)
+    assert (entries['a.png'].width, entries['a.png'].height) == (60, 70)
+    assert entries['a.png'].sha != first['a.png'].sha
+    assert entries['b.jpg'].sha == first['b.jpg'].sha
+    assert opened == ['a.png']  # The touched file keeps its indexed header
@@ -0,0 +1,72 @@
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+
+from generate_posters import AtlasGenerator, color_thumbnail, perceptual_hash, thumbnail_distance, DEDUP_HASH_DISTANCE
+
+
+def poster(background, label, size=(300, 450)):
+    """Poster with a light frame and a text band, the same layout whatever the color and label"""
+    image = Image.new('RGBA', size, background)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((20, 20, 280, 200), fill=(240, 240, 240, 255))
+    # Default bitmap font scaled up, large enough to show in the thumbnails on any Pillow version
+    text = Image.new('RGBA', (40, 12), (0, 0, 0, 0))
+    ImageDraw.Draw(text).text((0, 0), label, fill=(255, 255, 255, 255))
+    text = text.resize((160, 48), Image.Resampling.NEAREST)
+    image.alpha_composite(text, (30, 260))
+    return image
+
+
+def recompressed(image, size):
+    """Smaller JPEG copy of an image, as found in catalogs that reuse a poster"""
+    buffer = BytesIO()
+    image.convert('RGB').resize(size, Image.Resampling.LANCZOS).save(buffer, 'JPEG', quality=70)
+    return Image.open(buffer).convert('RGBA')
+
+
+def find_duplicates(tmp_path, images, dedup='perceptual'):
+    generator = AtlasGenerator(output_folder=str(tmp_path), dedup=dedup)
+    files = list(images.items())
+    return generator.find_duplicates(files, {name: name for name in images}), generator.dedup_matches
+
+
+def test_color_and_text_variants_share_the_brightness_hash():
+    summer = poster((200, 30, 30, 255), 'SUMMER')
+    for variant in (poster((30, 30, 200, 255), 'WINTER'), poster((200, 30, 30, 255), 'WINTER')):
+        assert (perceptual_hash(summer) ^ perceptual_hash(variant)).bit_count() <= DEDUP_HASH_DISTANCE
+        assert thumbnail_distance(color_thumbnail(summer), color_thumbnail(variant)) > 32
+
+
+def test_perceptual_keeps_posters_differing_in_color_or_text(tmp_path):
+    images = {
+        'summer.png': poster((200, 30, 30, 255), 'SUMMER'),
+        'winter_blue.png': poster((30, 30, 200, 255), 'WINTER'),
+        'winter_red.png': poster((200, 30, 30, 255), 'WINTER'),
+    }
+    duplicates, matches = find_duplicates(tmp_path, images)
+    assert duplicates == {}
+    assert matches['perceptual'] == 0
+
+
+def test_perceptual_merges_recompressed_copy_into_largest(tmp_path):
+    summer = poster((200, 30, 30, 255), 'SUMMER')
+    images = {
+        'summer.png': summer,
+        'summer_small.jpg': recompressed(summer, (200, 300)),
+        'winter.png': poster((30, 30, 200, 255), 'WINTER'),
+    }
+    duplicates, matches = find_duplicates(tmp_path, images)
+    assert duplicates == {'summer.png': ['summer_small.jpg']}
+    assert matches['perceptual'] == 1
+
+
+def test_exact_matches_same_sha_and_same_pixels(tmp_path):
+    summer = poster((200, 30, 30, 255), 'SUMMER')
+    generator = AtlasGenerator(output_folder=str(tmp_path), dedup='exact')
+    files = [('a.png', summer), ('b.png', summer.copy()), ('c.png', summer.copy()),
+             ('d.png', recompressed(summer, (200, 300)))]
+    sha_map = {'a.png': 'x', 'b.png': 'x', 'c.png': 'y', 'd.png': 'z'}
+    duplicates = generator.find_duplicates(files, sha_map)
+    assert duplicates == {'a.png': ['b.png', 'c.png']}
+    assert generator.dedup_matches == {'sha': 1, 'pixels': 1, 'perceptual': 0}
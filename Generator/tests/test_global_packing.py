@@ -0,0 +1,34 @@
+from generate_posters import compute_multi_bin_layout, packing_lower_bound
+
+
+def test_lower_bound_area():
+    square = ('a.png', 48, 48)  # 50x50 with padding
+    assert packing_lower_bound([square] * 4, 100, 100, 1) == 1
+    assert packing_lower_bound([square] * 5, 100, 100, 1) == 2
+
+
+def test_lower_bound_large_images():
+    # Area alone allows 2 atlases, but no two images larger than half the atlas share one
+    assert packing_lower_bound([('a.png', 60, 60)] * 3, 100, 100, 0) == 3
+
+
+def test_lower_bound_with_rotation():
+    # 60x35 is larger than half of 100x60, but turned it fits beside another one
+    entries = [('a.png', 60, 35)] * 3
+    assert packing_lower_bound(entries, 100, 60, 0) == 3
+    assert packing_lower_bound(entries, 100, 60, 0, allow_rotation=True) == 2
+
+
+def test_lower_bound_with_alignment():
+    entries = [('a.png', 5, 5)] * 16  # 8x8 cells once aligned on 4x4 blocks
+    assert packing_lower_bound(entries, 16, 16, 0) == 2
+    assert packing_lower_bound(entries, 16, 16, 0, align=4) == 4
+
+
+def test_multi_bin_layout_fills_earlier_atlases():
+    # Every atlas stays open: the small images go to the gaps left next to the first large one
+    entries = [('big_1.png', 60, 60), ('big_2.png', 60, 60), ('small_1.png', 30, 30), ('small_2.png', 30, 30)]
+    layouts = compute_multi_bin_layout(entries, 2, 100, 100, 0, 'best_short_side_fit')
+    assert [layout.names for layout in layouts] == [['big_1.png', 'small_1.png', 'small_2.png'], ['big_2.png']]
+    assert len(layouts) == packing_lower_bound(entries, 100, 100, 0)
+    assert compute_multi_bin_layout(entries, 1, 100, 100, 0, 'best_short_side_fit') is None
@@ -0,0 +1,78 @@
+import pytest
+from PIL import Image
+
+from generate_posters import AtlasGenerator
+
+COLORS = [(200, 40, 40), (40, 200, 40), (40, 40, 200), (200, 200, 40), (200, 40, 200), (40, 200, 200)]
+
+
+def write_catalog(folder, count=12, size=(100, 140)):
+    folder.mkdir(exist_ok=True)
+    for i in range(count):
+        Image.new('RGB', size, COLORS[i % len(COLORS)]).save(folder / f'poster_{i:02d}.png')
+
+
+def build(tmp_path, **options):
+    generator = AtlasGenerator(256, str(tmp_path / 'input'), str(tmp_path / 'output'), incremental=True,
+                               png_compress_level=1, catalog_index=str(tmp_path / 'catalog.json'), **options)
+    try:
+        return generator.generate_atlases(), generator.stats.counters
+    finally:
+        generator.close()
+
+
+def atlases_by_images(atlas_data):
+    return {(atlas['scale'], frozenset(atlas['uv'])): atlas['sha'] for atlas in atlas_data['atlases']}
+
+
+def write_mixed_catalog(folder):
+    """Wide and tall posters: with rotation some of them are packed turned"""
+    folder.mkdir(exist_ok=True)
+    for i in range(4):
+        Image.new('RGB', (200, 60), COLORS[i]).save(folder / f'wide_{i}.png')
+        Image.new('RGB', (60, 200), COLORS[i + 2]).save(folder / f'tall_{i}.png')
+
+
+def test_unchanged_build_reuses_every_atlas(tmp_path):
+    write_catalog(tmp_path / 'input')
+    first, _ = build(tmp_path)
+    second, counters = build(tmp_path)
+    assert atlases_by_images(second) == atlases_by_images(first)
+    assert counters['atlases_reused'] == len(first['atlases'])
+    assert counters.get('atlases_written', 0) == 0
+
+
+def test_changed_image_repacks_only_its_atlases(tmp_path):
+    write_catalog(tmp_path / 'input')
+    first, _ = build(tmp_path)
+    assert sum(atlas['scale'] == 1 for atlas in first['atlases']) > 2
+    Image.new('RGB', (100, 140), (10, 10, 10)).save(tmp_path / 'input' / 'poster_05.png')
+    second, counters = build(tmp_path)
+    
+    before, after = atlases_by_images(first), atlases_by_images(second)
+    rewritten = [key for key in after if 'poster_05.png' in key[1]]
+    assert counters['atlases_written'] == len(rewritten) == len(set(key[0] for key in after))  # One per scale
+    for key, sha in after.items():
+        if key not in rewritten:
+            assert before[key] == sha  # Same images, same PNG
+
+
+@pytest.mark.parametrize('option, value', [
+    ('packers', ('skyline',)),
+    ('packing_mode', 'global'),
+    ('atlas_shapes', 'rectangular'),
+    ('atlas_snap', 'pow2'),
+    ('allow_rotation', True),
+])
+def test_build_config_tracks_layout_options(tmp_path, option, value):
+    default = AtlasGenerator(output_folder=str(tmp_path))
+    changed = AtlasGenerator(output_folder=str(tmp_path), **{option: value})
+    assert changed._build_config([1, 2]) != default._build_config([1, 2])
+
+
+def test_enabling_rotation_rebuilds_incremental_atlases(tmp_path):
+    write_mixed_catalog(tmp_path / 'input')
+    build(tmp_path)
+    atlas_data, counters = build(tmp_path, allow_rotation=True)
+    assert counters.get('atlases_reused', 0) == 0
+    assert any(uv.get('rotated') for atlas in atlas_data['atlases'] for uv in atlas['uv'].values())
@@ -0,0 +1,43 @@
+import random
+
+from generate_posters import Layout, Rectangle, compute_layout
+
+
+def test_layout_accumulates_areas_while_packing():
+    layout = Layout()
+    layout.add('a.png', Rectangle(0, 0, 44, 24), 2)
+    layout.add('b.png', Rectangle(44, 0, 24, 54), 2)
+    assert len(layout) == 2
+    assert (layout.width, layout.height) == (68, 54)  # Used extent
+    assert (layout.image_area, layout.padded_area) == (40 * 20 + 20 * 50, 44 * 24 + 24 * 54)
+    layout.finish('none', 100, 100)
+    assert layout.atlas_area == 68 * 54
+
+
+def test_layout_placements_and_uv():
+    layout = Layout()
+    layout.add('a.png', Rectangle(0, 0, 44, 24), 2)
+    layout.add('b.png', Rectangle(44, 0, 24, 54), 2)
+    layout.finish('none', 100, 100)
+    assert layout.placements() == {
+        'a.png': {'x': 2, 'y': 2, 'width': 40, 'height': 20},
+        'b.png': {'x': 46, 'y': 2, 'width': 20, 'height': 50},
+    }
+    uv = layout.uv()['a.png']
+    assert (uv['width'], uv['height']) == (40, 20)
+    assert (uv['rect_x'], uv['rect_width'], uv['rect_height']) == (2 / 68, 40 / 68, 20 / 54)
+    assert uv['rect_y'] == 1.0 - 22 / 54  # Bottom left origin
+
+
+def test_compute_layout_areas_match_placements():
+    rng = random.Random(7)
+    entries = [(f'{i}.png', rng.randint(10, 120), rng.randint(10, 120)) for i in range(60)]
+    padding = 2
+    layout = compute_layout(entries, 512, 512, padding, 'best_short_side_fit')
+    placements = layout.placements()
+    assert 0 < len(layout) < len(entries)  # Stops at the first image that does not fit
+    assert list(placements) == [filename for filename, _, _ in entries[:len(layout)]]
+    assert layout.image_area == sum(p['width'] * p['height'] for p in placements.values())
+    assert layout.padded_area == sum((p['width'] + padding * 2) * (p['height'] + padding * 2) for p in placements.values())
+    assert all(p['x'] + p['width'] + padding <= layout.width and p['y'] + p['height'] + padding <= layout.height
+               for p in placements.values())
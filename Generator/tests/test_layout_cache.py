@@ -0,0 +1,53 @@
+from generate_posters import LayoutCache, compute_layout
+
+
+def layout_state(layout):
+    return (layout.names, list(layout.rects), layout.width, layout.height, layout.image_area, layout.padded_area,
+            layout.rotated)
+
+
+def test_round_trip_with_rotation():
+    entries = [('tall.png', 40, 90), ('wide.png', 50, 30), ('small.png', 10, 10)]
+    layout = compute_layout(entries, 150, 50, 1, 'best_short_side_fit', allow_rotation=True)
+    assert 'tall.png' in layout.rotated  # Only fits turned
+    expanded = LayoutCache.expand(LayoutCache.compact(layout), entries)
+    assert layout_state(expanded) == layout_state(layout)
+    assert expanded.uv() == layout.uv()
+
+
+def test_entries_are_shared_by_name():
+    task = ([('a.png', 40, 90), ('b.png', 50, 30)], 150, 50, 1, 'best_short_side_fit', 'python', 'none', True, 1)
+    renamed = ([('x.png', 40, 90), ('y.png', 50, 30)], *task[1:])
+    assert LayoutCache.key(task) == LayoutCache.key(renamed)
+    assert LayoutCache.key(task) != LayoutCache.key(([('a.png', 90, 40), ('b.png', 50, 30)], *task[1:]))
+    assert LayoutCache.key(task) != LayoutCache.key((*task[:-2], False, 1))
+
+    layout = compute_layout(*task)
+    expanded = LayoutCache.expand(LayoutCache.compact(layout), renamed[0])
+    assert expanded.names == ['x.png', 'y.png']
+    assert expanded.rotated == {'x.png'}
+    assert list(expanded.rects) == list(layout.rects)
+
+
+def test_partial_layouts():
+    entries = [('a.png', 60, 60), ('b.png', 60, 60)]
+    layout = compute_layout(entries, 100, 100, 0, 'best_short_side_fit')
+    assert layout.names == ['a.png']
+    assert layout_state(LayoutCache.expand(LayoutCache.compact(layout), entries)) == layout_state(layout)
+
+
+def test_least_recently_used_entries_go_first(tmp_path):
+    cache = LayoutCache(max_entries=2)
+    cache.put('a', [1])
+    cache.put('b', [2])
+    assert cache.get('a') == [1]
+    cache.put('c', [3])
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.hits == 1
+
+    path = str(tmp_path / 'layouts.json')
+    cache.save(path)
+    loaded = LayoutCache()
+    loaded.load(path)
+    assert dict(loaded.entries) == {'a': [1], 'c': [3]}
+    assert loaded.added == {}  # Only entries computed by this build are merged into the parent
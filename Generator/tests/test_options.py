@@ -0,0 +1,20 @@
+import inspect
+
+from generate_posters import AtlasGenerator, AtlasOptions, main
+
+
+def test_positional_parameters_of_the_baseline_api():
+    generator = AtlasGenerator(1024, 'in', 'out', 3, 512)
+    assert (generator.max_atlas_size, generator.input_folder, generator.output_folder) == (1024, 'in', 'out')
+    assert (generator.padding, generator.max_image_size) == (3, 512)
+    assert list(inspect.signature(main).parameters)[:6] == ['input_folder', 'output_folder', 'max_atlas_size', 'padding',
+                                                            'max_image_size', 'progress_callback']
+
+
+def test_options_and_overrides():
+    options = AtlasOptions(max_atlas_size=1024, padding=4, dedup='exact')
+    generator = AtlasGenerator(options=options, dedup='perceptual')
+    assert (generator.max_atlas_size, generator.padding, generator.max_image_size) == (1024, 4, 1024)
+    assert generator.dedup == 'perceptual'
+    assert options.dedup == 'exact'  # The caller's options are left untouched
+    assert AtlasGenerator(512, padding=0, options=options).options.max_atlas_size == 512
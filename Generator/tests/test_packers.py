@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from generate_posters import BinPacker, GuillotinePacker, NumpyBinPacker, SkylinePacker, PACKER_FAMILIES
+
+
+def catalog_sizes(seed, count=200, smallest=8, largest=160):
+    rng = random.Random(seed)
+    return [(rng.randint(smallest, largest), rng.randint(smallest, largest)) for _ in range(count)]
+
+
+def pack(packer, sizes):
+    """Positions returned by the packer, None for the rectangles that did not fit"""
+    placed = []
+    for width, height in sizes:
+        rect = packer.insert(width, height)
+        placed.append(None if rect is None else (rect.x, rect.y, rect.width, rect.height))
+    return placed
+
+
+def free_rectangles(packer):
+    return [(rect.x, rect.y, rect.width, rect.height) for rect in packer.free_rectangles]
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+@pytest.mark.parametrize('strategy', PACKER_FAMILIES['maxrects'])
+def test_grid_index_keeps_placements(strategy, seed):
+    sizes = catalog_sizes(seed)
+    indexed = BinPacker(1024, 1024, strategy)
+    unindexed = BinPacker(1024, 1024, strategy, use_index=False)
+    assert pack(indexed, sizes) == pack(unindexed, sizes)
+    assert indexed.index is not None  # The free list grew past INDEX_THRESHOLD
+    assert free_rectangles(indexed) == free_rectangles(unindexed)
+
+
+@pytest.mark.parametrize('seed', [1, 2])
+@pytest.mark.parametrize('strategy', PACKER_FAMILIES['maxrects'])
+def test_numpy_engine_matches_bin_packer(strategy, seed):
+    pytest.importorskip('numpy')
+    sizes = catalog_sizes(seed)
+    assert pack(NumpyBinPacker(1024, 1024, strategy), sizes) == pack(BinPacker(1024, 1024, strategy, use_index=False), sizes)
+
+
+@pytest.mark.parametrize('allow_rotation', [False, True])
+@pytest.mark.parametrize('packer_class, strategy', [(SkylinePacker, s) for s in SkylinePacker.PLACEMENT_STRATEGIES] +
+                         [(GuillotinePacker, s) for s in GuillotinePacker.PLACEMENT_STRATEGIES])
+def test_skyline_and_guillotine_placements_are_valid(packer_class, strategy, allow_rotation):
+    sizes = catalog_sizes(4)
+    placed = pack(packer_class(1024, 1024, strategy, allow_rotation), sizes)
+    rects = [rect for rect in placed if rect is not None]
+    assert len(rects) > len(sizes) // 4
+    for (width, height), rect in zip(sizes, placed):
+        if rect is not None:
+            assert rect[2:] in ((width, height), (height, width) if allow_rotation else (width, height))
+    for x, y, width, height in rects:
+        assert 0 <= x and 0 <= y and x + width <= 1024 and y + height <= 1024
+    for i, (x, y, width, height) in enumerate(rects):
+        for other_x, other_y, other_width, other_height in rects[i + 1:]:
+            assert x + width <= other_x or other_x + other_width <= x or y + height <= other_y or other_y + other_height <= y
@@ -0,0 +1,21 @@
+import threading
+
+from generate_posters import AtlasOptions, _init_scale_worker, _search_scale_task
+
+ENTRIES = [(f'{i}.png', 60 + i * 7, 90 - i * 3) for i in range(12)]
+
+
+def test_scale_task_searches_from_options(tmp_path):
+    result = _search_scale_task(AtlasOptions(max_atlas_size=256), str(tmp_path), ENTRIES)
+    assert sum(atlas['count'] for atlas in result['atlases']) == len(ENTRIES)
+    assert result['layout_cache_entries']  # Merged into the parent cache
+
+
+def test_scale_task_stops_once_the_build_is_done(tmp_path):
+    stop_event = threading.Event()
+    stop_event.set()  # A smaller scale level already fits in one atlas
+    _init_scale_worker(stop_event)
+    try:
+        assert _search_scale_task(AtlasOptions(max_atlas_size=256), str(tmp_path), ENTRIES) is None
+    finally:
+        _init_scale_worker(None)
@@ -0,0 +1,87 @@
+from PIL import Image
+
+from generate_posters import AtlasGenerator
+
+
+def gradient_poster(size, seed):
+    """Opaque image whose pixels all differ, so any flip, turn or offset shows"""
+    width, height = size
+    image = Image.new('RGBA', size)
+    image.putdata([((x * 7 + seed) % 256, (y * 5 + seed) % 256, (x * y + seed) % 256, 255)
+                   for y in range(height) for x in range(width)])
+    return image
+
+
+def build(tmp_path, images, **options):
+    folder = tmp_path / 'input'
+    folder.mkdir()
+    for filename, image in images.items():
+        image.save(folder / filename)
+    generator = AtlasGenerator(256, str(folder), str(tmp_path / 'output'), png_compress_level=1,
+                               catalog_index=str(tmp_path / 'catalog.json'), **options)
+    try:
+        return generator.generate_atlases()
+    finally:
+        generator.close()
+
+
+def source_from_atlas(tmp_path, atlas, uv):
+    """Source image rebuilt from its atlas area as a client does (Unity UVs, bottom left origin)"""
+    with Image.open(tmp_path / 'output' / atlas['file']) as atlas_image:
+        atlas_image = atlas_image.convert('RGBA')
+    left = round(uv['rect_x'] * atlas['width'])
+    top = round((1.0 - uv['rect_y'] - uv['rect_height']) * atlas['height'])
+    right, bottom = left + round(uv['rect_width'] * atlas['width']), top + round(uv['rect_height'] * atlas['height'])
+    image = atlas_image.crop((left, top, right, bottom))
+    if uv.get('rotated'):
+        image = image.transpose(Image.Transpose.ROTATE_90)  # Packed turned 90 degrees clockwise
+    assert image.size == (uv['width'], uv['height'])
+    trim = uv.get('trim')
+    if trim:
+        # Only the opaque box was packed: put it back in a transparent frame of the source size
+        assert image.size == (trim['width'], trim['height'])
+        frame = Image.new('RGBA', (trim['source_width'], trim['source_height']), (0, 0, 0, 0))
+        frame.paste(image, (trim['x'], trim['y']))
+        image = frame
+    return image
+
+
+def with_margins(image, size, position):
+    """Image placed in a larger, fully transparent canvas"""
+    canvas = Image.new('RGBA', size, (0, 0, 0, 0))
+    canvas.paste(image, position)
+    return canvas
+
+
+def test_rotated_images_round_trip(tmp_path):
+    images = {f'wide_{i}.png': gradient_poster((200, 60), i * 40) for i in range(3)}
+    images.update({f'tall_{i}.png': gradient_poster((60, 200), i * 40 + 20) for i in range(3)})
+    atlas_data = build(tmp_path, images, allow_rotation=True)
+    
+    rotated = 0
+    for atlas in (atlas for atlas in atlas_data['atlases'] if atlas['scale'] == 1):
+        for filename, uv in atlas['uv'].items():
+            rotated += bool(uv.get('rotated'))
+            assert source_from_atlas(tmp_path, atlas, uv).tobytes() == images[filename].tobytes()
+    assert rotated
+
+
+def test_trimmed_images_round_trip(tmp_path):
+    # Once trimmed, the tall box only fits turned below the wide one
+    images = {
+        'wide.png': with_margins(gradient_poster((230, 60), 10), (240, 100), (5, 30)),
+        'tall.png': with_margins(gradient_poster((60, 230), 90), (100, 250), (10, 12)),
+        'opaque.png': gradient_poster((60, 60), 170),
+    }
+    atlas_data = build(tmp_path, images, trim_alpha=True, allow_rotation=True)
+    
+    trimmed, rotated = set(), set()
+    for atlas in (atlas for atlas in atlas_data['atlases'] if atlas['scale'] == 1):
+        for filename, uv in atlas['uv'].items():
+            if 'trim' in uv:
+                trimmed.add(filename)
+            if uv.get('rotated'):
+                rotated.add(filename)
+            assert source_from_atlas(tmp_path, atlas, uv).tobytes() == images[filename].tobytes()
+    assert trimmed == {'wide.png', 'tall.png'}
+    assert rotated & trimmed
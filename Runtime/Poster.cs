@@ -47,10 +47,28 @@ namespace Nappollen.UdonPoster {
 				Debug.LogWarning($"Redirecting to '{_redirect}' is not supported in this context.");
 		}
 
-		private void SetTexture(Texture2D texture, Rect uv, Vector2 size) {
-			aspect.aspectRatio = size.x <= 0 || size.y <= 0 ? 1 : size.x / size.y;
+		private void SetTexture(Texture2D texture, Rect uv, Vector2 size, bool rotated, Rect frame) {
+			// Trimmed images only hold the opaque box of the source image: the poster keeps the
+			// source aspect ratio and the image only covers the box (frame, normalized) within it
+			var sourceWidth  = frame.width > 0 ? size.x / frame.width : size.x;
+			var sourceHeight = frame.height > 0 ? size.y / frame.height : size.y;
+			aspect.aspectRatio = sourceWidth <= 0 || sourceHeight <= 0 ? 1 : sourceWidth / sourceHeight;
 			image.texture      = texture;
 			image.uvRect       = uv;
+
+			var rect = image.rectTransform;
+			rect.anchorMin = frame.min;
+			rect.anchorMax = frame.max;
+
+			// Rotated images are stored turned 90° clockwise in the atlas: swap the axes of the
+			// image rect, then turn it back counterclockwise so it covers the same area
+			if (rotated && size.x > 0 && size.y > 0) {
+				rect.localScale       = new Vector3(size.y / size.x, size.x / size.y, 1);
+				rect.localEulerAngles = new Vector3(0, 0, 90);
+			} else {
+				rect.localScale       = Vector3.one;
+				rect.localEulerAngles = Vector3.zero;
+			}
 		}
 
 		public void OnMetadataError(PosterManager manager, int code, string err) {
@@ -136,6 +154,28 @@ namespace Nappollen.UdonPoster {
 				var rectHeight = uvData.TryGetValue("rect_height", TokenType.Double, out var vMaxToken) ? vMaxToken.Double : 1;
 				var width      = uvData.TryGetValue("width", TokenType.Double, out var widthToken) ? (int)widthToken.Double : 1;
 				var height     = uvData.TryGetValue("height", TokenType.Double, out var heightToken) ? (int)heightToken.Double : 1;
+				var rotated    = uvData.TryGetValue("rotated", TokenType.Boolean, out var rotatedToken) && rotatedToken.Boolean;
+
+				// Box of a trimmed image within its source image, normalized with origin at bottom left
+				var frameX      = 0.0;
+				var frameY      = 0.0;
+				var frameWidth  = 1.0;
+				var frameHeight = 1.0;
+				if (uvData.TryGetValue("trim", TokenType.DataDictionary, out var trimToken)) {
+					var trim         = trimToken.DataDictionary;
+					var sourceWidth  = trim.TryGetValue("source_width", TokenType.Double, out var swToken) ? swToken.Double : 0;
+					var sourceHeight = trim.TryGetValue("source_height", TokenType.Double, out var shToken) ? shToken.Double : 0;
+					if (sourceWidth > 0 && sourceHeight > 0
+						&& trim.TryGetValue("x", TokenType.Double, out var txToken)
+						&& trim.TryGetValue("y", TokenType.Double, out var tyToken)
+						&& trim.TryGetValue("width", TokenType.Double, out var twToken)
+						&& trim.TryGetValue("height", TokenType.Double, out var thToken)) {
+						frameX      = txToken.Double / sourceWidth;
+						frameY      = 1 - (tyToken.Double + thToken.Double) / sourceHeight;
+						frameWidth  = twToken.Double / sourceWidth;
+						frameHeight = thToken.Double / sourceHeight;
+					}
+				}
 
 				// Create UV JSON string
 				var newArray = new string[ scalesArray.Length + 1 ];
@@ -146,7 +186,9 @@ namespace Nappollen.UdonPoster {
 					+ $",{atlasIndex}"
 					+ $",{atlasWidth},{atlasHeight}"
 					+ $",{rectX.ToString(inv)},{rectY.ToString(inv)},{rectWidth.ToString(inv)},{rectHeight.ToString(inv)}"
-					+ $",{width},{height}";
+					+ $",{width},{height}"
+					+ $",{(rotated ? 1 : 0)}"
+					+ $",{frameX.ToString(inv)},{frameY.ToString(inv)},{frameWidth.ToString(inv)},{frameHeight.ToString(inv)}";
 				_current    = Mathf.Max(_current, scale * 2);
 				scalesArray = newArray;
 			}
@@ -231,7 +273,7 @@ namespace Nappollen.UdonPoster {
 				if (string.IsNullOrEmpty(line))
 					continue;
 				var parts = line.Split(',');
-				if (parts.Length != 10)
+				if (parts.Length != 15)
 					continue;
 				if (!int.TryParse(parts[1], out var i) || i != atlasIndex)
 					continue;
@@ -253,7 +295,7 @@ namespace Nappollen.UdonPoster {
 				if (string.IsNullOrEmpty(line))
 					continue;
 				var parts = line.Split(',');
-				if (parts.Length != 10)
+				if (parts.Length != 15)
 					continue;
 				if (!int.TryParse(parts[1], out var i) || i != atlasIndex)
 					continue;
@@ -266,6 +308,45 @@ namespace Nappollen.UdonPoster {
 			return Vector2.one;
 		}
 
+		private bool GetAtlasRotated(int atlasIndex) {
+			if (_scales == null)
+				return false;
+			foreach (var line in _scales) {
+				if (string.IsNullOrEmpty(line))
+					continue;
+				var parts = line.Split(',');
+				if (parts.Length != 15)
+					continue;
+				if (!int.TryParse(parts[1], out var i) || i != atlasIndex)
+					continue;
+				return parts[10] == "1"; // rotated
+			}
+
+			return false;
+		}
+
+		private Rect GetAtlasFrame(int atlasIndex) {
+			if (_scales == null)
+				return new Rect(0, 0, 1, 1);
+			foreach (var line in _scales) {
+				if (string.IsNullOrEmpty(line))
+					continue;
+				var parts = line.Split(',');
+				if (parts.Length != 15)
+					continue;
+				if (!int.TryParse(parts[1], out var i) || i != atlasIndex)
+					continue;
+				return new Rect(
+					float.Parse(parts[11], CultureInfo.InvariantCulture), // frame x
+					float.Parse(parts[12], CultureInfo.InvariantCulture), // frame y
+					float.Parse(parts[13], CultureInfo.InvariantCulture), // frame width
+					float.Parse(parts[14], CultureInfo.InvariantCulture) // frame height
+				);
+			}
+
+			return new Rect(0, 0, 1, 1);
+		}
+
 		private int GetAtlasScale(int atlasIndex) {
 			if (_scales == null)
 				return 1;
@@ -333,7 +414,8 @@ namespace Nappollen.UdonPoster {
 			if (scale >= _current)
 				return;
 			_current = scale;
-			SetTexture(texture, GetAtlasUV(atlasIndex), GetAtlasSize(atlasIndex));
+			SetTexture(texture, GetAtlasUV(atlasIndex), GetAtlasSize(atlasIndex), GetAtlasRotated(atlasIndex),
+				GetAtlasFrame(atlasIndex));
 			animator.SetInteger(Animator.StringToHash("state"), 2);
 		}
 